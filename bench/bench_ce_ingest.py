@@ -0,0 +1,44 @@
+"""Throughput and peak RSS of the streaming Cost Explorer ingestion.
+
+Usage: python bench/bench_ce_ingest.py [days] [keys] [page_size]
+"""
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from ce_ingest import aggregate_rows, iter_cost_pages, iter_cost_rows
+from stubs import StubCEClient
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    keys = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    page_size = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+
+    client = StubCEClient(days=days, keys=keys, page_size=page_size)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    rows = 0
+
+    def counted(it):
+        nonlocal rows
+        for row in it:
+            rows += 1
+            yield row
+
+    pages = iter_cost_pages(client, Granularity='DAILY', Metrics=['UnblendedCost'])
+    totals = aggregate_rows(counted(iter_cost_rows(pages)))
+    elapsed = time.perf_counter() - started
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"pages={client.calls} rows={rows} keys={len(totals)}")
+    print(f"elapsed={elapsed:.2f}s throughput={rows / elapsed:,.0f} rows/s")
+    print(f"peak_rss={rss_after / 1024:.1f} MB (+{(rss_after - rss_before) / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""CostSeries vs. the old {service: float} dict/Decimal path.
+
+Usage: python bench/bench_cost_series.py [days] [services]
+"""
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from cost_series import CostSeries
+
+
+def make_daily_costs(days, services, start):
+    return {
+        (start + timedelta(days=d)).isoformat(): {
+            f"Service {s:03d}": f"{((d * 31 + s * 17) % 1000) / 97:.10f}" for s in range(services)
+        }
+        for d in range(days)
+    }
+
+
+def dict_path(daily_costs):
+    cost_summary = {}
+    for costs in daily_costs.values():
+        for service, amount in costs.items():
+            amount = Decimal(amount)
+            if amount > 0:
+                cost_summary[service] = cost_summary.get(service, Decimal(0)) + amount
+    summary = {k: float(v) for k, v in cost_summary.items()}
+    total = sum(summary.values())
+    top = sorted(summary.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    return total, top
+
+
+def series_build(daily_costs, start, end):
+    return CostSeries.from_daily_costs(daily_costs, start, end)
+
+
+def series_query(series):
+    return series.total(), series.top_k(5), series.last(30).total(), series.deltas(30)
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    services = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    start = date(2025, 1, 1)
+    end = start + timedelta(days=days)
+    daily_costs = make_daily_costs(days, services, start)
+    series = series_build(daily_costs, start, end)
+
+    runs = 5
+    cases = [
+        ("dict/Decimal (ingest + total + top5)", lambda: dict_path(daily_costs)),
+        ("CostSeries build", lambda: series_build(daily_costs, start, end)),
+        ("CostSeries total + top5 + 30d window + PoP", lambda: series_query(series)),
+    ]
+    print(f"{days} days x {services} services")
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=1, repeat=runs))
+        print(f"{name:<45} {best * 1000:9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
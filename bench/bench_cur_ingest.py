@@ -0,0 +1,71 @@
+"""Synthetic CUR generator + streaming ingestion throughput (rows/sec).
+
+Usage: python bench/bench_cur_ingest.py [rows_per_file] [files] [workers]
+"""
+import csv
+import gzip
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from cur_ingest import ingest_cur_files
+
+HEADER = [
+    'identity/LineItemId', 'lineItem/UsageStartDate', 'lineItem/ProductCode', 'product/ProductName',
+    'lineItem/ResourceId', 'lineItem/UsageType', 'lineItem/UsageAmount', 'lineItem/UnblendedCost',
+    'resourceTags/user:team', 'resourceTags/user:env'
+]
+SERVICES = ['Amazon Elastic Compute Cloud', 'Amazon Simple Storage Service', 'Amazon Relational Database Service',
+            'Amazon Virtual Private Cloud', 'AWS Lambda', 'Amazon CloudWatch']
+TEAMS = ['payments', 'search', 'platform', 'data', '']
+
+
+def generate_cur(path, rows, start, days=30, resources=20000, seed=0):
+    """Write a gzip'd legacy-format CUR CSV with `rows` line items."""
+    rng = random.Random(seed)
+    with gzip.open(path, 'wt', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(rows):
+            service = rng.choice(SERVICES)
+            day = start + timedelta(days=rng.randrange(days))
+            writer.writerow([
+                f"li-{seed}-{i}", f"{day.isoformat()}T{rng.randrange(24):02d}:00:00Z", service[:12], service,
+                f"arn:aws:resource/{rng.randrange(resources)}", f"USE1-{service[7:11]}-{rng.randrange(40)}",
+                f"{rng.random():.6f}", f"{rng.random() * 0.5:.10f}",
+                rng.choice(TEAMS), rng.choice(['prod', 'dev'])
+            ])
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    start = date(2025, 1, 1)
+    end = start + timedelta(days=31)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"cur-{i}.csv.gz") for i in range(files)]
+        for i, path in enumerate(paths):
+            generate_cur(path, rows, start, seed=i)
+
+        started = time.perf_counter()
+        result = ingest_cur_files(paths, start, end, workers=workers)
+        elapsed = time.perf_counter() - started
+
+    total_rows = rows * files
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{files} files x {rows} rows, workers={workers}")
+    print(f"elapsed={elapsed:.2f}s throughput={total_rows / elapsed:,.0f} rows/s peak_rss(parent)={peak:.1f} MB")
+    for dim, series in result.items():
+        print(f"  {dim:<10} keys={len(series):<6} top={series.top_k(1)}")
+
+
+if __name__ == '__main__':
+    main()
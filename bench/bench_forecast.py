@@ -0,0 +1,59 @@
+"""Backtest of the local Holt-Winters forecaster on synthetic daily cost series.
+
+Holds out the last `horizon` days of each series and reports sMAPE of the
+horizon total (what a month-end forecast depends on) and time per 1,000 series.
+
+Usage: python bench/bench_forecast.py [series] [history_days] [horizon]
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from forecast import holt_winters
+
+
+def synthetic_series(rng, days):
+    base = rng.uniform(0.5, 500)
+    slope = rng.uniform(-0.005, 0.01) * base
+    weekly = rng.uniform(0, 0.3) * base
+    noise = rng.uniform(0.01, 0.15) * base
+    return [
+        max(0.0, base + slope * t + weekly * math.sin(2 * math.pi * t / 7) + rng.gauss(0, noise))
+        for t in range(days)
+    ]
+
+
+def smape(actual, predicted):
+    denom = abs(actual) + abs(predicted)
+    return 0.0 if denom == 0 else 2 * abs(actual - predicted) / denom
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    history = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    horizon = int(sys.argv[3]) if len(sys.argv) > 3 else 14
+    rng = random.Random(42)
+    data = [synthetic_series(rng, history + horizon) for _ in range(count)]
+
+    errors = []
+    naive_errors = []
+    started = time.perf_counter()
+    for values in data:
+        train, test = values[:history], values[history:]
+        forecast = holt_winters(train, horizon)
+        errors.append(smape(sum(test), sum(forecast)))
+        naive = sum(train[-7:]) / 7 * horizon
+        naive_errors.append(smape(sum(test), naive))
+    elapsed = time.perf_counter() - started
+
+    print(f"{count} series, {history} days history, {horizon} day horizon")
+    print(f"holt-winters sMAPE={100 * sum(errors) / count:.2f}%  (naive 7-day mean: {100 * sum(naive_errors) / count:.2f}%)")
+    print(f"time per 1,000 series: {elapsed * 1000 / count * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Throughput of the local HCL check on generated-style snippets, cold (unique texts) and memoized (repeats).
+
+Usage: python bench/bench_hcl_check.py [snippets]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from hcl_check import CACHE_SIZE, _check, check_hcl
+
+SNIPPET = '''# TIP: Move old objects to cheaper storage ({i}).
+resource "aws_s3_bucket_lifecycle_configuration" "logs_{i}" {{
+  bucket = aws_s3_bucket.logs.id
+  rule {{
+    id     = "archive-${{var.env}}"
+    status = "Enabled"
+    filter {{ prefix = "logs/" }}
+    transition {{
+      days          = {days}
+      storage_class = "STANDARD_IA"
+    }}
+  }}
+  tags = merge(local.tags, {{ Name = "logs-{i}" }})
+}}
+
+resource "aws_launch_template" "spot_{i}" {{
+  instance_market_options {{
+    market_type = "spot"
+  }}
+  instance_type = var.size == "large" ? "m5.large" : "t3.micro"
+}}
+'''
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    snippets = [SNIPPET.format(i=i, days=30 + i % 60) for i in range(n)]
+    assert all(check_hcl(s).ok for s in snippets[:10])
+
+    _check.cache_clear()
+    started = time.perf_counter()
+    for snippet in snippets:
+        check_hcl(snippet)
+    cold = time.perf_counter() - started
+    print(f"cold:     {n / cold:8.0f} snippets/s ({len(SNIPPET)} chars each)")
+
+    hot = snippets[:CACHE_SIZE // 2]
+    for snippet in hot:
+        check_hcl(snippet)
+    repeats = hot * max(1, n // len(hot))
+    started = time.perf_counter()
+    for snippet in repeats:
+        check_hcl(snippet)
+    warm = time.perf_counter() - started
+    print(f"memoized: {len(repeats) / warm:8.0f} snippets/s {_check.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
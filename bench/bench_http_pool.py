@@ -0,0 +1,81 @@
+"""Warm-invocation HTTP latency: new connection per call (requests.post style) vs. the keep-alive HttpPool.
+
+A local keep-alive server charges `handshake` seconds per new connection to stand in
+for TCP + TLS setup to api.deepseek.com / hooks.slack.com.
+
+Usage: python bench/bench_http_pool.py [calls] [handshake_seconds] [server_seconds]
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+import httpx
+
+from http_pool import HttpPool
+
+
+def serve(handshake, server_time):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # One write per response, so loopback Nagle/delayed-ACK stalls don't skew the numbers.
+        wbufsize = -1
+
+        def setup(self):
+            super().setup()
+            time.sleep(handshake)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(server_time)
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def timed(label, calls, fn):
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<24} p50 {statistics.median(samples):6.1f} ms  max {max(samples):6.1f} ms")
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    handshake = float(sys.argv[2]) if len(sys.argv) > 2 else 0.15
+    server_time = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+    server, url = serve(handshake, server_time)
+    payload = {"text": "x" * 512}
+    try:
+        def fresh():
+            with httpx.Client() as client:
+                client.post(url, json=payload)
+
+        timed("new connection per call", calls, fresh)
+
+        pool = HttpPool()
+        pool.request('POST', url, total=5, json=payload)
+        timed("pooled keep-alive", calls, lambda: pool.request('POST', url, total=5, json=payload))
+        pool.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Streaming vs. blocking LLM call against a local SSE stand-in, with rate-limited Slack updates.
+
+Usage: python bench/bench_llm_stream.py [first_token_delay] [per_token_delay]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from http_pool import HttpPool
+from llm_stream import ProgressiveUpdater, stream_chat
+from stubs import serve_stub_sse
+
+ANSWER = ("- **Analysis:** EC2 drives 62% of spend; two m5.2xlarge instances run at under 5% CPU overnight. " * 12
+          + "\n- **Terraform Fix:** use a spot launch template.\n- **Safety:** review before applying.")
+
+
+def main():
+    first_delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.4
+    token_delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    server, url = serve_stub_sse(ANSWER, first_delay, token_delay)
+    body = {"model": "deepseek-chat", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 800}
+    posts = []
+    pool = HttpPool()
+    try:
+        started = time.perf_counter()
+        text = stream_chat(pool, url, {}, body)
+        blocking = time.perf_counter() - started
+        print(f"blocking: answer visible after {blocking:.2f}s ({len(text)} chars)")
+
+        started = time.perf_counter()
+        updater = ProgressiveUpdater(lambda text, final, first: posts.append((time.perf_counter() - started, final)))
+        text = stream_chat(pool, url, {}, body, on_text=updater.update)
+        updater.finish(text)
+        gaps = [b[0] - a[0] for a, b in zip(posts, posts[1:-1])]
+        print(f"streaming: first partial after {posts[0][0]:.2f}s, final after {posts[-1][0]:.2f}s, "
+              f"{len(posts)} posts, min gap {min(gaps, default=0):.2f}s")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""Offline waste scan across 17 stubbed regions: serial vs. bounded pool vs. warm cache.
+
+Usage: python bench/bench_waste_scan.py [latency_seconds] [workers]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from stubs import stub_client_factory
+from waste_scanner import WasteScanner
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    findings, errors = fn()
+    print(f"{label:<22} {time.perf_counter() - started:6.2f}s findings={len(findings)} errors={len(errors)}")
+
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    factory = stub_client_factory(latency)
+
+    serial = WasteScanner(factory, max_workers=1)
+    regions = serial.regions()
+    timed("serial (1 worker)", lambda: serial.scan(regions))
+
+    pooled = WasteScanner(factory, max_workers=workers)
+    timed(f"pooled ({workers} workers)", lambda: pooled.scan(regions))
+    timed("warm cache", lambda: pooled.scan(regions))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Offline stand-ins for the AWS and LLM endpoints, used by the benchmarks (kept out of the Lambda package)."""
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -------- Cost Explorer -------- #
+
+class StubCEClient:
+    """Emits `days x keys` DAILY groups across many pages, generated lazily."""
+
+    def __init__(self, days=30, keys=20, page_size=500, start=date(2025, 1, 1)):
+        self.days = days
+        self.keys = keys
+        self.page_size = page_size
+        self.start = start
+        self.calls = 0
+
+    def get_cost_and_usage(self, **request):
+        self.calls += 1
+        offset = int(request.get('NextPageToken') or 0)
+        total = self.days * self.keys
+        stop = min(offset + self.page_size, total)
+
+        results = []
+        current = None
+        for i in range(offset, stop):
+            day_index, key_index = divmod(i, self.keys)
+            day = (self.start + timedelta(days=day_index)).isoformat()
+            if current is None or current['TimePeriod']['Start'] != day:
+                end = (self.start + timedelta(days=day_index + 1)).isoformat()
+                current = {'TimePeriod': {'Start': day, 'End': end}, 'Groups': [], 'Estimated': False}
+                results.append(current)
+            current['Groups'].append({
+                'Keys': [f"key-{key_index:05d}"],
+                'Metrics': {'UnblendedCost': {'Amount': f"{(key_index % 97) * 0.013:.6f}", 'Unit': 'USD'}}
+            })
+
+        page = {'ResultsByTime': results}
+        if stop < total:
+            page['NextPageToken'] = str(stop)
+        return page
+
+# -------- Waste Scan Clients -------- #
+
+class _StubPaginator:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def paginate(self, **_):
+        return iter(self.pages)
+
+
+class StubEC2Client:
+    """Fake EC2 with a fixed per-call latency and a few findings per region."""
+
+    def __init__(self, region, latency=0.2, per_region=3):
+        self.region = region
+        self.latency = latency
+        self.per_region = per_region
+
+    def describe_regions(self, **_):
+        time.sleep(self.latency)
+        names = ['us-east-1', 'us-east-2', 'us-west-1', 'us-west-2', 'ca-central-1', 'eu-west-1', 'eu-west-2',
+                 'eu-west-3', 'eu-central-1', 'eu-north-1', 'ap-south-1', 'ap-northeast-1', 'ap-northeast-2',
+                 'ap-northeast-3', 'ap-southeast-1', 'ap-southeast-2', 'sa-east-1']
+        return {'Regions': [{'RegionName': n} for n in names]}
+
+    def get_paginator(self, operation):
+        time.sleep(self.latency)
+        n = self.per_region
+        old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        pages = {
+            'describe_volumes': [{'Volumes': [{'VolumeId': f"vol-{self.region}-{i}", 'Size': 100, 'VolumeType': 'gp3'}
+                                              for i in range(n)]}],
+            'describe_instances': [{'Reservations': [{'Instances': [{'InstanceId': f"i-{self.region}",
+                                                                     'InstanceType': 'm5.large',
+                                                                     'BlockDeviceMappings': [{'Ebs': {'VolumeId': 'vol-x'}}]}]}]}],
+            'describe_nat_gateways': [{'NatGateways': [{'NatGatewayId': f"nat-{self.region}"}]}],
+            'describe_snapshots': [{'Snapshots': [{'SnapshotId': f"snap-{self.region}-{i}", 'VolumeSize': 50,
+                                                   'StartTime': old} for i in range(n)]}],
+        }
+        return _StubPaginator(pages[operation])
+
+    def describe_addresses(self):
+        time.sleep(self.latency)
+        return {'Addresses': [{'AllocationId': f"eipalloc-{self.region}", 'PublicIp': '203.0.113.10'}]}
+
+
+class StubCloudWatchClient:
+    def __init__(self, latency=0.2):
+        self.latency = latency
+
+    def get_metric_statistics(self, **_):
+        time.sleep(self.latency)
+        return {'Datapoints': [{'Sum': 0.0}]}
+
+
+def stub_client_factory(latency=0.2):
+    def factory(service, region):
+        return StubEC2Client(region, latency) if service == 'ec2' else StubCloudWatchClient(latency)
+    return factory
+
+# -------- Chat Completions SSE Server -------- #
+
+def serve_stub_sse(text, first_delay=0.4, token_delay=0.02, port=0):
+    """Local stand-in for the chat completions endpoint, streaming `text` word by word as SSE.
+
+    Uses chunked transfer encoding like the real API, so clients see each event
+    as it is written. Returns (server, url); call server.shutdown() when done.
+    """
+    words = text.split(' ')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            time.sleep(first_delay)
+            for i, word in enumerate(words):
+                chunk = {'choices': [{'index': 0, 'delta': {'content': word if i == 0 else ' ' + word}}]}
+                self._chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                time.sleep(token_delay)
+            self._chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
@@ -21,7 +21,7 @@ resource "aws_iam_role_policy" "lambda_policy" {
 
   policy = jsonencode({
     Version = "2012-10-17"
-    Statement = [
+    Statement = concat([
       # 1. Logs
       {
         Effect = "Allow"
@@ -35,10 +35,10 @@ resource "aws_iam_role_policy" "lambda_policy" {
       # 2. Cost Explorer
       {
         Effect = "Allow"
-        Action = ["ce:GetCostAndUsage"]
+        Action = ["ce:GetCostAndUsage", "ce:GetTags"]
         Resource = "*"
       },
-      # 3. DynamoDB (Chat History)
+      # 3. DynamoDB (Chat History + Cost Cache)
       {
         Effect = "Allow"
         Action = [
@@ -47,7 +47,10 @@ resource "aws_iam_role_policy" "lambda_policy" {
           "dynamodb:Query",
           "dynamodb:UpdateItem"
         ]
-        Resource = aws_dynamodb_table.chat_history.arn
+        Resource = [
+          aws_dynamodb_table.chat_history.arn,
+          aws_dynamodb_table.cost_cache.arn
+        ]
       },
       # 4. SSM (Secrets)
       {
@@ -55,14 +58,42 @@ resource "aws_iam_role_policy" "lambda_policy" {
         Action = ["ssm:GetParameter"]
         Resource = "arn:aws:ssm:*:*:parameter/costbot/*"
       },
-      # 5. NEW PERMISSION: Allow Lambda to Call Itself (Async)
+      # 5. Waste scanner (read-only EC2 inventory + NAT traffic)
+      {
+        Effect = "Allow"
+        Action = [
+          "ec2:DescribeRegions",
+          "ec2:DescribeVolumes",
+          "ec2:DescribeAddresses",
+          "ec2:DescribeInstances",
+          "ec2:DescribeNatGateways",
+          "ec2:DescribeSnapshots",
+          "cloudwatch:GetMetricStatistics"
+        ]
+        Resource = "*"
+      },
+      # 6. NEW PERMISSION: Allow Lambda to Call Itself (Async)
       {
         Effect = "Allow"
         Action = ["lambda:InvokeFunction"]
         # Allow it to invoke ANY function in this account (easiest for now)
         # Or you can restrict it to just itself using the function ARN
         Resource = aws_lambda_function.chatbot.arn
+      },
+      # 7. SNS (scheduled anomaly alerts)
+      {
+        Effect   = "Allow"
+        Action   = ["sns:Publish"]
+        Resource = aws_sns_topic.cost_alerts.arn
+      }
+    ],
+    # 8. CUR exports (only when configured)
+    length(var.cur_s3_uris) > 0 ? [
+      {
+        Effect   = "Allow"
+        Action   = ["s3:GetObject"]
+        Resource = [for uri in var.cur_s3_uris : replace(uri, "s3://", "arn:aws:s3:::")]
       }
-    ]
+    ] : [])
   })
 }
\ No newline at end of file
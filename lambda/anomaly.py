@@ -0,0 +1,250 @@
+import json
+import zlib
+from array import array
+from datetime import date, timedelta
+
+from cost_cache import ANOMALY_STATE_KEY, RESTATEMENT_DAYS
+from cost_series import CostSeries, to_dollars
+
+# EWMA smoothing for level and spread, plus a per-weekday multiplicative factor.
+ALPHA = 0.2
+SEASON_ALPHA = 0.1
+WEEK = 7
+WARMUP_DAYS = 7
+Z_THRESHOLD = 4.0
+# Ignore jumps that are large in ratio but trivial in dollars.
+MIN_DELTA_MICROS = 1_000_000
+HISTORY_DAYS = 60
+RECENT_DAYS = 2
+
+# -------- Incremental Detector -------- #
+
+class AnomalyDetector:
+    """Per-series EWMA baseline with weekday seasonality, updated in O(1) per day.
+
+    State is three float arrays + one count array, one slot per series, so thousands
+    of series cost a few tens of KB and no history is ever re-read.
+    """
+
+    def __init__(self, alpha=ALPHA, season_alpha=SEASON_ALPHA, threshold=Z_THRESHOLD):
+        self.alpha = alpha
+        self.season_alpha = season_alpha
+        self.threshold = threshold
+        self.keys = []
+        self.index = {}
+        self.level = array('d')
+        self.spread = array('d')
+        self.count = array('l')
+        self.season = array('d')   # WEEK factors per series, flattened
+        self.last_day = None
+
+    def _slot(self, key):
+        slot = self.index.get(key)
+        if slot is None:
+            slot = len(self.keys)
+            self.index[key] = slot
+            self.keys.append(key)
+            self.level.append(0.0)
+            self.spread.append(0.0)
+            self.count.append(0)
+            self.season.extend([1.0] * WEEK)
+        return slot
+
+    def expected(self, key, weekday):
+        slot = self.index.get(key)
+        if slot is None:
+            return 0.0
+        return self.level[slot] * self.season[slot * WEEK + weekday]
+
+    def score(self, key, day, micros, spikes_only=False):
+        """Score one day's value against the baseline without learning from it.
+
+        Returns an anomaly dict when it breaks the baseline; spikes_only ignores drops,
+        for partial days whose totals can only grow.
+        """
+        slot = self.index.get(key)
+        if slot is None or self.count[slot] < WARMUP_DAYS:
+            return None
+        expected = self.expected(key, day.weekday())
+        residual = micros - expected
+        spread = max(self.spread[slot], 0.05 * abs(expected), 1.0)
+        score = residual / spread
+        if spikes_only and residual <= 0:
+            return None
+        if abs(score) < self.threshold or abs(residual) < MIN_DELTA_MICROS:
+            return None
+        return {
+            'key': key,
+            'day': day.isoformat(),
+            'actual': to_dollars(micros),
+            'expected': round(to_dollars(expected), 6),
+            'ratio': round(micros / expected, 2) if expected else None,
+            'score': round(score, 1)
+        }
+
+    def update(self, key, day, micros):
+        """Feed one day's value; returns an anomaly dict when it breaks the baseline."""
+        anomaly = self.score(key, day, micros)
+        slot = self._slot(key)
+        factor_at = slot * WEEK + day.weekday()
+        factor = self.season[factor_at]
+        level = self.level[slot]
+        residual = micros - level * factor
+
+        # Update baseline (deseasonalized level, MAD-like spread, weekday factor).
+        if self.count[slot] == 0:
+            self.level[slot] = float(micros)
+        else:
+            deseasonalized = micros / factor if factor else float(micros)
+            self.level[slot] = level + self.alpha * (deseasonalized - level)
+            self.spread[slot] += self.alpha * (abs(residual) - self.spread[slot])
+            if self.level[slot] > 0:
+                ratio = micros / self.level[slot]
+                self.season[factor_at] = factor + self.season_alpha * (ratio - factor)
+        self.count[slot] += 1
+        return anomaly
+
+    def update_day(self, day, values):
+        """Feed one day for many series ({key: micros}); series missing that day count as 0."""
+        if self.last_day is not None and day <= self.last_day:
+            return []
+        anomalies = []
+        for key in self.keys:
+            if key not in values:
+                values[key] = 0
+        for key, micros in values.items():
+            anomaly = self.update(key, day, micros)
+            if anomaly:
+                anomalies.append(anomaly)
+        self.last_day = day
+        return anomalies
+
+    def feed_series(self, series):
+        """Feed every day of a CostSeries newer than last_day; returns all anomalies."""
+        anomalies = []
+        for offset in range(series.n_days):
+            day = series.day(offset)
+            if self.last_day is not None and day <= self.last_day:
+                continue
+            values = {service: row[offset] for service, row in zip(series.services, series.rows)}
+            anomalies.extend(self.update_day(day, values))
+        return anomalies
+
+    def score_series(self, series):
+        """Flag spikes in a CostSeries of provisional days without touching the baseline."""
+        anomalies = []
+        for offset in range(series.n_days):
+            day = series.day(offset)
+            for service, row in zip(series.services, series.rows):
+                anomaly = self.score(service, day, row[offset], spikes_only=True)
+                if anomaly:
+                    anomaly['provisional'] = True
+                    anomalies.append(anomaly)
+        return anomalies
+
+    # -------- Persistence -------- #
+
+    def to_state(self):
+        """Compact, DynamoDB-friendly snapshot (one zlib blob)."""
+        header = json.dumps({
+            'keys': self.keys,
+            'last_day': self.last_day.isoformat() if self.last_day else None
+        }).encode()
+        blob = b''.join([
+            len(header).to_bytes(4, 'big'), header,
+            self.level.tobytes(), self.spread.tobytes(), self.count.tobytes(), self.season.tobytes()
+        ])
+        return zlib.compress(blob)
+
+    @classmethod
+    def from_state(cls, state, **kwargs):
+        detector = cls(**kwargs)
+        blob = zlib.decompress(bytes(state))
+        size = int.from_bytes(blob[:4], 'big')
+        header = json.loads(blob[4:4 + size])
+        detector.keys = header['keys']
+        detector.index = {key: i for i, key in enumerate(detector.keys)}
+        detector.last_day = date.fromisoformat(header['last_day']) if header['last_day'] else None
+
+        n = len(detector.keys)
+        offset = 4 + size
+        for buffer, width in ((detector.level, 8 * n), (detector.spread, 8 * n),
+                              (detector.count, detector.count.itemsize * n), (detector.season, 8 * WEEK * n)):
+            buffer.frombytes(blob[offset:offset + width])
+            offset += width
+        return detector
+
+
+# -------- Stores -------- #
+
+class DynamoAnomalyStore:
+    def __init__(self, table):
+        self.table = table
+
+    def load(self, account_id):
+        item = self.table.get_item(Key={'account_id': account_id, 'day': ANOMALY_STATE_KEY}).get('Item')
+        if not item:
+            return AnomalyDetector(), []
+        return AnomalyDetector.from_state(item['state']), json.loads(item.get('recent', '[]'))
+
+    def save(self, account_id, detector, recent):
+        self.table.put_item(Item={
+            'account_id': account_id,
+            'day': ANOMALY_STATE_KEY,
+            'state': detector.to_state(),
+            'recent': json.dumps(recent)
+        })
+
+
+class InMemoryAnomalyStore:
+    def __init__(self):
+        self.items = {}
+
+    def load(self, account_id):
+        if account_id not in self.items:
+            return AnomalyDetector(), []
+        state, recent = self.items[account_id]
+        return AnomalyDetector.from_state(state), json.loads(recent)
+
+    def save(self, account_id, detector, recent):
+        self.items[account_id] = (detector.to_state(), json.dumps(recent))
+
+# -------- Refresh -------- #
+
+def refresh_anomalies(store, cost_cache, account_id, today=None, now=None):
+    """Feed settled days the detector has not seen yet; return anomalies of the last RECENT_DAYS
+    settled days plus spikes on the provisional days since.
+
+    Days inside Cost Explorer's restatement window are still partial and each day is
+    fed only once, so baselines only ever learn from days older than RESTATEMENT_DAYS.
+    Provisional days are scored against that baseline (spikes only, since a partial
+    total can still grow) and never persisted. The first run warms up on HISTORY_DAYS
+    of cached series; after that only new days are read and each costs O(1) per series.
+    """
+    today = today or date.today()
+    settled = today - timedelta(days=RESTATEMENT_DAYS)
+    detector, recent = store.load(account_id)
+    start = settled - timedelta(days=HISTORY_DAYS)
+    if detector.last_day and detector.last_day >= start:
+        start = detector.last_day + timedelta(days=1)
+
+    if start < settled:
+        daily_costs = cost_cache.get_daily_costs(account_id, start, settled, today=today)
+        recent = recent + detector.feed_series(CostSeries.from_daily_costs(daily_costs, start, settled))
+        cutoff = (settled - timedelta(days=RECENT_DAYS)).isoformat()
+        recent = [a for a in recent if a['day'] >= cutoff]
+        store.save(account_id, detector, recent)
+
+    daily_costs = cost_cache.get_daily_costs(account_id, settled, today, today=today, now=now)
+    provisional = detector.score_series(CostSeries.from_daily_costs(daily_costs, settled, today))
+    return recent + provisional
+
+
+def format_anomalies(anomalies, limit=5):
+    """Compact one-line-per-anomaly text for prompts and alerts."""
+    lines = []
+    for a in sorted(anomalies, key=lambda a: -abs(a['score']))[:limit]:
+        ratio = f"{a['ratio']}x" if a['ratio'] is not None else "new spend"
+        partial = ", provisional" if a.get('provisional') else ""
+        lines.append(f"{a['day']} {a['key']}: ${a['actual']:.2f} vs expected ${a['expected']:.2f} ({ratio}{partial})")
+    return "\n".join(lines)
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+# -------- Streaming Cost Explorer Ingestion -------- #
+
+def iter_cost_pages(ce_client, **request):
+    """Yield every get_cost_and_usage page, following NextPageToken."""
+    while True:
+        page = ce_client.get_cost_and_usage(**request)
+        yield page
+        token = page.get('NextPageToken')
+        if not token:
+            return
+        request['NextPageToken'] = token
+
+
+def iter_cost_rows(pages, metric='UnblendedCost'):
+    """Flatten pages into (day, *group_keys, amount_str) rows.
+
+    Ungrouped results yield (day, amount_str).
+    """
+    for page in pages:
+        for result in page.get('ResultsByTime', []):
+            day = result['TimePeriod']['Start']
+            groups = result.get('Groups')
+            if groups:
+                for group in groups:
+                    yield (day, *group['Keys'], group['Metrics'][metric]['Amount'])
+            elif metric in result.get('Total', {}):
+                yield (day, result['Total'][metric]['Amount'])
+
+
+def aggregate_rows(rows, key_index=1):
+    """Sum positive amounts per rows[key_index] in a single pass."""
+    totals = {}
+    for row in rows:
+        amount = Decimal(row[-1])
+        if amount > 0:
+            key = row[key_index]
+            totals[key] = totals.get(key, Decimal(0)) + amount
+    return totals
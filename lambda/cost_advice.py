@@ -0,0 +1,121 @@
+import json
+import re
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+from hcl_check import check_hcl
+
+# Appended to the system prompt. "analysis" comes first so streamed previews have something to show early.
+JSON_FORMAT = """Reply with one JSON object and nothing else:
+{"analysis": "short summary naming the primary cost driver and any anomalies",
+ "driver": "the AWS service driving the cost",
+ "estimated_monthly_savings_usd": 12.5,
+ "terraform_hcl": "HCL snippet for the optimization, without code fences",
+ "safety": "warning that this is a suggestion and what to check before applying"}"""
+
+# -------- Schema -------- #
+
+class CostAdvice(BaseModel):
+    """Validated LLM answer. Pydantic builds the validator when the class is defined, i.e. once per container."""
+
+    model_config = ConfigDict(str_strip_whitespace=True, extra='ignore')
+
+    # Lengths keep each rendered Block Kit section under Slack's 3000-character limit.
+    analysis: str = Field(min_length=1, max_length=2500)
+    driver: str = Field(min_length=1, max_length=200)
+    estimated_monthly_savings_usd: Optional[float] = Field(default=None, ge=0)
+    terraform_hcl: str = Field(min_length=1, max_length=2800)
+    safety: str = Field(min_length=1, max_length=1000)
+
+    @field_validator('terraform_hcl')
+    @classmethod
+    def _strip_fences(cls, value):
+        # Models add ```hcl fences despite the instructions; the renderer adds its own.
+        return re.sub(r"^```\w*\n?|\n?```$", "", value.strip()).strip()
+
+
+def parse_advice(text):
+    """CostAdvice from a model reply, ignoring any fence or chatter around the JSON object; raises ValidationError."""
+    text = text or ''
+    start, end = text.find('{'), text.rfind('}')
+    return CostAdvice.model_validate_json(text[start:end + 1] if 0 <= start < end else text)
+
+
+def load_advice(text):
+    """CostAdvice, or None for text that is not structured advice (rule-based answers, older cache entries)."""
+    try:
+        return parse_advice(text)
+    except ValidationError:
+        return None
+
+
+def review_reply(text):
+    """(advice or None, problems): schema errors, or HCL errors in an otherwise valid reply. No problems = usable."""
+    try:
+        advice = parse_advice(text)
+    except ValidationError as e:
+        return None, [f"{'.'.join(map(str, err['loc'])) or 'reply'}: {err['msg']}" for err in e.errors()[:5]]
+    return advice, [f"terraform_hcl {error}" for error in check_hcl(advice.terraform_hcl).errors]
+
+
+def repair_messages(messages, reply, problems):
+    """The conversation plus one turn asking the model to fix the listed problems in its reply."""
+    return messages + [
+        {"role": "assistant", "content": reply},
+        {"role": "user", "content": f"That reply was invalid ({'; '.join(problems)}). "
+                                    "Reply with only the corrected JSON object."}
+    ]
+
+# -------- Streaming Preview -------- #
+
+_PARTIAL_ANALYSIS = re.compile(r'"analysis"\s*:\s*"((?:[^"\\]|\\.)*)')
+
+
+def advice_preview(text):
+    """The (possibly unfinished) analysis field of a streaming JSON reply, for progressive Slack updates."""
+    match = _PARTIAL_ANALYSIS.search(text or '')
+    if not match:
+        return ""
+    raw = match.group(1)
+    try:
+        return json.loads(f'"{raw}"')
+    except ValueError:
+        # Cut inside a \uXXXX escape; the next delta completes it.
+        return raw.replace('\\n', '\n').replace('\\"', '"')
+
+# -------- Rendering -------- #
+
+def format_savings(advice):
+    if advice.estimated_monthly_savings_usd is None:
+        return "n/a"
+    return f"~${advice.estimated_monthly_savings_usd:,.2f}/month"
+
+
+def advice_markdown(advice):
+    """Plain-text form for chat history and the LLM's own context."""
+    return (f"- **Analysis:** {advice.analysis}\n"
+            f"- **Driver:** {advice.driver} (savings {format_savings(advice)})\n"
+            f"- **Terraform Fix:**\n```hcl\n{advice.terraform_hcl}\n```\n"
+            f"- **Safety:** {advice.safety}")
+
+
+def advice_blocks(advice):
+    """Block Kit sections: analysis, driver/savings fields, the HCL as a code block, safety as context.
+
+    HCL that fails the local check is still shown, with a warning under it.
+    """
+    hcl = advice.terraform_hcl.replace("```", "'''")
+    check = check_hcl(advice.terraform_hcl)
+    warning = [] if check.ok else [{"type": "context", "elements": [
+        {"type": "mrkdwn", "text": f"🚧 *HCL check failed:* {check.errors[0]}. Fix it before `terraform plan`."}]}]
+    return [
+        {"type": "section", "text": {"type": "mrkdwn", "text": f"*Analysis:* {advice.analysis}"}},
+        {"type": "section", "fields": [
+            {"type": "mrkdwn", "text": f"*Cost driver:*\n{advice.driver}"},
+            {"type": "mrkdwn", "text": f"*Est. savings:*\n{format_savings(advice)}"}
+        ]},
+        {"type": "section", "text": {"type": "mrkdwn", "text": f"*Terraform Fix:*\n```{hcl}```"}},
+        *warning,
+        {"type": "context", "elements": [{"type": "mrkdwn", "text": f"⚠️ *Safety:* {advice.safety}"}]}
+    ]
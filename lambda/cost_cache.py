@@ -0,0 +1,173 @@
+import time
+from datetime import date, timedelta
+
+# Cost Explorer keeps restating the most recent days, so they are always re-fetched.
+RESTATEMENT_DAYS = 2
+# A warm container re-fetches those days at most this often (anomalies, forecast, rollups
+# and the prompt all read the same window within one invocation).
+PROVISIONAL_TTL_SECONDS = 10 * 60
+
+# Other per-account items share this table under these sort keys. They start with a
+# letter, so they sort after every 'YYYY-MM-DD' day and never match a day-range query.
+ANOMALY_STATE_KEY = 'anomaly-state'
+QUERY_INDEX_KEY = 'query-index'
+FORECAST_PREFIX = 'forecast#'
+SNAPSHOT_PREFIX = 'snapshot#'
+RESPONSE_PREFIX = 'llm#'
+
+# -------- Stores -------- #
+
+class DynamoCostStore:
+    """Per-account daily cost items in DynamoDB: (account_id, day) -> {service: amount}."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def get_days(self, account_id, start, end):
+        from boto3.dynamodb.conditions import Key
+        days = {}
+        kwargs = {
+            'KeyConditionExpression': Key('account_id').eq(account_id)
+            & Key('day').between(start.isoformat(), (end - timedelta(days=1)).isoformat())
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            for item in response.get('Items', []):
+                days[item['day']] = item
+            if 'LastEvaluatedKey' not in response:
+                return days
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def put_day(self, account_id, day, costs, finalized):
+        self.table.put_item(Item={
+            'account_id': account_id,
+            'day': day,
+            'costs': costs,
+            'finalized': finalized
+        })
+
+
+class InMemoryCostStore:
+    """Local stand-in for DynamoCostStore (tests and offline runs)."""
+
+    def __init__(self):
+        self.items = {}
+
+    def get_days(self, account_id, start, end):
+        first, last = start.isoformat(), end.isoformat()
+        return {
+            day: item for (acct, day), item in self.items.items()
+            if acct == account_id and first <= day < last
+        }
+
+    def put_day(self, account_id, day, costs, finalized):
+        self.items[(account_id, day)] = {
+            'account_id': account_id,
+            'day': day,
+            'costs': dict(costs),
+            'finalized': finalized
+        }
+
+# -------- Cache -------- #
+
+def _missing_ranges(days):
+    """Collapse a sorted list of days into contiguous [start, end) ranges."""
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1)])
+    return [tuple(r) for r in ranges]
+
+
+class CostCache:
+    """Read-through cache of DAILY x SERVICE costs.
+
+    `fetch_fn(start, end)` must return {'YYYY-MM-DD': {service: amount_str}} for
+    every day in [start, end). Finalized days are served from the store forever;
+    only missing days and the restatement window go back to Cost Explorer, and
+    fetched restatement days are memoized in-process for `provisional_ttl` seconds.
+    """
+
+    def __init__(self, store, fetch_fn, restatement_days=RESTATEMENT_DAYS, provisional_ttl=PROVISIONAL_TTL_SECONDS):
+        self.store = store
+        self.fetch_fn = fetch_fn
+        self.restatement_days = restatement_days
+        self.provisional_ttl = provisional_ttl
+        # (account_id, 'YYYY-MM-DD') -> (fetched_at, costs) for days CE may still restate.
+        self.provisional = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    def get_daily_costs(self, account_id, start, end, today=None, now=None):
+        today = today or date.today()
+        now = now or time.time()
+        cutoff = today - timedelta(days=self.restatement_days)
+
+        try:
+            cached = self.store.get_days(account_id, start, end)
+        except Exception as e:
+            print(f"⚠️ Cost Cache Read Error: {e}")
+            cached = {}
+
+        result = {}
+        missing = []
+        day = start
+        while day < end:
+            item = cached.get(day.isoformat())
+            memo = self.provisional.get((account_id, day.isoformat()))
+            if item is not None and item.get('finalized'):
+                result[day.isoformat()] = item['costs']
+                self.hits += 1
+            elif memo is not None and now - memo[0] < self.provisional_ttl:
+                result[day.isoformat()] = memo[1]
+                self.hits += 1
+            else:
+                missing.append(day)
+                self.misses += 1
+            day += timedelta(days=1)
+
+        if missing:
+            self.provisional = {key: memo for key, memo in self.provisional.items()
+                                if now - memo[0] < self.provisional_ttl}
+        for range_start, range_end in _missing_ranges(missing):
+            fetched = self.fetch_fn(range_start, range_end)
+            self.fetches += 1
+            for day_str, costs in fetched.items():
+                result[day_str] = costs
+                finalized = date.fromisoformat(day_str) < cutoff
+                if not finalized:
+                    self.provisional[(account_id, day_str)] = (now, costs)
+                try:
+                    self.store.put_day(account_id, day_str, costs, finalized)
+                except Exception as e:
+                    print(f"⚠️ Cost Cache Write Error: {e}")
+
+        print(f"📦 Cost cache: {self.stats()}")
+        return result
+
+    def get_cached_costs(self, account_id, start, end):
+        """Stored days for [start, end) without calling Cost Explorer; None unless every day is stored.
+
+        Days inside the restatement window come back as last fetched.
+        """
+        try:
+            cached = self.store.get_days(account_id, start, end)
+        except Exception as e:
+            print(f"⚠️ Cost Cache Read Error: {e}")
+            return None
+        days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days)]
+        if any(day not in cached for day in days):
+            return None
+        return {day: cached[day]['costs'] for day in days}
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'ce_calls': self.fetches,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from ce_ingest import iter_cost_pages, iter_cost_rows
+from cost_series import CostSeries
+
+# Cost Explorer allows a handful of GetCostAndUsage requests per second per account.
+CE_REQUESTS_PER_SECOND = 5
+MAX_WORKERS = 4
+MAX_RETRIES = 5
+BASE_DELAY = 0.25
+
+THROTTLE_CODES = ('ThrottlingException', 'LimitExceededException', 'RequestLimitExceeded', 'TooManyRequestsException')
+
+DIMENSION_WORDS = {
+    'LINKED_ACCOUNT': ('account',),
+    'REGION': ('region',),
+    'USAGE_TYPE': ('usage type', 'usage-type', 'usagetype'),
+    'SERVICE': ('service',),
+}
+
+def requested_dimensions(query):
+    """CE dimensions asked for with 'by region', 'usage types', etc. (SERVICE is the default view)."""
+    text = (query or '').lower()
+    return [dim for dim, words in DIMENSION_WORDS.items()
+            if dim != 'SERVICE' and any(word in text for word in words)]
+
+# -------- Rate Limiting & Retries -------- #
+
+class RateLimiter:
+    """Thread-safe token bucket shared by all fan-out workers."""
+
+    def __init__(self, rate=CE_REQUESTS_PER_SECOND, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_throttle(error):
+    response = getattr(error, 'response', None)
+    if not isinstance(response, dict):
+        return False
+    return response.get('Error', {}).get('Code', '') in THROTTLE_CODES
+
+
+def call_with_retry(fn, retries=MAX_RETRIES, base_delay=BASE_DELAY, sleep=time.sleep):
+    """Retry throttled calls with full-jitter exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries or not is_throttle(e):
+                raise
+            delay = random.uniform(0, base_delay * (2 ** attempt))
+            print(f"⏳ CE throttled, retry {attempt + 1}/{retries} in {delay:.2f}s")
+            sleep(delay)
+
+
+class ThrottledClient:
+    """Wraps a CE client so every page request goes through the limiter and retries."""
+
+    def __init__(self, ce_client, limiter):
+        self.ce_client = ce_client
+        self.limiter = limiter
+
+    def get_cost_and_usage(self, **request):
+        def call():
+            self.limiter.acquire()
+            return self.ce_client.get_cost_and_usage(**request)
+        return call_with_retry(call)
+
+# -------- Fan-out -------- #
+
+def build_queries(start, end, dimensions, granularity='DAILY'):
+    """One independent CE request per dimension ({dimension: request})."""
+    return {
+        dim: {
+            'TimePeriod': {'Start': start.isoformat(), 'End': end.isoformat()},
+            'Granularity': granularity,
+            'Metrics': ['UnblendedCost'],
+            'GroupBy': [{'Type': 'DIMENSION', 'Key': dim}]
+        }
+        for dim in dimensions
+    }
+
+
+def _run_query(client, request, start, end):
+    series = CostSeries(start, (end - start).days)
+    for day, key, amount in iter_cost_rows(iter_cost_pages(client, **request)):
+        series.add(key, date.fromisoformat(day[:10]), amount)
+    return series
+
+
+def fan_out(ce_client, start, end, dimensions, max_workers=MAX_WORKERS, limiter=None):
+    """Run one query per dimension concurrently; returns {dimension: CostSeries}.
+
+    A failed dimension is logged and left out rather than failing the whole report.
+    """
+    queries = build_queries(start, end, dimensions)
+    if not queries:
+        return {}
+    client = ThrottledClient(ce_client, limiter or RateLimiter())
+    started = time.perf_counter()
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as pool:
+        futures = {dim: pool.submit(_run_query, client, request, start, end) for dim, request in queries.items()}
+        for dim, future in futures.items():
+            try:
+                results[dim] = future.result()
+            except Exception as e:
+                print(f"⚠️ Fan-out Error ({dim}): {e}")
+    print(f"🔀 Fan-out: {list(results)} in {time.perf_counter() - started:.2f}s")
+    return results
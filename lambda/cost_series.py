@@ -0,0 +1,122 @@
+import heapq
+import operator
+from array import array
+from datetime import date, timedelta
+
+MICROS = 1_000_000
+
+def to_micros(amount):
+    """'12.3456789' (CE amount string) -> 12345679 micro-dollars."""
+    return round(float(amount) * MICROS)
+
+def to_dollars(micros):
+    return micros / MICROS
+
+# -------- Cost Series -------- #
+
+class CostSeries:
+    """Daily per-service costs as contiguous int64 micro-dollar rows.
+
+    Row `i` belongs to `services[i]` (see `index`), column `d` is `start + d days`.
+    Aggregations run over array slices, never over per-row Python objects.
+    """
+
+    def __init__(self, start, n_days):
+        self.start = start
+        self.n_days = n_days
+        self.services = []
+        self.index = {}
+        self.rows = []
+        self.error = None
+
+    @classmethod
+    def from_daily_costs(cls, daily_costs, start, end):
+        """Build from the cache format {'YYYY-MM-DD': {service: amount_str}}."""
+        series = cls(start, (end - start).days)
+        for day_str, costs in daily_costs.items():
+            offset = (date.fromisoformat(day_str) - start).days
+            if not 0 <= offset < series.n_days:
+                continue
+            for service, amount in costs.items():
+                series.row(service)[offset] += to_micros(amount)
+        return series
+
+    def row(self, service):
+        """Return (creating if needed) the day row for a service."""
+        service_id = self.index.get(service)
+        if service_id is None:
+            service_id = len(self.services)
+            self.index[service] = service_id
+            self.services.append(service)
+            self.rows.append(array('q', bytes(8 * self.n_days)))
+        return self.rows[service_id]
+
+    def add(self, service, day, amount):
+        self.row(service)[(day - self.start).days] += to_micros(amount)
+
+    def __len__(self):
+        return len(self.services)
+
+    def day(self, offset):
+        return self.start + timedelta(days=offset)
+
+    def _bounds(self, start, stop):
+        """Clamp [start, stop) to [0, n_days]; offsets before the series start are empty, never wrapped."""
+        stop = self.n_days if stop is None else stop
+        start = min(max(start, 0), self.n_days)
+        return start, max(min(stop, self.n_days), start)
+
+    # -------- Aggregations -------- #
+
+    def totals(self, start=0, stop=None):
+        """Per-service totals over day offsets [start, stop), aligned with `services`."""
+        start, stop = self._bounds(start, stop)
+        return array('q', [sum(r[start:stop]) for r in self.rows])
+
+    def total(self, start=0, stop=None):
+        return sum(self.totals(start, stop))
+
+    def daily_totals(self):
+        """Account total per day offset."""
+        if not self.rows:
+            return array('q', bytes(8 * self.n_days))
+        return array('q', map(sum, zip(*self.rows)))
+
+    def top_k(self, k, start=0, stop=None):
+        """[(service, micros)] for the k most expensive services in the window."""
+        totals = self.totals(start, stop)
+        ids = heapq.nlargest(k, range(len(totals)), key=totals.__getitem__)
+        return [(self.services[i], totals[i]) for i in ids if totals[i] > 0]
+
+    def window(self, start, stop=None):
+        """New CostSeries restricted to day offsets [start, stop)."""
+        start, stop = self._bounds(start, stop)
+        sliced = CostSeries(self.day(start), stop - start)
+        sliced.services = list(self.services)
+        sliced.index = dict(self.index)
+        sliced.rows = [r[start:stop] for r in self.rows]
+        return sliced
+
+    def last(self, n_days):
+        return self.window(self.n_days - n_days)
+
+    def period_over_period(self, length):
+        """(current, previous) per-service totals for the last two `length`-day windows.
+
+        Without 2 * length days of history the previous period is all zeros: a
+        partially covered window would understate it.
+        """
+        current = self.totals(self.n_days - length, self.n_days)
+        if self.n_days < 2 * length:
+            return current, array('q', bytes(8 * len(self.rows)))
+        previous = self.totals(self.n_days - 2 * length, self.n_days - length)
+        return current, previous
+
+    def deltas(self, length):
+        current, previous = self.period_over_period(length)
+        return array('q', map(operator.sub, current, previous))
+
+    def summary(self, start=0, stop=None):
+        """{service: dollars} for services with positive spend (the old dict shape)."""
+        totals = self.totals(start, stop)
+        return {s: to_dollars(t) for s, t in zip(self.services, totals) if t > 0}
@@ -0,0 +1,205 @@
+import csv
+import gzip
+import io
+import multiprocessing
+from datetime import date
+
+from cost_series import CostSeries, MICROS
+
+# Legacy CUR column names (CUR 2.0 exports use the same values under snake_case names).
+COLUMNS = {
+    'day': ('lineItem/UsageStartDate', 'line_item_usage_start_date'),
+    'amount': ('lineItem/UnblendedCost', 'line_item_unblended_cost'),
+    'service': ('product/ProductName', 'product_product_name', 'lineItem/ProductCode', 'line_item_product_code'),
+    'resource': ('lineItem/ResourceId', 'line_item_resource_id'),
+    'usage_type': ('lineItem/UsageType', 'line_item_usage_type'),
+}
+TAG_PREFIXES = ('resourceTags/user:', 'resource_tags_user_')
+
+# TAG has one row per "key=value"; TAGS one per line item's full combination ("k1=v1&k2=v2").
+DIMENSIONS = ('SERVICE', 'RESOURCE', 'USAGE_TYPE', 'TAG', 'TAGS')
+# Per-dimension key budget; beyond it the smallest keys are folded into "Other".
+MAX_KEYS = 5000
+READ_CHUNK = 1 << 20
+OTHER = "Other"
+
+# -------- Reading -------- #
+
+def open_cur(uri, s3_client=None):
+    """Text stream over a local or s3:// CUR CSV, decompressing .gz on the fly."""
+    if uri.startswith('s3://'):
+        if s3_client is None:
+            import boto3
+            s3_client = boto3.client('s3')
+        bucket, key = uri[5:].split('/', 1)
+        raw = s3_client.get_object(Bucket=bucket, Key=key)['Body']
+    else:
+        raw = open(uri, 'rb', buffering=READ_CHUNK)
+    if uri.endswith('.gz'):
+        raw = gzip.GzipFile(fileobj=raw)
+    return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+
+
+def _column(header, names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+# -------- Aggregation -------- #
+
+class CurAggregator:
+    """Streams CUR rows into one CostSeries per dimension with a bounded key count."""
+
+    def __init__(self, start, end, max_keys=MAX_KEYS):
+        self.start = start
+        self.end = end
+        self.max_keys = max_keys
+        self.series = {dim: CostSeries(start, (end - start).days) for dim in DIMENSIONS}
+        self.rows = 0
+        self.skipped = 0
+
+    def _row(self, dim, key):
+        series = self.series[dim]
+        sid = series.index.get(key)
+        if sid is None:
+            if len(series.services) >= 2 * self.max_keys:
+                self.series[dim] = series = compact(series, self.max_keys)
+            return series.row(key)
+        return series.rows[sid]
+
+    def consume(self, stream):
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if not header:
+            return self
+        idx = {name: _column(header, names) for name, names in COLUMNS.items()}
+        if idx['day'] is None or idx['amount'] is None:
+            raise ValueError("Not a CUR file: missing usage date or unblended cost column")
+        tags = [(i, h.split(':', 1)[1] if ':' in h else h[len(TAG_PREFIXES[1]):])
+                for i, h in enumerate(header) if h.startswith(TAG_PREFIXES)]
+
+        offsets = {}
+        day_i, amount_i = idx['day'], idx['amount']
+        service_i, resource_i, usage_i = idx['service'], idx['resource'], idx['usage_type']
+        for record in reader:
+            day_str = record[day_i][:10]
+            offset = offsets.get(day_str)
+            if offset is None:
+                offset = offsets[day_str] = (date.fromisoformat(day_str) - self.start).days
+            try:
+                micros = round(float(record[amount_i]) * MICROS)
+            except ValueError:
+                self.skipped += 1
+                continue
+            if not micros or not 0 <= offset < self.series['SERVICE'].n_days:
+                self.skipped += 1
+                continue
+            self.rows += 1
+            if service_i is not None:
+                self._row('SERVICE', record[service_i] or OTHER)[offset] += micros
+            if resource_i is not None and record[resource_i]:
+                self._row('RESOURCE', record[resource_i])[offset] += micros
+            if usage_i is not None:
+                self._row('USAGE_TYPE', record[usage_i] or OTHER)[offset] += micros
+            if tags:
+                combo = "&".join(f"{tag_key}={record[tag_i]}" for tag_i, tag_key in tags if record[tag_i])
+                if combo:
+                    for pair in combo.split('&'):
+                        self._row('TAG', pair)[offset] += micros
+                    self._row('TAGS', combo)[offset] += micros
+        return self
+
+    def result(self):
+        return {dim: compact(series, self.max_keys) for dim, series in self.series.items()}
+
+
+def compact(series, max_keys):
+    """Keep the `max_keys - 1` largest keys and fold the rest into "Other"."""
+    if len(series) <= max_keys:
+        return series
+    totals = series.totals()
+    keep = sorted(range(len(totals)), key=totals.__getitem__, reverse=True)[:max_keys - 1]
+    compacted = CostSeries(series.start, series.n_days)
+    for sid in keep:
+        compacted.row(series.services[sid])[:] = series.rows[sid]
+    other = compacted.row(OTHER)
+    kept = set(keep)
+    for sid, row in enumerate(series.rows):
+        if sid not in kept:
+            for d, v in enumerate(row):
+                if v:
+                    other[d] += v
+    return compacted
+
+
+def merge(results, max_keys=MAX_KEYS):
+    """Merge per-file {dimension: CostSeries} results (same window)."""
+    merged = {}
+    for result in results:
+        for dim, series in result.items():
+            target = merged.get(dim)
+            if target is None:
+                merged[dim] = target = CostSeries(series.start, series.n_days)
+            for key, row in zip(series.services, series.rows):
+                dest = target.row(key)
+                for d, v in enumerate(row):
+                    if v:
+                        dest[d] += v
+    return {dim: compact(series, max_keys) for dim, series in merged.items()}
+
+def covers_window(series):
+    """True when a CUR series can stand in for Cost Explorer: spend on the window's last day and in total.
+
+    CUR exports lag by up to a day and objects can be missing, so a series
+    that stops early would understate the window.
+    """
+    if series is None or not series.n_days or series.total() <= 0:
+        return False
+    return series.daily_totals()[-1] > 0
+
+# -------- Parallel Ingestion -------- #
+
+def ingest_file(uri, start, end, max_keys=MAX_KEYS):
+    with open_cur(uri) as stream:
+        aggregator = CurAggregator(start, end, max_keys).consume(stream)
+    print(f"📄 CUR {uri}: {aggregator.rows} rows ({aggregator.skipped} skipped)")
+    return aggregator.result()
+
+
+def _worker(conn, uri, start, end, max_keys):
+    try:
+        conn.send(('ok', ingest_file(uri, start, end, max_keys)))
+    except Exception as e:
+        conn.send(('error', f"{uri}: {e}"))
+    finally:
+        conn.close()
+
+
+def ingest_cur_files(uris, start, end, workers=2, max_keys=MAX_KEYS):
+    """Parse CUR files in parallel processes and merge into {dimension: CostSeries}.
+
+    Uses Process + Pipe rather than multiprocessing.Pool: Lambda has no /dev/shm,
+    so Pool/Queue (and ProcessPoolExecutor) cannot be created there.
+    """
+    if workers <= 1 or len(uris) <= 1:
+        return merge([ingest_file(uri, start, end, max_keys) for uri in uris], max_keys)
+
+    results = []
+    pending = list(uris)
+    running = []
+    while pending or running:
+        while pending and len(running) < workers:
+            parent, child = multiprocessing.Pipe(duplex=False)
+            proc = multiprocessing.Process(target=_worker, args=(child, pending.pop(0), start, end, max_keys))
+            proc.start()
+            child.close()
+            running.append((proc, parent))
+        proc, parent = running.pop(0)
+        status, payload = parent.recv()
+        proc.join()
+        if status == 'ok':
+            results.append(payload)
+        else:
+            print(f"⚠️ CUR Ingest Error: {payload}")
+    return merge(results, max_keys)
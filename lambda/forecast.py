@@ -0,0 +1,130 @@
+import calendar
+import json
+from datetime import date, timedelta
+
+from cost_cache import FORECAST_PREFIX
+from cost_series import CostSeries, to_dollars
+
+# Additive Holt-Winters with a damped trend and a weekly season.
+ALPHA = 0.3
+BETA = 0.1
+GAMMA = 0.1
+PHI = 0.9
+SEASON = 7
+HISTORY_DAYS = 60
+
+# -------- Model -------- #
+
+def holt_winters(values, horizon, alpha=ALPHA, beta=BETA, gamma=GAMMA, phi=PHI, season=SEASON):
+    """Forecast `horizon` future points of a daily series (floats, clamped at 0).
+
+    Falls back to damped trend without seasonality when there are fewer than two
+    full seasons of history.
+    """
+    n = len(values)
+    if n == 0 or horizon <= 0:
+        return [0.0] * max(horizon, 0)
+    if n < 2 * season:
+        season_idx = [0.0] * season
+        level = values[0]
+        trend = (values[-1] - values[0]) / (n - 1) if n > 1 else 0.0
+        gamma = 0.0
+    else:
+        first = sum(values[:season]) / season
+        second = sum(values[season:2 * season]) / season
+        level = first
+        trend = (second - first) / season
+        season_idx = [values[i] - first for i in range(season)]
+
+    for t in range(n):
+        y = values[t]
+        s = season_idx[t % season]
+        prev_level = level
+        level = alpha * (y - s) + (1 - alpha) * (level + phi * trend)
+        trend = beta * (level - prev_level) + (1 - beta) * phi * trend
+        if gamma:
+            season_idx[t % season] = gamma * (y - level) + (1 - gamma) * s
+
+    forecasts = []
+    damped = 0.0
+    weight = 1.0
+    for h in range(1, horizon + 1):
+        weight *= phi
+        damped += weight
+        forecasts.append(max(0.0, level + damped * trend + season_idx[(n + h - 1) % season]))
+    return forecasts
+
+# -------- Month-end Forecast -------- #
+
+def month_end_forecast(series, today, top=5):
+    """Month-to-date actuals plus forecast of the remaining days (today included).
+
+    `series` must end the day before `today` (finished days only).
+    """
+    month_start = today.replace(day=1)
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
+    horizon = days_in_month - today.day + 1
+    mtd_from = max((month_start - series.start).days, 0)
+
+    by_service = {}
+    mtd_total = 0.0
+    forecast_total = 0.0
+    for service, row in zip(series.services, series.rows):
+        mtd = to_dollars(sum(row[mtd_from:]))
+        projected = mtd + sum(holt_winters([to_dollars(v) for v in row], horizon))
+        mtd_total += mtd
+        forecast_total += projected
+        by_service[service] = round(projected, 2)
+
+    top_services = dict(sorted(by_service.items(), key=lambda kv: -kv[1])[:top])
+    return {
+        'month': today.strftime('%Y-%m'),
+        'mtd': round(mtd_total, 2),
+        'forecast': round(forecast_total, 2),
+        'by_service': top_services
+    }
+
+
+def format_forecast(fc):
+    if not fc:
+        return ""
+    return f"Month-end forecast {fc['month']}: ${fc['forecast']:.2f} (month-to-date ${fc['mtd']:.2f}); top: {json.dumps(fc['by_service'])}"
+
+# -------- Memoization -------- #
+
+class ForecastCache:
+    """Per-(account, day) memo: in-process first, then the optional DynamoDB table."""
+
+    def __init__(self, cost_cache, table=None):
+        self.cost_cache = cost_cache
+        self.table = table
+        self.memo = {}
+
+    def get(self, account_id, today=None):
+        today = today or date.today()
+        key = (account_id, today)
+        if key in self.memo:
+            return self.memo[key]
+        # Drop previous days so a long-lived container does not accumulate entries.
+        self.memo = {k: v for k, v in self.memo.items() if k[1] == today}
+
+        sort_key = FORECAST_PREFIX + today.isoformat()
+        if self.table is not None:
+            try:
+                item = self.table.get_item(Key={'account_id': account_id, 'day': sort_key}).get('Item')
+                if item:
+                    self.memo[key] = json.loads(item['forecast'])
+                    return self.memo[key]
+            except Exception as e:
+                print(f"⚠️ Forecast Cache Read Error: {e}")
+
+        start = today - timedelta(days=HISTORY_DAYS)
+        daily_costs = self.cost_cache.get_daily_costs(account_id, start, today, today=today)
+        fc = month_end_forecast(CostSeries.from_daily_costs(daily_costs, start, today), today)
+        self.memo[key] = fc
+        if self.table is not None:
+            try:
+                self.table.put_item(Item={'account_id': account_id, 'day': sort_key, 'forecast': json.dumps(fc)})
+            except Exception as e:
+                print(f"⚠️ Forecast Cache Write Error: {e}")
+        return fc
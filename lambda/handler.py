@@ -1,24 +1,70 @@
 import json
 import boto3
 import os
-import requests
 import base64
 import urllib.parse
 import threading
+import textwrap
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime, date, timedelta
-from decimal import Decimal
 from boto3.dynamodb.conditions import Key
+from cost_cache import CostCache, DynamoCostStore
+from ce_ingest import iter_cost_pages, iter_cost_rows
+from cost_series import CostSeries, to_dollars, to_micros
+from query_planner import classify_question, plan_query, run_plan, log_plan
+from cost_fanout import fan_out, requested_dimensions
+from anomaly import DynamoAnomalyStore, refresh_anomalies, format_anomalies
+from forecast import ForecastCache, format_forecast
+from rollups import RollupRegistry, format_comparisons
+from cur_ingest import covers_window, ingest_cur_files
+from query_compiler import compile_query, execute, resolve_window, window_label
+from waste_scanner import WasteScanner, summarize_findings
+from tag_index import TagIndexRegistry, TagQueryStats, build_tag_index, index_from_cur
+from llm_cache import DynamoResponseStore, PrefixCacheStats, ResponseCache, response_key
+from prompt_budget import (TOP_SERVICES, compress_breakdown, estimate_tokens, fit_sections, message_tokens, trend_summary,
+                           truncate_history)
+from query_dedup import DynamoQueryIndexStore, NearDuplicateDetector
+from hcl_check import check_hcl, fenced_hcl
+from http_pool import HttpPool
+from llm_resilience import MAX_ATTEMPTS, resilient_call
+from llm_router import LLMRouter, Provider, load_providers
+from template_analysis import AnswerStats, SMALL_SPEND_DOLLARS, answerable_by_rules, template_analysis
+from llm_stream import ProgressiveUpdater, stream_chat
+from variance import is_variance_question, attribute_series, attribute_usage_types, attribute_windows, format_drivers
+from snapshots import (DynamoSnapshotStore, SnapshotStats, make_snapshot, is_fresh, snapshot_age,
+                       SNAPSHOT_WINDOWS, DEFAULT_QUERY)
 
 # -------- Initialize Clients -------- #
 ce_client = boto3.client('ce')
 ssm = boto3.client('ssm')
 lambda_client = boto3.client('lambda')
+sns_client = boto3.client('sns')
 dynamodb = boto3.resource('dynamodb')
 
 # Configuration
 TABLE_NAME = "chat-history"
+DEEPSEEK_MODEL = "deepseek-chat"
+MAX_TOKENS = 800
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', 1400))
+DATA_TOKEN_BUDGET = 500
+LLM_CACHE_MAX_AGE = int(os.getenv('LLM_CACHE_MAX_AGE', 6 * 3600))
+# Background work must leave this much of the Lambda deadline for the Slack post and history write.
+DEADLINE_MARGIN_SECONDS = 5
+DEFAULT_LLM_BUDGET = 45
+DEEPSEEK_API_URL = os.getenv('DEEPSEEK_API_URL', "https://api.deepseek.com/v1/chat/completions")
+# JSON list of {name, url, model, key_path} chat-completions endpoints (keys in SSM under /costbot/).
+LLM_PROVIDERS = os.getenv('LLM_PROVIDERS', '')
+RULES_SPEND_THRESHOLD = float(os.getenv('RULES_SPEND_THRESHOLD', SMALL_SPEND_DOLLARS))
+# Share of Slack's 3 s window spent trying to answer inline before going async.
+INLINE_ANSWER_SECONDS = 1.5
 table = dynamodb.Table(TABLE_NAME)
+COST_CACHE_TABLE = os.getenv('COST_CACHE_TABLE', 'cost-cache')
+CUR_URIS = [uri for uri in os.getenv('CUR_URIS', '').split(',') if uri]
+TAG_KEYS = [key for key in os.getenv('TAG_KEYS', '').split(',') if key]
+CUR_WORDS = ('resource', 'tag', 'team', 'project', 'line item')
+WASTE_WORDS = ('idle', 'waste', 'unused', 'unattached', 'orphan', 'cleanup', 'clean up', 'snapshot')
 
 # -------- Secret Management -------- #
 
@@ -38,13 +84,13 @@ DEEPSEEK_API_KEY = get_secret(os.getenv('DEEPSEEK_API_KEY_PATH'))
 
 # -------- Knowledge Base (Terraform Templates) -------- #
 
-def get_terraform_hints(cost_summary):
+def get_terraform_hints(cost_series):
     """Returns relevant Terraform snippets based on the cost driver."""
-    if not cost_summary:
+    top = cost_series.top_k(1)
+    if not top:
         return ""
     
-    # Sort services by cost
-    expensive_service = max(cost_summary, key=cost_summary.get)
+    expensive_service = top[0][0]
     print(f"🔍 DEBUG: Cost driver identified as: '{expensive_service}'")
     
     # Keyword-based matching (More robust than exact match)
@@ -131,118 +177,719 @@ def get_context(user_id):
 
 # -------- Core Logic -------- #
 
-def get_last_n_days_cost(n):
+def fetch_daily_service_costs(start, end):
+    """Pull DAILY x SERVICE costs for [start, end) from Cost Explorer, all pages."""
+    days = {}
+    day = start
+    while day < end:
+        days[day.isoformat()] = {}
+        day += timedelta(days=1)
+    pages = iter_cost_pages(
+        ce_client,
+        TimePeriod={'Start': start.strftime('%Y-%m-%d'), 'End': end.strftime('%Y-%m-%d')},
+        Granularity='DAILY',
+        Metrics=['UnblendedCost'],
+        GroupBy=[{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
+    )
+    for day_str, service, amount in iter_cost_rows(pages):
+        days.setdefault(day_str, {})[service] = amount
+    return days
+
+# Kept at module level so warm containers keep their hit/miss counters.
+cost_table = dynamodb.Table(COST_CACHE_TABLE)
+cost_cache = CostCache(DynamoCostStore(cost_table), fetch_daily_service_costs)
+anomaly_store = DynamoAnomalyStore(cost_table)
+forecast_cache = ForecastCache(cost_cache, cost_table)
+rollup_registry = RollupRegistry(cost_cache)
+snapshot_store = DynamoSnapshotStore(cost_table)
+waste_scanner = WasteScanner(lambda service, region: boto3.client(service, region_name=region))
+snapshot_stats = SnapshotStats()
+http_pool = HttpPool()
+# Same chat-completions shape for every provider; DeepSeek alone unless LLM_PROVIDERS is set.
+llm_router = LLMRouter((load_providers(LLM_PROVIDERS, get_secret) if LLM_PROVIDERS else []) or
+                       [Provider("deepseek", DEEPSEEK_API_URL, DEEPSEEK_MODEL, DEEPSEEK_API_KEY)])
+response_cache = ResponseCache(DynamoResponseStore(cost_table), max_age=LLM_CACHE_MAX_AGE)
+near_duplicates = NearDuplicateDetector(DynamoQueryIndexStore(cost_table))
+answer_stats = AnswerStats()
+prefix_stats = PrefixCacheStats()
+inline_pool = ThreadPoolExecutor(max_workers=2)
+
+def get_last_n_days_cost(n, account_id='default', question='breakdown'):
+    end = date.today()
+    start = end - timedelta(days=n)
     try:
-        end = date.today()
-        start = end - timedelta(days=n)
-        response = ce_client.get_cost_and_usage(
-            TimePeriod={'Start': start.strftime('%Y-%m-%d'), 'End': end.strftime('%Y-%m-%d')},
-            Granularity='DAILY',
-            Metrics=['UnblendedCost'],
-            GroupBy=[{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
-        )
-        cost_summary = {}
-        for result in response.get('ResultsByTime', []):
-            for group in result['Groups']:
-                service = group['Keys'][0]
-                amount = Decimal(group['Metrics']['UnblendedCost']['Amount'])
-                if amount > 0:
-                    cost_summary[service] = cost_summary.get(service, Decimal(0)) + amount
-        return {k: float(v) for k, v in cost_summary.items()}
-    except Exception:
-        return {"Error": "Cost data unavailable"}
-
-def build_cost_prompt(cost_summary, query, days, history):
-    total = sum(cost_summary.values())
-    tf_hint = get_terraform_hints(cost_summary)
-    
-    prompt = f"""
-    Act as a Senior Cloud DevOps Engineer. 
-    Analyze the following AWS spend data.
-    
-    DATA:
-    Total: ${total:.2f}
-    Breakdown: {json.dumps(cost_summary)}
-    
-    CHAT HISTORY:
-    {history}
-    
-    USER QUERY: {query}
-    
-    CONTEXT (Reference Snippets):
-    {tf_hint}
-    
-    INSTRUCTIONS:
-    1. Identify the primary cost driver.
-    2. Suggest 1 technical optimization.
-    3. CRITICAL: YOU MUST PROVIDE A TERRAFORM CODE SNIPPET (HCL) based on the Context provided above. 
-       Even if the savings are small, show the code for demonstration purposes.
-    4. Explicitly state this is a suggestion.
-    
-    Output Format:
-    - **Analysis:** (Short summary)
-    - **Terraform Fix:** (Code block)
-    - **Safety:** (Warning)
+        plan = plan_query(start, end, question)
+        if plan.name != 'daily-cached':
+            return run_plan(ce_client, plan)
+        daily_costs = cost_cache.get_daily_costs(account_id, start, end)
+        log_plan(plan, sum(len(costs) for costs in daily_costs.values()))
+        return CostSeries.from_daily_costs(daily_costs, start, end)
+    except Exception as e:
+        print(f"❌ Cost Error: {e}")
+        series = CostSeries(start, n)
+        series.error = "Cost data unavailable"
+        return series
+
+def get_dimension_breakdowns(n, query):
+    """Extra LINKED_ACCOUNT / REGION / USAGE_TYPE views requested in the query, fetched in parallel."""
+    dimensions = requested_dimensions(query)
+    if not dimensions:
+        return {}
+    end = date.today()
+    try:
+        return fan_out(ce_client, end - timedelta(days=n), end, dimensions)
+    except Exception as e:
+        print(f"⚠️ Fan-out Error: {e}")
+        return {}
+
+def get_cur_breakdowns(n, query):
+    """Resource / usage-type / tag views from CUR exports, when configured and asked for."""
+    if not CUR_URIS or not any(word in (query or '').lower() for word in CUR_WORDS):
+        return {}
+    end = date.today()
+    try:
+        return ingest_cur_files(CUR_URIS, end - timedelta(days=n), end, workers=os.cpu_count() or 1)
+    except Exception as e:
+        print(f"⚠️ CUR Ingest Error: {e}")
+        return {}
+
+def get_waste_findings(query):
+    """Idle / unattached resources across enabled regions, when the query asks about waste."""
+    if not any(word in (query or '').lower() for word in WASTE_WORDS):
+        return ""
+    try:
+        findings, errors = waste_scanner.scan()
+        for error in errors[:5]:
+            print(f"⚠️ Waste Scan Error: {error}")
+        return summarize_findings(findings)
+    except Exception as e:
+        print(f"⚠️ Waste Scan Error: {e}")
+        return ""
+
+def get_variance_drivers(n, query, account_id, costs=None):
+    """Ranked service and usage-type drivers of last n days vs the n days before ("why did it go up?").
+
+    `costs` is the already-loaded per-service series for the last n days, if any; then
+    only the previous window, all finalized days, is read from the cost cache.
     """
-    return prompt
+    if not is_variance_question(query):
+        return ""
+    today = date.today()
+    sections = []
+    try:
+        start = today - timedelta(days=2 * n)
+        mid = today - timedelta(days=n)
+        if costs is not None and not costs.error and classify_question(query) == 'breakdown':
+            previous = CostSeries.from_daily_costs(cost_cache.get_daily_costs(account_id, start, mid), start, mid)
+            sections.append(format_drivers(attribute_windows(costs, previous), "Services"))
+        else:
+            series = CostSeries.from_daily_costs(cost_cache.get_daily_costs(account_id, start, today), start, today)
+            sections.append(format_drivers(attribute_series(series, n), "Services"))
+        report = attribute_usage_types(ce_client, (mid, today), (start, mid))
+        sections.append(format_drivers(report, "Usage types"))
+    except Exception as e:
+        print(f"⚠️ Variance Error: {e}")
+    return "\n".join(section for section in sections if section)
 
-def call_deepseek_api(prompt):
+def get_cost_anomalies(account_id):
+    """Recent per-service anomalies from the incremental detector (empty on failure)."""
     try:
-        url = "https://api.deepseek.com/v1/chat/completions"
-        headers = {"Authorization": f"Bearer {DEEPSEEK_API_KEY}", "Content-Type": "application/json"}
-        body = {
-            "model": "deepseek-chat",
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": 800
-        }
-        response = requests.post(url, headers=headers, json=body, timeout=45)
-        return response.json()["choices"][0]["message"]["content"]
+        return refresh_anomalies(anomaly_store, cost_cache, account_id)
+    except Exception as e:
+        print(f"⚠️ Anomaly Detection Error: {e}")
+        return []
+
+def get_month_end_forecast(account_id):
+    """Local month-end forecast, memoized per (account, day)."""
+    try:
+        return forecast_cache.get(account_id)
+    except Exception as e:
+        print(f"⚠️ Forecast Error: {e}")
+        return None
+
+def get_window_comparisons(account_id):
+    """Week/month comparisons answered from the pre-materialized rollups."""
+    try:
+        return rollup_registry.get(account_id).comparisons(date.today())
+    except Exception as e:
+        print(f"⚠️ Rollup Error: {e}")
+        return None
+
+def build_cost_data(cost_series, days, breakdowns=None, anomalies=None, forecast=None,
+                    comparisons=None, waste=None, drivers=None, budget=DATA_TOKEN_BUDGET):
+    """The DATA section of the prompt (also the cost part of the response-cache key).
+
+    With a token budget, services are cut to the top-K plus "Other", amounts are
+    rounded and lower-priority sections are trimmed or dropped; budget=None
+    keeps everything (used to report the uncompressed size).
+    """
+    total = to_dollars(cost_series.total())
+    if cost_series.error:
+        breakdown = {"Error": cost_series.error}
+    elif drivers:
+        # The ranked drivers carry the detail; keep only the headline services.
+        breakdown = compress_breakdown(cost_series, 5)
+    elif budget is None:
+        breakdown = cost_series.summary()
+    else:
+        breakdown = compress_breakdown(cost_series, TOP_SERVICES)
+    # (priority, text): lower numbers survive a tight budget.
+    sections = []
+    if drivers:
+        sections.append((0, f"Cost change drivers (last {days}d vs previous {days}d):\n{drivers}"))
+    if anomalies:
+        sections.append((1, "Anomalies (actual vs expected):\n" + format_anomalies(anomalies)))
+    if comparisons:
+        sections.append((2, f"Trend: {format_comparisons(comparisons)}"))
+    trend = trend_summary(cost_series) if not cost_series.error else ""
+    if trend:
+        sections.append((2, f"Daily average by period: {trend}"))
+    if forecast:
+        sections.append((3, format_forecast(forecast)))
+    if waste:
+        sections.append((4, f"Idle resources found: {waste}"))
+    for dimension, series in (breakdowns or {}).items():
+        top = compress_breakdown(series, 10) if budget is not None else {
+            key: round(to_dollars(micros), 2) for key, micros in series.top_k(10)}
+        sections.append((5, f"By {dimension}: {json.dumps(top)}"))
+
+    head = f"Total: ${total:.2f}\nBreakdown: {json.dumps(breakdown)}"
+    if budget is None:
+        kept = [text for _, text in sections]
+    else:
+        kept = fit_sections(sections, budget - estimate_tokens(head))
+    return "\n".join([head] + kept)
+
+# Byte-identical on every request so providers can serve it from their prefix cache.
+SYSTEM_PROMPT = """Act as a Senior Cloud DevOps Engineer.
+Analyze the AWS spend data in the user message.
+
+INSTRUCTIONS:
+1. Identify the primary cost driver (mention any anomalies listed in the data).
+2. Suggest 1 technical optimization and estimate its monthly savings.
+3. CRITICAL: YOU MUST PROVIDE A TERRAFORM CODE SNIPPET (HCL) based on the reference snippets in the context.
+   Even if the savings are small, show the code for demonstration purposes.
+4. Explicitly state this is a suggestion.
+
+"""
+# Plain-text answers, for when structured advice (pydantic) cannot be loaded.
+TEXT_FORMAT = """Output Format:
+- **Analysis:** (Short summary)
+- **Terraform Fix:** (```hcl code block)
+- **Safety:** (Warning)"""
+
+@lru_cache(maxsize=1)
+def advice_module():
+    """cost_advice, imported on first use; None when pydantic cannot load (e.g. its compiled core is missing)."""
+    try:
+        import cost_advice
+        return cost_advice
+    except ImportError as e:
+        print(f"⚠️ Structured advice unavailable, answering in plain text: {e}")
+        return None
+
+def system_prompt():
+    advice = advice_module()
+    return SYSTEM_PROMPT + (advice.JSON_FORMAT if advice else TEXT_FORMAT)
+
+def load_advice(text):
+    """CostAdvice for a structured answer; None for plain text or when structured advice is unavailable."""
+    advice = advice_module()
+    return advice.load_advice(text) if advice else None
+
+def advice_preview(text):
+    """What to show of a streaming reply: the analysis so far for JSON, the text itself otherwise."""
+    advice = advice_module()
+    return advice.advice_preview(text) if advice else text
+
+def build_cost_messages(data, query, history, tf_hint, budget=PROMPT_TOKEN_BUDGET):
+    """Chat messages ordered most-stable first: fixed system prompt, KB snippet, then this request's data.
+
+    Requests share the cached prefix up to the first byte that differs, so the
+    volatile parts (data, history, query) come last. With a budget, chat history
+    gets whatever the fixed parts leave (newest turns first).
+    """
+    if budget is not None:
+        history = fit_history(data, query, history, tf_hint, budget)
+    context = textwrap.dedent(tf_hint or '').strip()
+    user = f"""CONTEXT (Reference Snippets):
+{context}
+
+DATA:
+{data}
+
+CHAT HISTORY:
+{history}
+
+USER QUERY: {query}"""
+    return [{"role": "system", "content": system_prompt()}, {"role": "user", "content": user}]
+
+def fit_history(data, query, history, tf_hint, budget=PROMPT_TOKEN_BUDGET):
+    """The newest chat turns that fit in the budget next to the fixed prompt parts."""
+    fixed = build_cost_messages(data, query, "", tf_hint, budget=None)
+    return truncate_history(history, budget - message_tokens(fixed))
+
+def send_chat(provider, messages, total, on_text=None):
+    """One chat-completions attempt bounded by `total` seconds; HTTP errors raise so the retry layer can classify them."""
+    headers = {"Authorization": f"Bearer {provider.api_key}", "Content-Type": "application/json"}
+    body = {
+        "model": provider.model,
+        "messages": messages,
+        "max_tokens": MAX_TOKENS
+    }
+    if advice_module():
+        body["response_format"] = {"type": "json_object"}
+    if on_text:
+        return stream_chat(http_pool, provider.url, headers, body, on_text, total=total, on_usage=prefix_stats.record)
+    response = http_pool.request('POST', provider.url, total=total, headers=headers, json=body)
+    response.raise_for_status()
+    result = response.json()
+    prefix_stats.record(result.get("usage"))
+    return result["choices"][0]["message"]["content"]
+
+def call_deepseek_api(messages, on_text=None, deadline=None):
+    """Chat completion through the provider router (DeepSeek unless LLM_PROVIDERS lists more), before `deadline`.
+
+    Each provider call gets retries and a hedged second request; with several
+    providers, only the last candidate retries and the others fail over at once.
+    With on_text, streams and calls on_text(text_so_far) as tokens arrive.
+    """
+    deadline = deadline or time.monotonic() + DEFAULT_LLM_BUDGET
+
+    def call(provider, deadline, last):
+        tracker = provider.trackers['stream' if on_text else 'full']
+        return resilient_call(lambda budget, emit: send_chat(provider, messages, budget, emit), deadline, tracker,
+                              on_text, max_attempts=MAX_ATTEMPTS if last else 1)
+
+    try:
+        return llm_router.route(call, deadline)
     except Exception as e:
         return f"AI Error: {str(e)}"
 
-def process_background_task(payload):
+def structured_advice(reply, messages, deadline=None):
+    """Validated CostAdvice JSON for an LLM reply, after at most one repair request; "AI Error: ..." otherwise.
+
+    Invalid JSON, or HCL that fails the local check, triggers the repair. If the HCL is
+    still broken afterwards, the valid reply is kept and its snippet flagged when rendered.
+    Plain-text replies (structured advice unavailable) get the same HCL check on their ```hcl block.
+    """
+    module = advice_module()
+    if module is None:
+        return checked_text_reply(reply, messages, deadline)
+    advice, problems = module.review_reply(reply)
+    if not problems:
+        return advice.model_dump_json()
+    print(f"⚠️ Invalid LLM output, requesting one repair: {problems}")
+    repaired = call_deepseek_api(module.repair_messages(messages, reply, problems), deadline=deadline)
+    fixed, remaining = (None, [repaired]) if repaired.startswith("AI Error") else module.review_reply(repaired)
+    if fixed or advice:
+        if remaining:
+            print(f"⚠️ LLM output still invalid after repair, flagging: {remaining}")
+        return (fixed or advice).model_dump_json()
+    return f"AI Error: invalid structured output after repair ({remaining[0]})"
+
+def checked_text_reply(reply, messages, deadline=None):
+    """Plain-text reply whose ```hcl block fails the local check gets one repair request.
+
+    The repair is kept only when it still carries an HCL block; a snippet that is still
+    broken is flagged when rendered.
+    """
+    snippet = fenced_hcl(reply)
+    if snippet is None or reply.startswith("AI Error"):
+        return reply
+    check = check_hcl(snippet)
+    if check.ok:
+        return reply
+    print(f"⚠️ Plain-text HCL failed the check, requesting one repair: {check.errors}")
+    repaired = call_deepseek_api(messages + [
+        {"role": "assistant", "content": reply},
+        {"role": "user", "content": f"The Terraform Fix is invalid HCL ({'; '.join(check.errors)}). "
+                                    "Reply again in the same format with a corrected ```hcl code block."}
+    ], deadline=deadline)
+    if repaired.startswith("AI Error") or fenced_hcl(repaired) is None:
+        return reply
+    return repaired
+
+def analyze_costs(days, query, account_id, chat_history, on_text=None, deadline=None, costs=None):
+    """Full pipeline: cost data + derived signals -> prompt -> LLM (or the response cache).
+
+    Returns (cost_series, analysis, cached_at): analysis is CostAdvice JSON (or "AI Error: ..."),
+    cached_at None for a fresh LLM answer. on_text receives the raw streamed JSON.
+    `costs` is the window's series when the caller already loaded it.
+    """
+    if costs is None:
+        costs = get_last_n_days_cost(days, account_id, classify_question(query))
+    ce_costs = costs
+    breakdowns = get_dimension_breakdowns(days, query)
+    cur = get_cur_breakdowns(days, query)
+    if cur:
+        # CUR line items are the finer source; its SERVICE view replaces the CE one when it covers the window.
+        services = cur.pop('SERVICE', None)
+        cur.pop('TAGS', None)
+        breakdowns.update(cur)
+        if covers_window(services):
+            costs = services
+        else:
+            print("⚠️ CUR data does not reach the end of the window, keeping Cost Explorer totals")
+    anomalies = get_cost_anomalies(account_id)
+    forecast = get_month_end_forecast(account_id)
+    comparisons = get_window_comparisons(account_id)
+    waste = get_waste_findings(query)
+    drivers = get_variance_drivers(days, query, account_id, ce_costs)
+    
+    data = build_cost_data(costs, days, breakdowns, anomalies, forecast, comparisons, waste, drivers)
+    tf_hint = get_terraform_hints(costs)
+    params = {"models": [provider.model for provider in llm_router.providers], "max_tokens": MAX_TOKENS,
+              "format": "json" if advice_module() else "text"}
+    # The history the model will see is part of the key: "how do I fix that?" depends on it.
+    history = fit_history(data, query, chat_history, tf_hint)
+    key = response_key(data, query, tf_hint, params, history)
+    cached = response_cache.get(account_id, key)
+    # Same cost snapshot, differently worded question ("why so expensive" vs "biggest cost?").
+    snapshot_key = response_key(data, "", tf_hint, params, history)
+    if not cached:
+        similar = near_duplicates.find(account_id, query, snapshot_key)
+        cached = response_cache.get(account_id, similar) if similar else None
+    if cached:
+        return costs, cached['response'], cached['created_at']
+
+    messages = build_cost_messages(data, query, history, tf_hint, budget=None)
+    raw_messages = build_cost_messages(
+        build_cost_data(costs, days, breakdowns, anomalies, forecast, comparisons, waste, drivers, budget=None),
+        query, chat_history, tf_hint, budget=None)
+    prompt_tokens = message_tokens(messages)
+    print(f"✂️ Prompt tokens: {message_tokens(raw_messages)} -> {prompt_tokens} "
+          f"(budget {PROMPT_TOKEN_BUDGET})")
+    ai_analysis = call_deepseek_api(messages, on_text, deadline)
+    if not ai_analysis.startswith("AI Error"):
+        ai_analysis = structured_advice(ai_analysis, messages, deadline)
+    if not ai_analysis.startswith("AI Error"):
+        response_cache.put(account_id, key, ai_analysis, prompt_tokens + estimate_tokens(ai_analysis))
+        near_duplicates.add(account_id, query, snapshot_key, key)
+    return costs, ai_analysis, None
+
+def fetch_window_costs(start, end, dimension, service, account_id, local_only=False):
+    """{key: micros} for a compiled query window: rollups when they cover it, else one CE query.
+
+    Rollups are loaded through yesterday, so windows running into today (this_month,
+    this_week, today) take [start, today) from the rollups and only today's partial
+    day from CE. With local_only, raises LookupError instead of loading rollups or calling CE.
+    """
+    today = date.today()
+    if dimension == 'SERVICE' and service is None and start < today:
+        rollups = rollup_registry.get(account_id, load=not local_only)
+        if rollups and start >= rollups.origin:
+            totals = rollups.window(start, min(end, today))
+            if end <= today:
+                return totals
+            if local_only:
+                raise LookupError("Rollups in this container do not cover today")
+            for key, micros in ce_window_costs(today, end, dimension, service).items():
+                totals[key] = totals.get(key, 0) + micros
+            return totals
+    if local_only:
+        raise LookupError("Rollups in this container cannot answer this query")
+    return ce_window_costs(start, end, dimension, service)
+
+def ce_window_costs(start, end, dimension, service):
+    """{key: micros} over [start, end) from one MONTHLY Cost Explorer query."""
+    request = {
+        'TimePeriod': {'Start': start.isoformat(), 'End': end.isoformat()},
+        'Granularity': 'MONTHLY',
+        'Metrics': ['UnblendedCost'],
+        'GroupBy': [{'Type': 'DIMENSION', 'Key': dimension}]
+    }
+    if service:
+        request['Filter'] = {'Dimensions': {'Key': 'SERVICE', 'Values': [service]}}
+    totals = {}
+    for _, key, amount in iter_cost_rows(iter_cost_pages(ce_client, **request)):
+        micros = to_micros(amount)
+        if micros:
+            totals[key] = totals.get(key, 0) + micros
+    return totals
+
+def answer_compiled_query(plan, account_id, local_only=False):
+    """Deterministic answer for data-only questions (no LLM round-trip).
+
+    With local_only, raises LookupError when the data is not already in this container.
+    """
+    started = time.time()
+    if plan.tags or plan.tag_key:
+        fetch = lambda start, end, dim, svc: fetch_tag_costs(start, end, plan, account_id, local_only)
+    else:
+        fetch = lambda start, end, dim, svc: fetch_window_costs(start, end, dim, svc, account_id, local_only)
+    try:
+        answer = execute(plan, fetch)
+    except Exception as e:
+        if local_only and isinstance(e, LookupError):
+            raise
+        print(f"❌ Query Error: {e}")
+        return None
+    print(f"⚡ Compiled query answered in {(time.time() - started) * 1000:.0f} ms: {plan}")
+    return answer
+
+def load_tag_index(account_id, start, end):
+    """Tag index from CUR tag combinations when exports are configured, else CE grouped by tag-key pairs."""
+    if CUR_URIS:
+        return index_from_cur(ingest_cur_files(CUR_URIS, start, end, workers=os.cpu_count() or 1)['TAGS'])
+    return build_tag_index(ce_client, start, end, TAG_KEYS)
+
+tag_registry = TagIndexRegistry(load_tag_index)
+tag_stats = TagQueryStats()
+
+def fetch_tag_costs(start, end, plan, account_id, local_only=False):
+    """{label: micros} for tag filters: the tag index when one view covers the query, else one filtered CE query.
+
+    With local_only, raises LookupError instead of building the index or calling CE.
+    """
+    started = time.perf_counter()
+    index = None if plan.service else tag_registry.get(account_id, build=not local_only)
+    costs = index.costs(start, end, plan.tags, plan.tag_key) if index else None
+    if costs is not None:
+        tag_stats.record('index', time.perf_counter() - started)
+        return costs
+    if local_only:
+        raise LookupError("Tag index cannot answer this query")
+
+    key_name = index.original_key if index else (lambda key: key)
+    filters = [{'Tags': {'Key': key_name(key), 'Values': [value], 'MatchOptions': ['EQUALS', 'CASE_INSENSITIVE']}}
+               for key, value in plan.tags]
+    if plan.service:
+        filters.append({'Dimensions': {'Key': 'SERVICE', 'Values': [plan.service]}})
+    request = {
+        'TimePeriod': {'Start': start.isoformat(), 'End': end.isoformat()},
+        'Granularity': 'MONTHLY',
+        'Metrics': ['UnblendedCost']
+    }
+    if filters:
+        request['Filter'] = filters[0] if len(filters) == 1 else {'And': filters}
+    if plan.tag_key:
+        request['GroupBy'] = [{'Type': 'TAG', 'Key': key_name(plan.tag_key)}]
+    label = ", ".join(f"{key}={value}" for key, value in plan.tags) or "all"
+    costs = {}
+    for _, *keys, amount in iter_cost_rows(iter_cost_pages(ce_client, **request)):
+        micros = to_micros(amount)
+        if micros:
+            key = (keys[0].partition('$')[2] or "(untagged)") if keys else label
+            costs[key] = costs.get(key, 0) + micros
+    tag_stats.record('ce', time.perf_counter() - started)
+    return costs
+
+def answer_tag_query_locally(plan, account_id):
+    """Inline answer for tag queries when this container already holds a fresh index that covers them."""
+    try:
+        return execute(plan, lambda start, end, dim, svc: fetch_tag_costs(start, end, plan, account_id, local_only=True))
+    except LookupError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Tag Query Error: {e}")
+        return None
+
+def get_cached_cost(n, account_id):
+    """Last n days from the cost cache table alone; raises LookupError when a day was never fetched."""
+    end = date.today()
+    start = end - timedelta(days=n)
+    daily_costs = cost_cache.get_cached_costs(account_id, start, end)
+    if daily_costs is None:
+        raise LookupError(f"Last {n} days are not all in the cost cache")
+    return CostSeries.from_daily_costs(daily_costs, start, end)
+
+def answer_without_llm(plan, query, days, account_id, local_only=False, costs=None):
+    """(title, text, source) for questions rules can answer: compiled data queries and tiny bills. None -> LLM.
+
+    With local_only (the Slack ack path), uses only data already at hand (warm tag index and
+    rollups, stored cost days) and raises LookupError instead of calling Cost Explorer.
+    `costs` is the window's series when the caller already loaded it.
+    """
+    if plan.deterministic:
+        answer = answer_compiled_query(plan, account_id, local_only)
+        return (window_label(plan.window), answer, 'compiled') if answer else None
+    if costs is None:
+        costs = (get_cached_cost(days, account_id) if local_only
+                 else get_last_n_days_cost(days, account_id, classify_question(query)))
+    if not answerable_by_rules(costs, RULES_SPEND_THRESHOLD):
+        return None
+    text = template_analysis(costs, get_terraform_hints(costs), days)
+    return f"Last {days} Days", f"{text}\n\n_⚡ Rule-based answer (spend under ${RULES_SPEND_THRESHOLD:g})_", 'rules'
+
+def get_fresh_snapshot(account_id, days, query):
+    """Pre-computed answer for the default question, if the scheduled run left a fresh one."""
+    if query != DEFAULT_QUERY or days not in SNAPSHOT_WINDOWS:
+        snapshot_stats.record('bypassed')
+        return None
+    try:
+        snapshot = snapshot_store.load(account_id, days)
+    except Exception as e:
+        print(f"⚠️ Snapshot Read Error: {e}")
+        snapshot = None
+    if snapshot is None:
+        snapshot_stats.record('misses')
+        return None
+    if not is_fresh(snapshot):
+        snapshot_stats.record('stale')
+        return None
+    snapshot_stats.record('hits')
+    return snapshot
+
+def build_slack_message(title, user_name, text, note=None):
+    """Header + answer; structured CostAdvice JSON is laid out as Block Kit sections, anything else as mrkdwn."""
+    advice = load_advice(text)
+    blocks = [
+        {
+            "type": "header",
+            "text": {"type": "plain_text", "text": f"💰 Cost Advisor: {title}"}
+        },
+        {
+            "type": "section",
+            "text": {"type": "mrkdwn", "text": f"*User:* {user_name}" if advice else f"*User:* {user_name}\n\n{text}"}
+        }
+    ]
+    if advice:
+        blocks += advice_module().advice_blocks(advice)
+    else:
+        snippet = fenced_hcl(text)
+        check = check_hcl(snippet) if snippet is not None else None
+        if check and not check.ok:
+            blocks.append({"type": "context", "elements": [
+                {"type": "mrkdwn", "text": f"🚧 *HCL check failed:* {check.errors[0]}. Fix it before `terraform plan`."}]})
+    if note:
+        blocks.append({"type": "context", "elements": [{"type": "mrkdwn", "text": note}]})
+    return {"response_type": "in_channel", "blocks": blocks}
+
+def post_progress(response_url, title, user_name, text, final, first, note=None):
+    """One progressive update: the first post creates the message, later ones replace it in place."""
+    message = build_slack_message(title, user_name, text if final else f"{text}\n\n_✍️ still writing..._", note)
+    if not first:
+        message["replace_original"] = True
+    http_pool.request('POST', response_url, total=5, json=message)
+
+def lambda_deadline(context):
+    """time.monotonic() by which background work should be done, from the invocation's remaining time."""
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return None
+    return time.monotonic() + context.get_remaining_time_in_millis() / 1000 - DEADLINE_MARGIN_SECONDS
+
+def process_background_task(payload, deadline=None):
     print("⏳ Starting background analysis...")
     response_url = payload['response_url']
     days = payload['days']
     query = payload['query']
     user_name = payload['user_name']
     user_id = payload['user_id']
+    account_id = payload.get('account_id', 'default')
 
-    costs = get_last_n_days_cost(days)
-    chat_history = get_context(user_id)
-    
-    prompt = build_cost_prompt(costs, query, days, chat_history)
-    ai_analysis = call_deepseek_api(prompt)
-    
-    save_interaction(user_id, query, ai_analysis)
+    plan = compile_query(payload.get('text', query))
+    # Loaded at most once, shared by the rules and the prompt: every load re-fetches the restatement days.
+    costs = None
+    answered = None
+    # The Slack path already ran the rules when it finished inside its window.
+    if not payload.get('rules_checked'):
+        if not plan.deterministic:
+            costs = get_last_n_days_cost(days, account_id, classify_question(query))
+        answered = answer_without_llm(plan, query, days, account_id, costs=costs)
+    streamed = False
+    note = None
+    if answered:
+        title, ai_analysis, source = answered
+    else:
+        title = f"Last {days} Days"
+        snapshot = get_fresh_snapshot(account_id, days, query)
+        if snapshot:
+            ai_analysis = snapshot['analysis']
+            note = f"_⚡ Pre-computed {snapshot_age(snapshot) // 60} min ago_"
+            source = 'snapshot'
+        else:
+            chat_history = get_context(user_id)
+            # `note` is read when the final update is posted, after it is set below.
+            updater = ProgressiveUpdater(
+                lambda text, final, first: post_progress(response_url, title, user_name, text, final, first,
+                                                         note if final else None))
+            costs, ai_analysis, cached_at = analyze_costs(days, query, account_id, chat_history,
+                                                          on_text=lambda text: updater.update(advice_preview(text)),
+                                                          deadline=deadline, costs=costs)
+            source = 'cache' if cached_at else 'llm'
+            if ai_analysis.startswith("AI Error"):
+                # No provider answered in time: a local rule-based report beats an error message.
+                print(f"⚠️ Falling back to template analysis: {ai_analysis}")
+                ai_analysis = template_analysis(costs, get_terraform_hints(costs), days)
+                note = "_⚠️ AI service unavailable, showing a rule-based analysis_"
+                source = 'fallback'
+            if cached_at:
+                note = f"_♻️ Cached answer from {(int(time.time()) - cached_at) // 60} min ago_"
+            updater.finish(ai_analysis)
+            streamed = True
+    answer_stats.record(source)
+
+    advice = load_advice(ai_analysis)
+    save_interaction(user_id, query, advice_module().advice_markdown(advice) if advice else ai_analysis)
     
-    slack_message = {
-        "response_type": "in_channel",
-        "blocks": [
-            {
-                "type": "header",
-                "text": {"type": "plain_text", "text": f"💰 Cost Advisor: Last {days} Days"}
-            },
-            {
-                "type": "section",
-                "text": {"type": "mrkdwn", "text": f"*User:* {user_name}\n\n{ai_analysis}"}
-            }
-        ]
-    }
-    requests.post(response_url, json=slack_message)
+    if not streamed:
+        http_pool.request('POST', response_url, total=5, json=build_slack_message(title, user_name, ai_analysis, note))
     print("✅ Finished.")
 
+def run_scheduled_precompute(account_id, deadline=None):
+    """EventBridge cron: pre-compute the default analysis so the interactive path only reads."""
+    print("🌙 Starting scheduled pre-computation...")
+    for days in SNAPSHOT_WINDOWS:
+        try:
+            started = time.time()
+            costs, ai_analysis, _ = analyze_costs(days, DEFAULT_QUERY, account_id, "", deadline=deadline)
+            if ai_analysis.startswith("AI Error"):
+                print(f"⚠️ Snapshot skipped ({days}d): {ai_analysis}")
+                continue
+            snapshot = make_snapshot(
+                days, DEFAULT_QUERY, costs.summary(), ai_analysis,
+                anomalies=get_cost_anomalies(account_id),
+                build_seconds=round(time.time() - started, 2)
+            )
+            snapshot_store.save(account_id, days, snapshot)
+            print(f"✅ Snapshot {days}d saved in {snapshot['build_seconds']}s")
+        except Exception as e:
+            print(f"⚠️ Snapshot Error ({days}d): {e}")
+    alert_anomalies(account_id)
+
+def alert_anomalies(account_id):
+    """Publish the day's anomalies (provisional spikes included) to the cost-alerts topic."""
+    topic_arn = os.getenv('SNS_TOPIC_ARN')
+    anomalies = get_cost_anomalies(account_id)
+    if not topic_arn or not anomalies:
+        return
+    try:
+        sns_client.publish(
+            TopicArn=topic_arn,
+            Subject=f"Cost anomalies detected ({len(anomalies)})",
+            Message=format_anomalies(anomalies, limit=10)
+        )
+        print(f"🚨 Alerted {len(anomalies)} anomalies")
+    except Exception as e:
+        print(f"⚠️ Anomaly Alert Error: {e}")
+
 # -------- Main Handler -------- #
 
+def inline_response(title, user_name, text):
+    return {
+        "statusCode": 200,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps({
+            "response_type": "in_channel",
+            "text": f"💰 Cost Advisor: {title}\n*User:* {user_name}\n\n{text}"
+        })
+    }
+
 def lambda_handler(event, context):
     print(f"Event: {json.dumps(event)[:200]}")
 
     # CASE 1: Background Call
     if event.get('is_background_task'):
-        process_background_task(event)
+        process_background_task(event, lambda_deadline(context))
         return
 
-    # CASE 2: Slack Call
+    # CASE 2: Scheduled pre-computation (EventBridge cron)
+    if event.get('detail-type') == 'Scheduled Event':
+        run_scheduled_precompute(context.invoked_function_arn.split(':')[4], lambda_deadline(context))
+        return
+
+    # CASE 3: Slack Call
     try:
         body = event.get('body', '')
         if event.get('isBase64Encoded', False):
@@ -254,15 +901,44 @@ def lambda_handler(event, context):
         user_id = params.get('user_id', 'unknown')
         response_url = params.get('response_url')
 
-        days = 7
+        account_id = context.invoked_function_arn.split(':')[4]
+        plan = compile_query(user_text)
+        tag_query = plan.deterministic and bool(plan.tags or plan.tag_key)
+        if tag_query:
+            # Showback queries on a warm container are answered inline from the tag index.
+            answer = answer_tag_query_locally(plan, account_id)
+            if answer:
+                answer_stats.record('compiled')
+                save_interaction(user_id, user_text, answer)
+                return inline_response(window_label(plan.window), user_name, answer)
+        start, end = resolve_window(plan.window)
+        days = min((end - start).days, 60)
         query = "General"
         parts = user_text.split(' ', 1)
         if parts[0].isdigit():
-            days = min(int(parts[0]), 60)
             if len(parts) > 1: query = parts[1]
         else:
             query = user_text
 
+        # Simple questions and tiny bills are answered inside Slack's 3 s window from data already at hand;
+        # anything needing Cost Explorer (or a cold tag index) goes straight to the background.
+        answered = None
+        rules_checked = False
+        if not tag_query:
+            inline = inline_pool.submit(answer_without_llm, plan, query, days, account_id, local_only=True)
+            try:
+                answered = inline.result(timeout=INLINE_ANSWER_SECONDS)
+                rules_checked = True
+            except LookupError as e:
+                print(f"⚡ No inline answer, data not local: {e}")
+            except Exception as e:
+                print(f"⚠️ Inline answer skipped: {e!r}")
+        if answered:
+            title, answer, source = answered
+            answer_stats.record(source)
+            save_interaction(user_id, query, answer)
+            return inline_response(title, user_name, answer)
+
         # Async Invoke
         payload = {
             'is_background_task': True,
@@ -270,7 +946,10 @@ def lambda_handler(event, context):
             'days': days,
             'query': query,
             'user_name': user_name,
-            'user_id': user_id
+            'user_id': user_id,
+            'text': user_text,
+            'account_id': account_id,
+            'rules_checked': rules_checked
         }
         
         lambda_client.invoke(
@@ -0,0 +1,220 @@
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'aws_resource_types.txt')
+CACHE_SIZE = 2048
+
+# Top-level Terraform blocks and how many labels each takes.
+BLOCK_LABELS = {
+    'resource': 2, 'data': 2, 'module': 1, 'variable': 1, 'output': 1, 'provider': 1,
+    'locals': 0, 'terraform': 0, 'moved': 0, 'import': 0, 'removed': 0, 'check': 1,
+}
+OPENERS = {'(': ')', '[': ']', '{': '}'}
+# An expression may not end on one of these.
+DANGLING = {'=', ',', '.', ':', '?', '!', '<', '>', '+', '-', '*', '/', '%', '==', '!=', '<=', '>=', '&&', '||', '=>'}
+
+HclResult = namedtuple('HclResult', [
+    'ok',         # no syntax errors and every aws_* resource type is known
+    'errors',     # ["line N: ...", ...]
+    'resources'   # ("type.name", ...) for each resource block
+])
+
+
+def _load_schema(path=SCHEMA_PATH):
+    with open(path) as f:
+        return frozenset(line.strip() for line in f if line.strip() and not line.startswith('#'))
+
+
+RESOURCE_TYPES = _load_schema()
+
+
+_FENCE = re.compile(r'```(?:hcl|terraform|tf)[ \t]*\n(.*?)\n?```', re.S | re.I)
+
+
+class HclSyntaxError(Exception):
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+
+# -------- Tokenizer -------- #
+
+_TOKEN = re.compile(r'''
+    [ \t\r]+
+  | \#[^\n]* | //[^\n]* | /\*.*?\*/
+  | (?P<newline>\n)
+  | (?P<heredoc><<-?(?P<tag>[A-Za-z_]\w*)\n.*?\n[ \t]*(?P=tag)(?=\n|\Z))
+  | (?P<quote>")
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<ident>[A-Za-z_][\w-]*)
+  | (?P<op>==|!=|<=|>=|&&|\|\||=>|\.\.\.|[{}\[\]()=,.:?!<>+\-*/%])
+  | (?P<bad>.)
+''', re.X | re.S)
+
+
+def _string_end(text, i):
+    """Index just past the quoted string opening at text[i], or None when it is unterminated.
+
+    ${...} and %{...} interpolations are tracked by brace depth, so they may hold
+    object literals and quoted strings of their own; $${ and %%{ are literal escapes.
+    """
+    depth = 0
+    i += 1
+    while i < len(text):
+        char = text[i]
+        if char == '\n':
+            return None
+        if char == '\\':
+            i += 2
+            continue
+        if depth == 0:
+            if char == '"':
+                return i + 1
+            if text.startswith(('$${', '%%{'), i):
+                i += 3
+                continue
+            if char in '$%' and text.startswith('{', i + 1):
+                depth = 1
+                i += 2
+                continue
+        elif char == '"':
+            i = _string_end(text, i)
+            if i is None:
+                return None
+            continue
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        i += 1
+    return None
+
+
+def tokenize(text):
+    """[(kind, value, line)] with whitespace and comments dropped; raises HclSyntaxError on stray characters."""
+    tokens = []
+    line = 1
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        kind = match.lastgroup
+        end = match.end()
+        if kind == 'quote':
+            kind, end = 'string', _string_end(text, pos)
+            if end is None:
+                raise HclSyntaxError(line, "unterminated string")
+        value = text[pos:end]
+        if kind == 'bad':
+            raise HclSyntaxError(line, f"unexpected character {value!r}")
+        if kind is not None:
+            tokens.append((kind, value, line))
+        line += value.count('\n')
+        pos = end
+    tokens.append(('end', '', line))
+    return tokens
+
+# -------- Parser -------- #
+
+def _skip_newlines(tokens, i):
+    while tokens[i][0] == 'newline':
+        i += 1
+    return i
+
+
+def _expression(tokens, i, name):
+    """Index just past an attribute value: balanced brackets, ending at a top-level newline or closing brace."""
+    start = i
+    stack = []
+    while True:
+        kind, value, line = tokens[i]
+        if kind == 'end' or (kind == 'newline' and not stack):
+            break
+        if kind == 'op':
+            if value in OPENERS:
+                stack.append(OPENERS[value])
+            elif value in (')', ']', '}'):
+                if not stack:
+                    if value == '}':
+                        break
+                    raise HclSyntaxError(line, f"unmatched {value!r} in {name}")
+                if stack.pop() != value:
+                    raise HclSyntaxError(line, f"mismatched {value!r} in {name}")
+            elif value == '=' and not stack:
+                raise HclSyntaxError(line, f"unexpected '=' in {name}")
+        i += 1
+    if stack:
+        raise HclSyntaxError(tokens[i][2], f"unclosed {stack[-1]!r} in {name}")
+    if i == start:
+        raise HclSyntaxError(tokens[i][2], f"missing value for {name}")
+    if tokens[i - 1][0] == 'op' and tokens[i - 1][1] in DANGLING:
+        raise HclSyntaxError(tokens[i - 1][2], f"{name} ends with {tokens[i - 1][1]!r}")
+    return i
+
+
+def _body(tokens, i, nested, blocks):
+    """Parse attributes and blocks until the matching '}' (nested) or end of input; returns the next index."""
+    while True:
+        i = _skip_newlines(tokens, i)
+        kind, value, line = tokens[i]
+        if kind == 'end':
+            if nested:
+                raise HclSyntaxError(line, "missing '}'")
+            return i
+        if value == '}' and kind == 'op':
+            if not nested:
+                raise HclSyntaxError(line, "unexpected '}'")
+            return i + 1
+        if kind != 'ident':
+            raise HclSyntaxError(line, f"expected an argument or block name, got {value!r}")
+        name = value
+        i += 1
+        if tokens[i][1] == '=':
+            if not nested:
+                raise HclSyntaxError(line, f"argument {name} outside any block")
+            i = _expression(tokens, i + 1, name)
+        else:
+            labels = []
+            while tokens[i][0] in ('string', 'ident'):
+                labels.append(tokens[i][1].strip('"'))
+                i += 1
+            if tokens[i][1] != '{':
+                raise HclSyntaxError(tokens[i][2], f"expected '{{' after {name}")
+            if not nested:
+                blocks.append((name, labels, line))
+            i = _body(tokens, i + 1, True, blocks)
+        if tokens[i][0] not in ('newline', 'end') and tokens[i][1] != '}':
+            raise HclSyntaxError(tokens[i][2], f"expected a newline after {name}")
+
+# -------- Validation -------- #
+
+def fenced_hcl(text):
+    """Body of the first ```hcl (or terraform/tf) block in a plain-text reply; None when there is none."""
+    match = _FENCE.search(text or '')
+    return match.group(1) if match else None
+
+
+def check_hcl(text):
+    """HclResult for a snippet; memoized per container, keyed by the snippet text itself."""
+    return _check(text or '')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _check(text):
+    blocks = []
+    try:
+        _body(tokenize(text), 0, False, blocks)
+    except HclSyntaxError as e:
+        return HclResult(False, (str(e),), ())
+    errors = []
+    resources = []
+    for name, labels, line in blocks:
+        expected = BLOCK_LABELS.get(name)
+        if expected is None:
+            errors.append(f"line {line}: unknown block type {name!r}")
+        elif len(labels) != expected:
+            errors.append(f"line {line}: {name} takes {expected} label(s), got {len(labels)}")
+        elif name == 'resource':
+            resources.append(f"{labels[0]}.{labels[1]}")
+            if labels[0].startswith('aws_') and labels[0] not in RESOURCE_TYPES:
+                errors.append(f"line {line}: unknown resource type {labels[0]!r}")
+    return HclResult(not errors, tuple(errors), tuple(resources))
@@ -0,0 +1,156 @@
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (optional; enables HTTP/2 multiplexing when bundled)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+# Phase timeouts (seconds); the total budget is per call, see HttpPool.request.
+CONNECT_TIMEOUT = 3.0
+READ_TIMEOUT = 30.0
+WRITE_TIMEOUT = 10.0
+POOL_TIMEOUT = 5.0
+# Idle connections are dropped a bit before typical 60s server/ALB idle timeouts.
+KEEPALIVE_EXPIRY = 55.0
+
+# Per-host connection limits (one pool per host).
+HOST_LIMITS = {
+    'api.deepseek.com': 4,
+    'hooks.slack.com': 4,
+}
+DEFAULT_HOST_LIMIT = 4
+
+
+class TotalTimeout(httpx.TimeoutException):
+    """The whole call (connect + send + read, including a streamed body) overran its budget."""
+
+# -------- Metrics -------- #
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+
+    def as_dict(self):
+        reused = self.requests - self.connections
+        return {
+            'requests': self.requests,
+            'connections': self.connections,
+            'reuse_ratio': round(reused / self.requests, 3) if self.requests else 0.0
+        }
+
+# -------- Pool -------- #
+
+class HttpPool:
+    """Keep-alive httpx clients, one per host, shared across warm invocations.
+
+    New connections are counted through httpcore's trace hook, so every request
+    logs whether it reused a pooled connection.
+    """
+
+    def __init__(self, host_limits=None, default_limit=DEFAULT_HOST_LIMIT, http2=HTTP2):
+        self.host_limits = host_limits if host_limits is not None else HOST_LIMITS
+        self.default_limit = default_limit
+        self.http2 = http2
+        self.clients = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def _client(self, host):
+        with self.lock:
+            client = self.clients.get(host)
+            if client is None:
+                limit = self.host_limits.get(host, self.default_limit)
+                client = self.clients[host] = httpx.Client(
+                    http2=self.http2,
+                    limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit,
+                                        keepalive_expiry=KEEPALIVE_EXPIRY),
+                    timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT, write=WRITE_TIMEOUT,
+                                          pool=POOL_TIMEOUT)
+                )
+                self.stats[host] = HostStats()
+            return client, self.stats[host]
+
+    def _prepare(self, url, total, kwargs):
+        host = urlsplit(url).hostname
+        client, stats = self._client(host)
+        deadline = time.monotonic() + total
+        # No phase may outlive what is left of the total budget.
+        kwargs['timeout'] = httpx.Timeout(min(READ_TIMEOUT, total), connect=min(CONNECT_TIMEOUT, total),
+                                          write=min(WRITE_TIMEOUT, total), pool=min(POOL_TIMEOUT, total))
+        opened = []
+
+        def trace(event, info):
+            if event == 'connection.connect_tcp.complete':
+                opened.append(1)
+
+        kwargs['extensions'] = {**kwargs.get('extensions', {}), 'trace': trace}
+        return host, client, stats, deadline, opened
+
+    def _record(self, host, stats, opened, started):
+        with self.lock:
+            stats.requests += 1
+            stats.connections += len(opened)
+        state = 'new connection' if opened else 'reused'
+        print(f"🔌 HTTP {host}: {state}, {(time.monotonic() - started) * 1000:.0f} ms {stats.as_dict()}")
+
+    def request(self, method, url, total=45.0, **kwargs):
+        """One request with the body read, bounded by `total` seconds end to end.
+
+        Each attempt's phase timeouts are cut to what is left of the budget and the
+        body is read chunk by chunk against the deadline. A request that fails on a
+        reused keep-alive connection (closed by the server while idle) is retried
+        once, and only while time remains.
+        """
+        deadline = time.monotonic() + total
+        for attempt in range(2):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TotalTimeout(f"{method} {urlsplit(url).hostname} exceeded {total:.0f}s total")
+            host, client, stats, _, opened = self._prepare(url, remaining, kwargs)
+            started = time.monotonic()
+            try:
+                with client.stream(method, url, **kwargs) as response:
+                    response.deadline = deadline
+                    body = b''.join(iter_chunks(response, raw=True))
+                return httpx.Response(response.status_code, headers=response.headers, content=body,
+                                      request=response.request)
+            except (httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError):
+                if opened or attempt:
+                    raise
+                print(f"🔌 HTTP {host}: stale keep-alive connection, retrying")
+            finally:
+                self._record(host, stats, opened, started)
+
+    @contextmanager
+    def stream(self, method, url, total=45.0, **kwargs):
+        """Streaming request; iterate `iter_chunks(response)` to enforce the total budget while reading."""
+        host, client, stats, deadline, opened = self._prepare(url, total, kwargs)
+        started = time.monotonic()
+        try:
+            with client.stream(method, url, **kwargs) as response:
+                response.deadline = deadline
+                yield response
+        finally:
+            self._record(host, stats, opened, started)
+
+    def close(self):
+        with self.lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients.clear()
+
+
+def iter_chunks(response, raw=False):
+    """Body chunks as they arrive (decoded, or as sent with raw); raises TotalTimeout once the deadline has passed."""
+    deadline = getattr(response, 'deadline', None)
+    for chunk in (response.iter_raw() if raw else response.iter_bytes()):
+        if deadline is not None and time.monotonic() > deadline:
+            raise TotalTimeout("stream exceeded its total budget")
+        yield chunk
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+
+from cost_cache import RESPONSE_PREFIX
+
+MAX_AGE_SECONDS = 6 * 3600
+LRU_SIZE = 256
+
+# -------- Keys -------- #
+
+def _squash(text):
+    return re.sub(r'\s+', ' ', (text or '').strip())
+
+
+def response_key(data, query, hint, params, history=""):
+    """Stable hash of everything that shapes the answer: cost data text, query, KB hint, model params
+    and the chat history sent with the prompt.
+
+    Whitespace and query case are normalized so formatting-only differences still hit.
+    """
+    canonical = json.dumps({
+        'data': _squash(data),
+        'query': _squash(query).lower(),
+        'hint': _squash(hint),
+        'params': params,
+        'history': _squash(history)
+    }, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+# -------- Stores -------- #
+
+class DynamoResponseStore:
+    """Responses under (account_id, 'llm#<key>') with an `expires_at` TTL attribute."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def load(self, account_id, key):
+        item = self.table.get_item(Key={'account_id': account_id, 'day': f"{RESPONSE_PREFIX}{key}"}).get('Item')
+        if not item:
+            return None
+        return {'response': item['response'], 'tokens': int(item['tokens']), 'created_at': int(item['created_at'])}
+
+    def save(self, account_id, key, entry, ttl):
+        self.table.put_item(Item={
+            'account_id': account_id,
+            'day': f"{RESPONSE_PREFIX}{key}",
+            'response': entry['response'],
+            'tokens': entry['tokens'],
+            'created_at': int(entry['created_at']),
+            'expires_at': int(entry['created_at'] + ttl)
+        })
+
+
+class InMemoryResponseStore:
+    def __init__(self):
+        self.items = {}
+
+    def load(self, account_id, key):
+        return self.items.get((account_id, key))
+
+    def save(self, account_id, key, entry, ttl):
+        self.items[(account_id, key)] = entry
+
+# -------- Cache -------- #
+
+class ResponseCache:
+    """In-process LRU in front of a shared store; entries older than max_age are misses.
+
+    Counters are per container, like SnapshotStats.
+    """
+
+    def __init__(self, store, max_age=MAX_AGE_SECONDS, lru_size=LRU_SIZE):
+        self.store = store
+        self.max_age = max_age
+        self.lru_size = lru_size
+        self.lru = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+
+    def get(self, account_id, key, now=None):
+        """Fresh cached entry or None; a store failure counts as a miss."""
+        now = now or time.time()
+        entry = self.lru.get((account_id, key))
+        source = 'lru'
+        if entry is None:
+            source = 'store'
+            try:
+                entry = self.store.load(account_id, key)
+            except Exception as e:
+                print(f"⚠️ Response Cache Read Error: {e}")
+                entry = None
+        if entry is None or now - entry['created_at'] > self.max_age:
+            self.lru.pop((account_id, key), None)
+            self._record('miss')
+            return None
+        self._remember(account_id, key, entry)
+        self.saved_tokens += entry['tokens']
+        self._record(f"hit ({source})")
+        return entry
+
+    def put(self, account_id, key, response, tokens, now=None):
+        entry = {'response': response, 'tokens': tokens, 'created_at': int(now or time.time())}
+        self._remember(account_id, key, entry)
+        try:
+            self.store.save(account_id, key, entry, self.max_age)
+        except Exception as e:
+            print(f"⚠️ Response Cache Write Error: {e}")
+
+    def _remember(self, account_id, key, entry):
+        self.lru[(account_id, key)] = entry
+        self.lru.move_to_end((account_id, key))
+        while len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def _record(self, outcome):
+        if outcome == 'miss':
+            self.misses += 1
+        else:
+            self.hits += 1
+        lookups = self.hits + self.misses
+        print(f"♻️ Response cache {outcome}: " + json.dumps({
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            'saved_tokens': self.saved_tokens
+        }))
+
+# -------- Provider Prefix Cache -------- #
+
+def cache_hit_tokens(usage):
+    """(hit, miss) prompt tokens from a chat-completions `usage` block.
+
+    DeepSeek reports prompt_cache_hit/miss_tokens; OpenAI-style providers report
+    prompt_tokens_details.cached_tokens.
+    """
+    usage = usage or {}
+    if 'prompt_cache_hit_tokens' in usage:
+        return int(usage['prompt_cache_hit_tokens']), int(usage.get('prompt_cache_miss_tokens', 0))
+    hit = int((usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0))
+    return hit, int(usage.get('prompt_tokens', 0)) - hit
+
+
+class PrefixCacheStats:
+    """Per-container totals of provider-side cached prompt tokens, to measure the stable-prefix layout."""
+
+    def __init__(self):
+        self.hit_tokens = 0
+        self.miss_tokens = 0
+        self.requests = 0
+
+    def record(self, usage):
+        if not usage:
+            return
+        hit, miss = cache_hit_tokens(usage)
+        self.hit_tokens += hit
+        self.miss_tokens += miss
+        self.requests += 1
+        prompt = self.hit_tokens + self.miss_tokens
+        print(f"🧊 Prompt prefix cache: {hit} hit / {miss} miss tokens " + json.dumps({
+            'requests': self.requests,
+            'hit_tokens': self.hit_tokens,
+            'miss_tokens': self.miss_tokens,
+            'hit_ratio': round(self.hit_tokens / prompt, 3) if prompt else 0.0
+        }))
@@ -0,0 +1,160 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+# One attempt never gets more than this, even with a long Lambda deadline left.
+ATTEMPT_TIMEOUT = 45.0
+# Until enough samples exist, hedge after this long without output.
+DEFAULT_HEDGE_AFTER = 8.0
+# Don't start an attempt (or a hedge) with less than this left before the deadline.
+MIN_ATTEMPT_SECONDS = 2.0
+
+
+class Cancelled(Exception):
+    """Raised inside the losing attempt of a hedged pair to stop its stream."""
+
+# -------- Latency Percentiles -------- #
+
+class LatencyTracker:
+    """Sliding window of latencies (seconds) kept per container, so the hedge point follows observed p95."""
+
+    def __init__(self, window=256, min_samples=8):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q):
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    def hedge_after(self, default=DEFAULT_HEDGE_AFTER):
+        if len(self.samples) < self.min_samples:
+            return default
+        return self.percentile(0.95)
+
+    def summary(self):
+        return {f"p{int(q * 100)}": round(self.percentile(q) or 0, 3) for q in (0.5, 0.95, 0.99)}
+
+# -------- Error Classification -------- #
+
+def retry_after_seconds(value):
+    """Retry-After as seconds (delta-seconds or HTTP-date); None when absent or unparsable."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    """(retryable, retry_after) for 429/5xx responses and transient transport failures."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status == 429 or status >= 500:
+            return True, retry_after_seconds(error.response.headers.get('Retry-After'))
+        return False, None
+    return isinstance(error, (httpx.TimeoutException, httpx.TransportError)), None
+
+# -------- Hedged, Deadline-bound Calls -------- #
+
+def hedged_call(send, budget, tracker, on_text=None):
+    """Run send(budget, emit); if no output has arrived by the tracked p95, start a second copy.
+
+    Output means the first streamed text (emit called) or, for non-streaming
+    sends, the completed result. The first attempt to produce output wins; the
+    other is cancelled at its next token or left to finish in the background.
+    """
+    started = time.monotonic()
+    deadline = started + budget
+    lock = threading.Lock()
+    winner = []
+    # Set on first output or when an attempt ends, whichever comes first.
+    settled = threading.Event()
+
+    def attempt(i):
+        def claim(text=None):
+            with lock:
+                if not winner:
+                    winner.append(i)
+                    tracker.record(time.monotonic() - started)
+                    settled.set()
+            if winner[0] != i:
+                raise Cancelled()
+            if text is not None and on_text:
+                on_text(text)
+
+        result = send(max(deadline - time.monotonic(), 0.1), claim if on_text else None)
+        claim()
+        return result
+
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        futures = {pool.submit(attempt, 0): 0}
+        next(iter(futures)).add_done_callback(lambda _: settled.set())
+        hedge_after = tracker.hedge_after()
+        settled.wait(min(hedge_after, budget))
+        first = next(iter(futures))
+        if not winner and not first.done() and deadline - time.monotonic() > MIN_ATTEMPT_SECONDS:
+            print(f"🪂 Hedging LLM call: no output after {hedge_after:.1f}s (p95)")
+            futures[pool.submit(attempt, 1)] = 1
+
+        errors = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                raise httpx.TimeoutException(f"LLM call exceeded its {budget:.0f}s budget")
+            for future in done:
+                error = future.exception()
+                if error is None and winner and winner[0] == futures[future]:
+                    return future.result()
+                if error is not None and not isinstance(error, Cancelled):
+                    errors.append(error)
+        raise errors[0] if errors else Cancelled()
+    finally:
+        pool.shutdown(wait=False)
+
+
+def resilient_call(send, deadline, tracker, on_text=None, max_attempts=MAX_ATTEMPTS, hedge=True):
+    """Retries with full-jitter backoff on 429/5xx/transport errors, honoring Retry-After,
+    and never runs past `deadline` (time.monotonic() seconds).
+    """
+    for attempt in range(max_attempts):
+        remaining = deadline - time.monotonic()
+        if remaining < MIN_ATTEMPT_SECONDS:
+            raise httpx.TimeoutException(f"Not enough time left for an LLM attempt ({remaining:.1f}s)")
+        budget = min(remaining, ATTEMPT_TIMEOUT)
+        try:
+            if hedge:
+                return hedged_call(send, budget, tracker, on_text)
+            return send(budget, on_text)
+        except Exception as e:
+            retryable, retry_after = is_retryable(e)
+            if not retryable or attempt == max_attempts - 1:
+                raise
+            delay = retry_after if retry_after is not None else \
+                random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+            if time.monotonic() + delay > deadline - MIN_ATTEMPT_SECONDS:
+                raise
+            print(f"🔁 LLM retry {attempt + 1}/{max_attempts - 1} in {delay:.2f}s after: {e}")
+            time.sleep(delay)
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+
+from llm_resilience import MIN_ATTEMPT_SECONDS, LatencyTracker
+
+# EWMA weights: latency adapts within a few calls, error rate a little slower.
+LATENCY_ALPHA = 0.3
+ERROR_ALPHA = 0.2
+# Assumed latency for a provider that has only failed so far.
+UNKNOWN_LATENCY = 6.0
+# Above this error rate a provider is skipped until its cooldown has passed (then probed again).
+UNHEALTHY_ERROR_RATE = 0.5
+COOLDOWN_SECONDS = 60.0
+
+
+class NoProviderAvailable(Exception):
+    """No configured provider is healthy and expected to answer before the deadline."""
+
+# -------- Providers -------- #
+
+class Provider:
+    """One chat-completions endpoint plus its per-container health and latency statistics."""
+
+    def __init__(self, name, url, model, api_key):
+        self.name = name
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.latency = None
+        self.error_rate = 0.0
+        self.last_failure = 0.0
+        self.calls = 0
+        self.trackers = {'stream': LatencyTracker(), 'full': LatencyTracker()}
+        self.lock = threading.Lock()
+
+    def expected_latency(self):
+        # Never called: rank first so every provider gets measured once.
+        if self.calls == 0:
+            return 0.0
+        return self.latency if self.latency is not None else UNKNOWN_LATENCY
+
+    def healthy(self, now=None):
+        now = now or time.monotonic()
+        return self.error_rate < UNHEALTHY_ERROR_RATE or now - self.last_failure > COOLDOWN_SECONDS
+
+    def record(self, seconds, ok):
+        with self.lock:
+            self.calls += 1
+            self.error_rate = (1 - ERROR_ALPHA) * self.error_rate + ERROR_ALPHA * (0.0 if ok else 1.0)
+            if ok:
+                self.latency = seconds if self.latency is None else \
+                    (1 - LATENCY_ALPHA) * self.latency + LATENCY_ALPHA * seconds
+            else:
+                self.last_failure = time.monotonic()
+
+    def as_dict(self):
+        return {
+            'latency': round(self.latency, 2) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 2),
+            'calls': self.calls
+        }
+
+
+def load_providers(config, get_key):
+    """Providers from a JSON list of {name, url, model, key_path}; `get_key(path)` resolves the API key."""
+    return [Provider(p['name'], p['url'], p['model'], get_key(p.get('key_path'))) for p in json.loads(config)]
+
+# -------- Router -------- #
+
+class LLMRouter:
+    """Sends each request to the fastest healthy provider that fits the deadline, failing over in order."""
+
+    def __init__(self, providers):
+        self.providers = providers
+
+    def ranked(self, remaining):
+        if remaining < MIN_ATTEMPT_SECONDS:
+            return []
+        now = time.monotonic()
+        healthy = [p for p in self.providers if p.healthy(now)]
+        # Only providers expected to answer in time; an untried one is always worth a shot.
+        fitting = [p for p in healthy if p.latency is None or p.latency < remaining]
+        return sorted(fitting, key=Provider.expected_latency)
+
+    def route(self, call, deadline):
+        """call(provider, deadline, last) -> text. Raises NoProviderAvailable when every candidate fails."""
+        candidates = self.ranked(deadline - time.monotonic())
+        if not candidates:
+            raise NoProviderAvailable("no healthy provider fits the remaining time")
+        errors = []
+        for i, provider in enumerate(candidates):
+            if deadline - time.monotonic() < MIN_ATTEMPT_SECONDS:
+                break
+            started = time.monotonic()
+            try:
+                text = call(provider, deadline, i == len(candidates) - 1)
+            except Exception as e:
+                provider.record(time.monotonic() - started, ok=False)
+                errors.append(f"{provider.name}: {e}")
+                print(f"⚠️ LLM provider {provider.name} failed: {e}")
+                continue
+            provider.record(time.monotonic() - started, ok=True)
+            print(f"🧭 LLM routed to {provider.name}: " + json.dumps({p.name: p.as_dict() for p in self.providers}))
+            return text
+        raise NoProviderAvailable("; ".join(errors) or "deadline passed before any provider answered")
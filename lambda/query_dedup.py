@@ -0,0 +1,207 @@
+import json
+import random
+import re
+import time
+import zlib
+from array import array
+
+from cost_cache import QUERY_INDEX_KEY
+
+# 8 bands x 4 rows: pairs at Jaccard 0.7 share a band ~89% of the time, at 0.3 ~6%.
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SIMILARITY = 0.75
+CAPACITY = 128
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(NUM_PERM)]
+
+# -------- Features -------- #
+
+# Phrasings of the same intent collapse onto one token, so "why so expensive",
+# "what's driving cost" and "biggest cost?" all become {driver, cost}.
+CANONICAL = {
+    **dict.fromkeys('cost costs expensive pricey spend spending spent bill billing money charges'.split(), 'cost'),
+    **dict.fromkeys('why driving drives driver drivers biggest largest top main most highest'.split(), 'driver'),
+    **dict.fromkeys('increase increased increasing up jump jumped spike spiked higher grew rising rise'.split(), 'increase'),
+    **dict.fromkeys('reduce cut lower save saving savings optimize optimise cheaper'.split(), 'save'),
+    **dict.fromkeys('idle unused waste wasted orphaned unattached'.split(), 'waste'),
+    **dict.fromkeys('compute instance instances ec2'.split(), 'ec2'),
+    **dict.fromkeys('bucket buckets storage s3'.split(), 's3'),
+    **dict.fromkeys('database databases db rds aurora'.split(), 'rds'),
+}
+STOPWORDS = set("""
+a an the my our me is are was were be so of for in on at to do does did we i it its it's what what's whats
+how this that these those there please pls can could you show tell give about much many any some our us go
+""".split())
+
+
+def features(text):
+    """Canonical intent tokens, plus character trigrams of words outside the vocabulary (typos still overlap)."""
+    out = set()
+    for word in re.findall(r"[a-z0-9']+", (text or '').lower()):
+        if word in STOPWORDS:
+            continue
+        token = CANONICAL.get(word) or CANONICAL.get(word.rstrip('s'))
+        if token:
+            out.add(token)
+        else:
+            out.add(word)
+            padded = f" {word} "
+            out.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return out
+
+
+def signature(feats):
+    """MinHash signature (NUM_PERM 32-bit values) of a feature set; None for an empty set."""
+    if not feats:
+        return None
+    hashes = [zlib.crc32(f.encode('utf-8')) for f in feats]
+    return array('I', [min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF for a, b in PERMUTATIONS])
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity: fraction of equal MinHash positions."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+# -------- Index -------- #
+
+class QueryIndex:
+    """Ring buffer of recent queries with an LSH band index.
+
+    Each slot holds a MinHash signature, the hash of the cost snapshot it was
+    answered on, and the response-cache key of its answer.
+    """
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.signatures = []
+        self.snapshots = []
+        self.responses = []
+        self.next_slot = 0
+        self.buckets = {}
+
+    def _bands(self, sig):
+        return [(band, tuple(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+    def add(self, sig, snapshot_key, response_key):
+        slot = self.next_slot
+        if slot < len(self.signatures):
+            for band in self._bands(self.signatures[slot]):
+                bucket = self.buckets.get(band)
+                if bucket:
+                    bucket.discard(slot)
+            self.signatures[slot], self.snapshots[slot], self.responses[slot] = sig, snapshot_key, response_key
+        else:
+            self.signatures.append(sig)
+            self.snapshots.append(snapshot_key)
+            self.responses.append(response_key)
+        for band in self._bands(sig):
+            self.buckets.setdefault(band, set()).add(slot)
+        self.next_slot = (slot + 1) % self.capacity
+
+    def find(self, sig, snapshot_key, threshold=SIMILARITY):
+        """Response key of the most similar earlier query answered on the same snapshot, or None."""
+        candidates = set()
+        for band in self._bands(sig):
+            candidates.update(self.buckets.get(band, ()))
+        best, best_score = None, threshold
+        for slot in candidates:
+            if self.snapshots[slot] != snapshot_key:
+                continue
+            score = similarity(sig, self.signatures[slot])
+            if score >= best_score:
+                best, best_score = self.responses[slot], score
+        return best
+
+    def to_state(self):
+        """One zlib blob: JSON header (slot metadata) + the raw signature array."""
+        header = json.dumps({
+            'snapshots': self.snapshots,
+            'responses': self.responses,
+            'next_slot': self.next_slot
+        }).encode()
+        sigs = array('I')
+        for sig in self.signatures:
+            sigs.extend(sig)
+        return zlib.compress(len(header).to_bytes(4, 'big') + header + sigs.tobytes())
+
+    @classmethod
+    def from_state(cls, state, capacity=CAPACITY):
+        index = cls(capacity)
+        blob = zlib.decompress(bytes(state))
+        size = int.from_bytes(blob[:4], 'big')
+        header = json.loads(blob[4:4 + size])
+        sigs = array('I')
+        sigs.frombytes(blob[4 + size:])
+        for i, (snapshot_key, response_key) in enumerate(zip(header['snapshots'], header['responses'])):
+            index.add(sigs[i * NUM_PERM:(i + 1) * NUM_PERM], snapshot_key, response_key)
+        index.next_slot = header['next_slot'] % capacity
+        return index
+
+# -------- Stores -------- #
+
+class DynamoQueryIndexStore:
+    def __init__(self, table):
+        self.table = table
+
+    def load(self, account_id):
+        item = self.table.get_item(Key={'account_id': account_id, 'day': QUERY_INDEX_KEY}).get('Item')
+        return QueryIndex.from_state(item['state']) if item else QueryIndex()
+
+    def save(self, account_id, index):
+        self.table.put_item(Item={'account_id': account_id, 'day': QUERY_INDEX_KEY, 'state': index.to_state()})
+
+
+class InMemoryQueryIndexStore:
+    def __init__(self):
+        self.items = {}
+
+    def load(self, account_id):
+        return QueryIndex.from_state(self.items[account_id]) if account_id in self.items else QueryIndex()
+
+    def save(self, account_id, index):
+        self.items[account_id] = index.to_state()
+
+# -------- Detector -------- #
+
+class NearDuplicateDetector:
+    """Per-account QueryIndex, loaded once per container and written back on every add."""
+
+    def __init__(self, store, threshold=SIMILARITY):
+        self.store = store
+        self.threshold = threshold
+        self.accounts = {}
+
+    def _index(self, account_id):
+        index = self.accounts.get(account_id)
+        if index is None:
+            try:
+                index = self.store.load(account_id)
+            except Exception as e:
+                print(f"⚠️ Query Index Read Error: {e}")
+                index = QueryIndex()
+            self.accounts[account_id] = index
+        return index
+
+    def find(self, account_id, query, snapshot_key):
+        index = self._index(account_id)
+        started = time.perf_counter()
+        sig = signature(features(query))
+        match = index.find(sig, snapshot_key, self.threshold) if sig is not None else None
+        print(f"🔁 Near-duplicate lookup: {'match' if match else 'none'} in "
+              f"{(time.perf_counter() - started) * 1e6:.0f} µs ({len(index.signatures)} recent queries)")
+        return match
+
+    def add(self, account_id, query, snapshot_key, response_key):
+        sig = signature(features(query))
+        if sig is None:
+            return
+        index = self._index(account_id)
+        index.add(sig, snapshot_key, response_key)
+        try:
+            self.store.save(account_id, index)
+        except Exception as e:
+            print(f"⚠️ Query Index Write Error: {e}")
@@ -0,0 +1,153 @@
+import re
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+
+from ce_ingest import iter_cost_pages, iter_cost_rows
+from cost_series import CostSeries
+
+# Rough number of groups Cost Explorer returns per page, used to estimate call counts.
+CE_PAGE_GROUPS = 1000
+DEFAULT_GROUPS = 50
+
+Segment = namedtuple('Segment', ['start', 'end', 'granularity'])
+QueryPlan = namedtuple('QueryPlan', ['name', 'start', 'end', 'segments', 'group_by'])
+
+SERVICE_GROUP_BY = [{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
+
+# -------- Question Classification -------- #
+
+TODAY_WORDS = ('today', 'so far', 'this morning', 'right now')
+TOTAL_WORDS = ('total', 'how much', 'overall', 'sum')
+
+def _words(phrases):
+    # Whole words only: "sum" must not match "summary".
+    return re.compile(r'\b(?:' + '|'.join(map(re.escape, phrases)) + r')\b')
+
+_TODAY = _words(TODAY_WORDS)
+_TOTAL = _words(TOTAL_WORDS)
+_BY = _words(('by', 'per'))
+
+def classify_question(query):
+    """'today' | 'total' | 'breakdown' from the free-text part of /costbot."""
+    text = (query or '').lower()
+    if _TODAY.search(text):
+        return 'today'
+    if _TOTAL.search(text) and not _BY.search(text):
+        return 'total'
+    return 'breakdown'
+
+# -------- Planning -------- #
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+def split_months(start, end):
+    """[start, end) -> (leading DAILY edge, full months, trailing DAILY edge) as Segments."""
+    first_full = start if start.day == 1 else _next_month(start)
+    last_full = end.replace(day=1)
+    if first_full >= last_full:
+        return [Segment(start, end, 'DAILY')]
+    segments = []
+    if start < first_full:
+        segments.append(Segment(start, first_full, 'DAILY'))
+    segments.append(Segment(first_full, last_full, 'MONTHLY'))
+    if last_full < end:
+        segments.append(Segment(last_full, end, 'DAILY'))
+    return segments
+
+def _periods(segment):
+    if segment.granularity == 'MONTHLY':
+        months, day = 0, segment.start
+        while day < segment.end:
+            months, day = months + 1, _next_month(day)
+        return months
+    return (segment.end - segment.start).days
+
+def estimate_calls(segments, groups):
+    """Estimated CE requests (each one billed) including pagination."""
+    calls = 0
+    for segment in segments:
+        rows = _periods(segment) * max(groups, 1)
+        calls += max(1, -(-rows // CE_PAGE_GROUPS))
+    return calls
+
+def plan_query(start, end, question='breakdown', use_cache=True, groups=DEFAULT_GROUPS, today=None, now=None):
+    """Pick the cheapest Cost Explorer plan for the window and question type."""
+    now = now or datetime.now(timezone.utc)
+    today = today or now.date()
+
+    if question == 'today':
+        day = today
+        if now.hour == 0:
+            # No finished UTC hour yet, so today's HOURLY window is empty: show yesterday instead.
+            day = today - timedelta(days=1)
+        return QueryPlan('hourly-today', day, day + timedelta(days=1),
+                         [Segment(day, day + timedelta(days=1), 'HOURLY')], SERVICE_GROUP_BY)
+
+    group_by = [] if question == 'total' else SERVICE_GROUP_BY
+    if group_by and use_cache:
+        # The per-account cache already stores DAILY x SERVICE; after the first
+        # call this plan costs at most the restatement window.
+        return QueryPlan('daily-cached', start, end, [Segment(start, end, 'DAILY')], group_by)
+
+    groups = groups if group_by else 1
+    daily = [Segment(start, end, 'DAILY')]
+    mixed = split_months(start, end)
+    daily_cost = (estimate_calls(daily, groups), _periods(daily[0]))
+    mixed_cost = (estimate_calls(mixed, groups), sum(_periods(s) for s in mixed))
+    if len(mixed) > 1 and mixed_cost < daily_cost:
+        name = 'monthly+daily-edges' if group_by else 'totals-monthly+daily-edges'
+        return QueryPlan(name, start, end, mixed, group_by)
+    return QueryPlan('daily' if group_by else 'totals-daily', start, end, daily, group_by)
+
+# -------- Execution -------- #
+
+def _time_period(segment, now=None):
+    if segment.granularity != 'HOURLY':
+        return {'Start': segment.start.isoformat(), 'End': segment.end.isoformat()}
+    now = (now or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    end = min(now, datetime(segment.end.year, segment.end.month, segment.end.day, tzinfo=timezone.utc))
+    return {'Start': f"{segment.start.isoformat()}T00:00:00Z", 'End': end.strftime('%Y-%m-%dT%H:%M:%SZ')}
+
+def run_plan(ce_client, plan):
+    """Execute a non-cached plan into a CostSeries.
+
+    MONTHLY rows land on the first day of their month, so window totals are exact
+    but per-day values inside those months are not.
+    """
+    series = CostSeries(plan.start, (plan.end - plan.start).days)
+    rows = 0
+    for segment in plan.segments:
+        try:
+            segment_rows = _fetch_segment(ce_client, segment, plan.group_by)
+        except Exception as e:
+            if segment.granularity != 'HOURLY':
+                raise
+            # HOURLY needs the Cost Explorer hourly opt-in; without it, DAILY still answers.
+            print(f"⚠️ Hourly CE data unavailable, re-planning as DAILY: {e}")
+            segment = segment._replace(granularity='DAILY')
+            segment_rows = _fetch_segment(ce_client, segment, plan.group_by)
+        for row in segment_rows:
+            day = date.fromisoformat(row[0][:10])
+            key = row[1] if plan.group_by else 'Total'
+            series.add(key, day, row[-1])
+            rows += 1
+    log_plan(plan, rows)
+    return series
+
+def _fetch_segment(ce_client, segment, group_by):
+    """All rows for one segment, read fully so a failed segment adds nothing to the series."""
+    request = {
+        'TimePeriod': _time_period(segment),
+        'Granularity': segment.granularity,
+        'Metrics': ['UnblendedCost']
+    }
+    if request['TimePeriod']['Start'] >= request['TimePeriod']['End']:
+        return []
+    if group_by:
+        request['GroupBy'] = group_by
+    return list(iter_cost_rows(iter_cost_pages(ce_client, **request)))
+
+def log_plan(plan, rows):
+    segments = ', '.join(f"{s.granularity}[{s.start}..{s.end})" for s in plan.segments)
+    print(f"🧭 CE plan: {plan.name} segments={segments} rows={rows}")
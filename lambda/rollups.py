@@ -0,0 +1,201 @@
+from array import array
+from datetime import date, timedelta
+
+from cost_series import to_micros, to_dollars
+
+# Enough for 'this month vs last month' plus a 30-day window.
+HISTORY_DAYS = 70
+INITIAL_CAPACITY = 512
+
+# -------- Fenwick Index -------- #
+
+class FenwickTree:
+    """Prefix sums over int64 day values; point update and range sum in O(log n)."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.tree = array('q', bytes(8 * (capacity + 1)))
+
+    @classmethod
+    def build(cls, values, capacity):
+        tree = cls(capacity)
+        t = tree.tree
+        for i, v in enumerate(values, 1):
+            t[i] += v
+            parent = i + (i & -i)
+            if parent <= capacity:
+                t[parent] += t[i]
+        return tree
+
+    def add(self, index, delta):
+        i = index + 1
+        t = self.tree
+        while i <= self.capacity:
+            t[i] += delta
+            i += i & -i
+
+    def prefix(self, stop):
+        """Sum of [0, stop)."""
+        total = 0
+        i = min(stop, self.capacity)
+        t = self.tree
+        while i > 0:
+            total += t[i]
+            i -= i & -i
+        return total
+
+    def range(self, start, stop):
+        return self.prefix(stop) - self.prefix(start)
+
+# -------- Rollups -------- #
+
+def iso_week(day):
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class CostRollups:
+    """Daily, ISO-week and calendar-month aggregates per service.
+
+    Days are set (not added), so restated days just apply the delta; any window
+    is answered from the Fenwick index instead of re-summing raw days.
+    """
+
+    def __init__(self, origin, capacity=INITIAL_CAPACITY):
+        self.origin = origin
+        self.capacity = capacity
+        self.services = []
+        self.index = {}
+        self.daily = []
+        self.trees = []
+        self.weeks = {}
+        self.months = {}
+        self.loaded_through = None
+
+    def _sid(self, service):
+        sid = self.index.get(service)
+        if sid is None:
+            sid = len(self.services)
+            self.index[service] = sid
+            self.services.append(service)
+            self.daily.append(array('q', bytes(8 * self.capacity)))
+            self.trees.append(FenwickTree(self.capacity))
+        return sid
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity <= needed:
+            capacity *= 2
+        for sid, row in enumerate(self.daily):
+            row.extend(array('q', bytes(8 * (capacity - self.capacity))))
+            self.trees[sid] = FenwickTree.build(row, capacity)
+        self.capacity = capacity
+
+    def set_day(self, service, day, micros):
+        offset = (day - self.origin).days
+        if offset < 0:
+            return
+        if offset >= self.capacity:
+            self._grow(offset)
+        sid = self._sid(service)
+        delta = micros - self.daily[sid][offset]
+        if not delta:
+            return
+        self.daily[sid][offset] = micros
+        self.trees[sid].add(offset, delta)
+        week_key = (sid, iso_week(day))
+        month_key = (sid, day.strftime('%Y-%m'))
+        self.weeks[week_key] = self.weeks.get(week_key, 0) + delta
+        self.months[month_key] = self.months.get(month_key, 0) + delta
+
+    def load_daily_costs(self, daily_costs):
+        """Apply {'YYYY-MM-DD': {service: amount_str}} (the cost cache format)."""
+        for day_str, costs in daily_costs.items():
+            day = date.fromisoformat(day_str)
+            seen = set()
+            for service, amount in costs.items():
+                self.set_day(service, day, to_micros(amount))
+                seen.add(service)
+            # A service that disappeared from a restated day drops to 0.
+            offset = (day - self.origin).days
+            for sid, service in enumerate(self.services):
+                if service not in seen and 0 <= offset < self.capacity and self.daily[sid][offset]:
+                    self.set_day(service, day, 0)
+            if self.loaded_through is None or day > self.loaded_through:
+                self.loaded_through = day
+
+    # -------- Queries -------- #
+
+    def window(self, start, end):
+        """{service: micros} over [start, end) using O(log n) lookups per service."""
+        a = max((start - self.origin).days, 0)
+        b = max((end - self.origin).days, 0)
+        result = {}
+        for sid, tree in enumerate(self.trees):
+            value = tree.range(a, b)
+            if value:
+                result[self.services[sid]] = value
+        return result
+
+    def total(self, start, end):
+        return sum(self.window(start, end).values())
+
+    def week(self, week_key):
+        return {self.services[sid]: v for (sid, key), v in self.weeks.items() if key == week_key and v}
+
+    def month(self, month_key):
+        return {self.services[sid]: v for (sid, key), v in self.months.items() if key == month_key and v}
+
+    def comparisons(self, today):
+        """Headline window comparisons in dollars (finished days only)."""
+        month_start = today.replace(day=1)
+        prev_month_start = (month_start - timedelta(days=1)).replace(day=1)
+        elapsed = (today - month_start).days
+        return {
+            'last_7': to_dollars(self.total(today - timedelta(days=7), today)),
+            'prev_7': to_dollars(self.total(today - timedelta(days=14), today - timedelta(days=7))),
+            'last_30': to_dollars(self.total(today - timedelta(days=30), today)),
+            'this_month': to_dollars(self.total(month_start, today)),
+            'last_month_same_days': to_dollars(self.total(prev_month_start, prev_month_start + timedelta(days=elapsed))),
+            'last_month': to_dollars(sum(self.month(prev_month_start.strftime('%Y-%m')).values()))
+        }
+
+
+def format_comparisons(c):
+    if not c:
+        return ""
+    return (f"Last 7d ${c['last_7']:.2f} vs prior 7d ${c['prev_7']:.2f}; "
+            f"month-to-date ${c['this_month']:.2f} vs same days last month ${c['last_month_same_days']:.2f} "
+            f"(last month total ${c['last_month']:.2f})")
+
+# -------- Per-container Registry -------- #
+
+class RollupRegistry:
+    """One CostRollups per account, kept warm across invocations and topped up from the cost cache."""
+
+    def __init__(self, cost_cache, restatement_days=2, history_days=HISTORY_DAYS):
+        self.cost_cache = cost_cache
+        self.restatement_days = restatement_days
+        self.history_days = history_days
+        self.accounts = {}
+
+    def get(self, account_id, today=None, load=True):
+        """Rollups topped up through yesterday; with load=False only ones already topped up (else None)."""
+        today = today or date.today()
+        rollups = self.accounts.get(account_id)
+        if not load:
+            current = rollups is not None and rollups.loaded_through is not None
+            return rollups if current and rollups.loaded_through >= today - timedelta(days=1) else None
+        if rollups is None:
+            rollups = CostRollups(today - timedelta(days=self.history_days))
+            self.accounts[account_id] = rollups
+        if rollups.loaded_through is None:
+            start = rollups.origin
+        elif rollups.loaded_through >= today - timedelta(days=1):
+            # Already topped up today; restated days are refreshed with the next new day.
+            return rollups
+        else:
+            start = rollups.loaded_through + timedelta(days=1) - timedelta(days=self.restatement_days)
+        if start < today:
+            rollups.load_daily_costs(self.cost_cache.get_daily_costs(account_id, start, today, today=today))
+        return rollups
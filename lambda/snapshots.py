@@ -0,0 +1,87 @@
+import json
+import time
+from datetime import datetime, timezone
+
+from cost_cache import SNAPSHOT_PREFIX
+
+# Windows pre-computed by the scheduled run ("/costbot" and "/costbot 30").
+SNAPSHOT_WINDOWS = (7, 30)
+DEFAULT_QUERY = "General"
+MAX_AGE_SECONDS = 12 * 3600
+
+# -------- Stores -------- #
+
+class DynamoSnapshotStore:
+    def __init__(self, table):
+        self.table = table
+
+    def load(self, account_id, days):
+        item = self.table.get_item(Key={'account_id': account_id, 'day': f"{SNAPSHOT_PREFIX}{days}"}).get('Item')
+        return json.loads(item['snapshot']) if item else None
+
+    def save(self, account_id, days, snapshot):
+        self.table.put_item(Item={
+            'account_id': account_id,
+            'day': f"{SNAPSHOT_PREFIX}{days}",
+            'snapshot': json.dumps(snapshot)
+        })
+
+
+class InMemorySnapshotStore:
+    def __init__(self):
+        self.items = {}
+
+    def load(self, account_id, days):
+        return self.items.get((account_id, days))
+
+    def save(self, account_id, days, snapshot):
+        self.items[(account_id, days)] = snapshot
+
+# -------- Snapshots -------- #
+
+def make_snapshot(days, query, summary, analysis, now=None, **extra):
+    """Freshness metadata + everything the interactive path needs to answer without recomputing."""
+    now = now or time.time()
+    return {
+        'days': days,
+        'query': query,
+        'computed_at': now,
+        'computed_on': datetime.fromtimestamp(now, timezone.utc).date().isoformat(),
+        'summary': summary,
+        'analysis': analysis,
+        **extra
+    }
+
+
+def is_fresh(snapshot, now=None, max_age=MAX_AGE_SECONDS):
+    """Fresh = computed today (UTC, so it covers the latest finished CE day) and younger than max_age."""
+    if not snapshot:
+        return False
+    now = now or time.time()
+    today = datetime.fromtimestamp(now, timezone.utc).date().isoformat()
+    return snapshot.get('computed_on') == today and now - snapshot.get('computed_at', 0) <= max_age
+
+
+def snapshot_age(snapshot, now=None):
+    return int((now or time.time()) - snapshot.get('computed_at', 0))
+
+
+class SnapshotStats:
+    """Per-container hit-rate counters for the interactive path."""
+
+    def __init__(self):
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def record(self, outcome):
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        served = self.hits + self.stale + self.misses
+        print(f"🗂️ Snapshot {outcome}: " + json.dumps({
+            'hits': self.hits,
+            'stale': self.stale,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'hit_rate': round(self.hits / served, 3) if served else 0.0
+        }))
@@ -0,0 +1,221 @@
+import json
+import time
+from array import array
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+
+from ce_ingest import iter_cost_pages, iter_cost_rows
+from cost_series import CostSeries, to_micros
+
+# Days of history kept in the index (covers "last month" and "last 60 days").
+HISTORY_DAYS = 70
+# Rebuild after this long even within the same day (late-arriving tagged usage).
+MAX_AGE_SECONDS = 6 * 3600
+# Cost Explorer allows at most two GroupBy entries, so keys are fetched in pairs.
+KEYS_PER_VIEW = 2
+MAX_TAG_KEYS = 6
+
+# -------- Views -------- #
+
+class TagView:
+    """One CostSeries whose rows are tag combinations ("team=payments&env=prod"),
+    plus an inverted index (key, value) -> row ids.
+
+    Every cost row appears exactly once in a view, so any filter over the view's
+    keys is an exact posting-list intersection followed by a row-window sum.
+    Keys and values are matched lowercased (/costbot text is normalized).
+    """
+
+    def __init__(self, series, keys=()):
+        self.series = series
+        self.names = {key.lower(): key for key in keys}
+        self.postings = {}
+        self.values = {}
+        for sid, combo in enumerate(series.services):
+            for pair in combo.split('&'):
+                name, sep, value = pair.partition('=')
+                if not sep or not value:
+                    continue
+                key, value = name.lower(), value.lower()
+                self.names.setdefault(key, name)
+                posting = self.postings.get((key, value))
+                if posting is None:
+                    posting = self.postings[(key, value)] = array('i')
+                    self.values.setdefault(key, []).append(value)
+                posting.append(sid)
+
+    def covers(self, keys):
+        return all(key in self.names for key in keys)
+
+    def rows(self, filters):
+        """Row ids matching every (key, value) filter; smallest posting list first."""
+        postings = sorted((self.postings.get(pair, ()) for pair in filters), key=len)
+        if not postings:
+            return range(len(self.series))
+        ids = set(postings[0])
+        for posting in postings[1:]:
+            if not ids:
+                break
+            ids.intersection_update(posting)
+        return sorted(ids)
+
+    def sum_rows(self, ids, a, b):
+        rows = self.series.rows
+        return sum(sum(rows[sid][a:b]) for sid in ids)
+
+# -------- Index -------- #
+
+class TagIndex:
+    """Tag views over [origin, origin + n_days); answers tag filters and per-value breakdowns locally."""
+
+    def __init__(self, origin, n_days, views, built_at=None):
+        self.origin = origin
+        self.n_days = n_days
+        self.views = views
+        self.built_at = built_at or time.time()
+
+    @property
+    def end(self):
+        return self.origin + timedelta(days=self.n_days)
+
+    def covers(self, start, end):
+        return self.origin <= start and end <= self.end
+
+    def view_for(self, keys):
+        matching = [view for view in self.views if view.covers(keys)]
+        return min(matching, key=lambda view: len(view.names)) if matching else None
+
+    def costs(self, start, end, filters, group_key=None):
+        """{label: micros} for the window, or None when no single view can answer it.
+
+        Without `group_key` the single label is the filter itself; with it, one
+        entry per value of that tag among the filtered rows.
+        """
+        keys = [key for key, _ in filters] + ([group_key] if group_key else [])
+        view = self.view_for(keys)
+        if view is None or not self.covers(start, end):
+            return None
+        a, b = (start - self.origin).days, (end - self.origin).days
+        ids = view.rows(filters)
+        if not group_key:
+            label = " & ".join(f"{view.names[key]}={value}" for key, value in filters) or "all"
+            return {label: view.sum_rows(ids, a, b)}
+        selected = set(ids) if filters else None
+        totals = {}
+        for value in view.values.get(group_key, []):
+            posting = view.postings[(group_key, value)]
+            matched = posting if selected is None else [sid for sid in posting if sid in selected]
+            micros = view.sum_rows(matched, a, b)
+            if micros:
+                totals[value] = micros
+        return totals
+
+    def original_key(self, key):
+        for view in self.views:
+            if key in view.names:
+                return view.names[key]
+        return key
+
+# -------- Builders -------- #
+
+def discover_tag_keys(ce_client, start, end, limit=MAX_TAG_KEYS):
+    """Active cost-allocation tag keys seen in the window (first `limit`)."""
+    response = ce_client.get_tags(TimePeriod={'Start': start.isoformat(), 'End': end.isoformat()})
+    return [key for key in response.get('Tags', []) if not key.startswith('aws:')][:limit]
+
+
+def fetch_tag_view(ce_client, keys, start, end):
+    """DAILY costs grouped by up to two tag keys -> TagView (CE reports tags as "key$value")."""
+    series = CostSeries(start, (end - start).days)
+    pages = iter_cost_pages(
+        ce_client,
+        TimePeriod={'Start': start.isoformat(), 'End': end.isoformat()},
+        Granularity='DAILY',
+        Metrics=['UnblendedCost'],
+        GroupBy=[{'Type': 'TAG', 'Key': key} for key in keys]
+    )
+    offsets = {}
+    for day_str, *tags, amount in iter_cost_rows(pages):
+        micros = to_micros(amount)
+        if not micros:
+            continue
+        offset = offsets.get(day_str)
+        if offset is None:
+            offset = offsets[day_str] = (date.fromisoformat(day_str) - start).days
+        if not 0 <= offset < series.n_days:
+            continue
+        combo = "&".join(f"{key}={value}" for key, _, value in (tag.partition('$') for tag in tags) if value)
+        series.row(combo)[offset] += micros
+    return TagView(series, keys)
+
+
+def build_tag_index(ce_client, start, end, keys=None):
+    """One CE query set per pair of tag keys; intersections within a pair are answered exactly."""
+    keys = keys or discover_tag_keys(ce_client, start, end)
+    views = [fetch_tag_view(ce_client, keys[i:i + KEYS_PER_VIEW], start, end)
+             for i in range(0, len(keys), KEYS_PER_VIEW)]
+    return TagIndex(start, (end - start).days, views)
+
+
+def index_from_cur(series):
+    """Single view over CUR tag combinations (every tag key of a line item, so any intersection works)."""
+    return TagIndex(series.start, series.n_days, [TagView(series)])
+
+# -------- Registry -------- #
+
+class TagIndexRegistry:
+    """One TagIndex per account, rebuilt when it is from a previous UTC day or older than max_age.
+
+    `load(account_id, start, end)` builds a fresh index; a failed rebuild keeps
+    serving the previous one.
+    """
+
+    def __init__(self, load, history_days=HISTORY_DAYS, max_age=MAX_AGE_SECONDS):
+        self.load = load
+        self.history_days = history_days
+        self.max_age = max_age
+        self.accounts = {}
+        self.rebuilds = 0
+
+    def is_stale(self, index, now=None):
+        now = now or time.time()
+        built_on = datetime.fromtimestamp(index.built_at, timezone.utc).date()
+        return built_on != datetime.fromtimestamp(now, timezone.utc).date() or now - index.built_at > self.max_age
+
+    def get(self, account_id, now=None, build=True):
+        """Current index; with build=False only a fresh, already-built one (else None)."""
+        index = self.accounts.get(account_id)
+        if index is not None and not self.is_stale(index, now):
+            return index
+        if not build:
+            return None
+        today = datetime.fromtimestamp(now or time.time(), timezone.utc).date()
+        started = time.perf_counter()
+        try:
+            index = self.accounts[account_id] = self.load(account_id, today - timedelta(days=self.history_days), today)
+            self.rebuilds += 1
+            print(f"🏷️ Tag index built: {sum(len(v.series) for v in index.views)} combinations in "
+                  f"{len(index.views)} views ({time.perf_counter() - started:.2f}s)")
+        except Exception as e:
+            print(f"⚠️ Tag Index Error: {e}")
+        return index
+
+# -------- Metrics -------- #
+
+class TagQueryStats:
+    """Per-container tag query latency (microseconds) by source: 'index' or 'ce' fallback."""
+
+    def __init__(self, window=256):
+        self.latencies = {'index': deque(maxlen=window), 'ce': deque(maxlen=window)}
+
+    def record(self, source, seconds):
+        samples = self.latencies[source]
+        samples.append(round(seconds * 1e6))
+        ordered = sorted(samples)
+        print(f"🏷️ Tag query ({source}): " + json.dumps({
+            'us': samples[-1],
+            'count': len(ordered),
+            'p50_us': ordered[len(ordered) // 2],
+            'p95_us': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            'max_us': ordered[-1]
+        }))
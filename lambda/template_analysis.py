@@ -0,0 +1,63 @@
+import json
+import textwrap
+
+from cost_series import to_dollars
+from prompt_budget import round_amount, trend_summary
+
+# Below this window total an LLM has nothing to add to the numbers.
+SMALL_SPEND_DOLLARS = 1.0
+# Same three sections the LLM is asked for, built from the numbers alone.
+SAFETY_NOTE = ("Rule-based suggestion: check the resource is not serving production traffic "
+               "and run `terraform plan` before applying.")
+
+# -------- Rules -------- #
+
+def answerable_by_rules(series, threshold=SMALL_SPEND_DOLLARS):
+    """True when the window's spend is under `threshold` dollars (and the cost data actually loaded)."""
+    return not getattr(series, 'error', None) and to_dollars(series.total()) < threshold
+
+
+def template_analysis(series, hint, days):
+    """Analysis / Terraform Fix / Safety markdown from the cost series and KB hint alone.
+
+    Serves tiny bills directly and stands in when no LLM provider answers in time.
+    """
+    total = series.total()
+    top = series.top_k(3)
+    if not top or total <= 0:
+        return f"- **Analysis:** No spend recorded in the last {days} days.\n- **Safety:** Nothing to change."
+
+    driver, micros = top[0]
+    lines = [f"- **Analysis:** {driver} is the main cost driver at ${round_amount(to_dollars(micros))} "
+             f"({micros / total:.0%} of ${round_amount(to_dollars(total))} over {days} days)."]
+    if len(top) > 1:
+        lines.append("  Next: " + ", ".join(f"{s} ${round_amount(to_dollars(m))}" for s, m in top[1:]) + ".")
+    trend = trend_summary(series)
+    if trend:
+        lines.append(f"  Daily trend: {trend}.")
+
+    snippet = textwrap.dedent(hint or '').strip()
+    if snippet and not snippet.startswith("No specific"):
+        lines.append(f"- **Terraform Fix:**\n```hcl\n{snippet}\n```")
+    else:
+        lines.append(f"- **Terraform Fix:** No template for {driver}; review its usage in the console.")
+    lines.append(f"- **Safety:** {SAFETY_NOTE}")
+    return "\n".join(lines)
+
+# -------- Stats -------- #
+
+class AnswerStats:
+    """Per-container counts of where answers came from; every source but 'llm' skipped the model."""
+
+    SOURCES = ('compiled', 'rules', 'snapshot', 'cache', 'llm', 'fallback')
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.SOURCES, 0)
+
+    def record(self, source):
+        self.counts[source] += 1
+        served = sum(self.counts.values())
+        print(f"🧮 Answer from {source}: " + json.dumps({
+            **self.counts,
+            'without_llm_ratio': round(1 - self.counts['llm'] / served, 3)
+        }))
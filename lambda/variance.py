@@ -0,0 +1,129 @@
+import heapq
+import operator
+from array import array
+
+from ce_ingest import iter_cost_pages
+from cost_series import to_dollars, to_micros
+
+VARIANCE_WORDS = ('why', 'go up', 'went up', 'increase', 'jump', 'spike', 'driver', 'driving', 'grew', 'higher', 'change')
+TOP_DRIVERS = 8
+
+def is_variance_question(query):
+    text = (query or '').lower()
+    return any(word in text for word in VARIANCE_WORDS)
+
+# -------- Attribution -------- #
+
+def attribute(keys, current, previous, current_qty=None, previous_qty=None, k=TOP_DRIVERS):
+    """Rank the keys that explain current - previous (int64 micro-dollar arrays aligned with `keys`).
+
+    The whole-array work (deltas, |deltas|, price/volume split) runs through map()
+    over arrays; only the top-k drivers are turned into Python dicts. With usage
+    quantities, each delta splits into volume = (q1 - q0) * p0 and price = (p1 - p0) * q1.
+    """
+    delta = array('q', map(operator.sub, current, previous))
+    magnitude = array('q', map(abs, delta))
+    top = heapq.nlargest(k, range(len(delta)), key=magnitude.__getitem__)
+
+    volume = price = None
+    if current_qty is not None and previous_qty is not None:
+        unit_prev = list(map(_unit_price, previous, previous_qty))
+        unit_cur = list(map(_unit_price, current, current_qty))
+        volume = list(map(lambda q1, q0, p0: (q1 - q0) * p0, current_qty, previous_qty, unit_prev))
+        price = list(map(lambda p1, p0, q1: (p1 - p0) * q1, unit_cur, unit_prev, current_qty))
+
+    drivers = []
+    for i in top:
+        if not delta[i]:
+            break
+        driver = {
+            'key': keys[i],
+            'previous': to_dollars(previous[i]),
+            'current': to_dollars(current[i]),
+            'delta': to_dollars(delta[i])
+        }
+        if volume is not None and previous_qty[i] and current_qty[i]:
+            driver['volume'] = round(to_dollars(volume[i]), 2)
+            driver['price'] = round(to_dollars(price[i]), 2)
+        drivers.append(driver)
+    return {
+        'previous': to_dollars(sum(previous)),
+        'current': to_dollars(sum(current)),
+        'delta': to_dollars(sum(delta)),
+        'drivers': drivers
+    }
+
+
+def _unit_price(cost, qty):
+    return cost / qty if qty else 0.0
+
+
+def attribute_series(series, length, k=TOP_DRIVERS):
+    """Last `length` days vs the `length` days before, per series key (e.g. SERVICE)."""
+    current, previous = series.period_over_period(length)
+    return attribute(series.services, current, previous, k=k)
+
+
+def attribute_windows(current, previous, k=TOP_DRIVERS):
+    """Two CostSeries (current window, previous window) compared per key; their rows may differ in order."""
+    keys = list(current.services) + [key for key in previous.services if key not in current.index]
+
+    def aligned(series):
+        totals = series.totals()
+        return array('q', (totals[series.index[key]] if key in series.index else 0 for key in keys))
+
+    return attribute(keys, aligned(current), aligned(previous), k=k)
+
+# -------- Usage-type Windows from Cost Explorer -------- #
+
+def fetch_window_metrics(ce_client, windows, dimension='USAGE_TYPE', service=None):
+    """One MONTHLY query per window -> (keys, [cost arrays], [quantity arrays]), all aligned by key."""
+    index = {}
+    keys = []
+    costs = [array('q') for _ in windows]
+    quantities = [array('d') for _ in windows]
+
+    for w, (start, end) in enumerate(windows):
+        request = {
+            'TimePeriod': {'Start': start.isoformat(), 'End': end.isoformat()},
+            'Granularity': 'MONTHLY',
+            'Metrics': ['UnblendedCost', 'UsageQuantity'],
+            'GroupBy': [{'Type': 'DIMENSION', 'Key': dimension}]
+        }
+        if service:
+            request['Filter'] = {'Dimensions': {'Key': 'SERVICE', 'Values': [service]}}
+        for page in iter_cost_pages(ce_client, **request):
+            for result in page.get('ResultsByTime', []):
+                for group in result.get('Groups', []):
+                    key = group['Keys'][0]
+                    i = index.get(key)
+                    if i is None:
+                        i = index[key] = len(keys)
+                        keys.append(key)
+                        for c, q in zip(costs, quantities):
+                            c.append(0)
+                            q.append(0.0)
+                    metrics = group['Metrics']
+                    costs[w][i] += to_micros(metrics['UnblendedCost']['Amount'])
+                    quantities[w][i] += float(metrics.get('UsageQuantity', {}).get('Amount', 0) or 0)
+    return keys, costs, quantities
+
+
+def attribute_usage_types(ce_client, current_window, previous_window, service=None, k=TOP_DRIVERS):
+    keys, (cur, prev), (cur_qty, prev_qty) = fetch_window_metrics(
+        ce_client, [current_window, previous_window], 'USAGE_TYPE', service)
+    return attribute(keys, cur, prev, cur_qty, prev_qty, k=k)
+
+# -------- Formatting -------- #
+
+def format_drivers(report, label):
+    """Compact ranked driver lines for the prompt."""
+    if not report or not report['drivers']:
+        return ""
+    lines = [f"{label}: ${report['previous']:.2f} -> ${report['current']:.2f} ({report['delta']:+.2f})"]
+    for rank, d in enumerate(report['drivers'], 1):
+        line = f"{rank}. {d['key']} {d['delta']:+.2f} (${d['previous']:.2f} -> ${d['current']:.2f})"
+        if 'volume' in d:
+            line += f" [volume {d['volume']:+.2f}, price {d['price']:+.2f}]"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,173 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+MAX_WORKERS = 16
+CACHE_TTL_SECONDS = 15 * 60
+SNAPSHOT_MAX_AGE_DAYS = 90
+# NAT gateways moving less than this over the lookback are reported as idle.
+NAT_IDLE_BYTES = 1024 * 1024
+NAT_LOOKBACK_DAYS = 7
+
+# Rough monthly list prices (us-east-1) used to rank findings; not a bill.
+EBS_GB_MONTH = 0.08
+SNAPSHOT_GB_MONTH = 0.05
+EIP_MONTH = 3.65
+NAT_MONTH = 32.85
+
+# -------- Checks (one per region x API) -------- #
+
+def _paginate(client, operation, key, **kwargs):
+    for page in client.get_paginator(operation).paginate(**kwargs):
+        yield from page.get(key, [])
+
+
+def unattached_volumes(ec2, region, **_):
+    for vol in _paginate(ec2, 'describe_volumes', 'Volumes', Filters=[{'Name': 'status', 'Values': ['available']}]):
+        yield {
+            'type': 'unattached_ebs', 'region': region, 'id': vol['VolumeId'],
+            'detail': f"{vol['Size']} GiB {vol.get('VolumeType', '')}",
+            'monthly': round(vol['Size'] * EBS_GB_MONTH, 2)
+        }
+
+
+def idle_elastic_ips(ec2, region, **_):
+    for addr in ec2.describe_addresses().get('Addresses', []):
+        if not addr.get('AssociationId'):
+            yield {
+                'type': 'idle_eip', 'region': region, 'id': addr.get('AllocationId', addr.get('PublicIp')),
+                'detail': addr.get('PublicIp', ''), 'monthly': EIP_MONTH
+            }
+
+
+def stopped_instances(ec2, region, **_):
+    """Stopped instances still pay for their attached EBS volumes."""
+    filters = [{'Name': 'instance-state-name', 'Values': ['stopped']}]
+    for reservation in _paginate(ec2, 'describe_instances', 'Reservations', Filters=filters):
+        for inst in reservation.get('Instances', []):
+            volumes = [m['Ebs']['VolumeId'] for m in inst.get('BlockDeviceMappings', []) if 'Ebs' in m]
+            yield {
+                'type': 'stopped_instance', 'region': region, 'id': inst['InstanceId'],
+                'detail': f"{inst.get('InstanceType', '')}, {len(volumes)} EBS volume(s) still billed",
+                'monthly': None
+            }
+
+
+def idle_nat_gateways(ec2, region, cloudwatch=None, now=None, **_):
+    filters = [{'Name': 'state', 'Values': ['available']}]
+    for nat in _paginate(ec2, 'describe_nat_gateways', 'NatGateways', Filter=filters):
+        if cloudwatch is not None:
+            now = now or datetime.now(timezone.utc)
+            stats = cloudwatch.get_metric_statistics(
+                Namespace='AWS/NATGateway', MetricName='BytesOutToDestination',
+                Dimensions=[{'Name': 'NatGatewayId', 'Value': nat['NatGatewayId']}],
+                StartTime=now - timedelta(days=NAT_LOOKBACK_DAYS), EndTime=now,
+                Period=86400 * NAT_LOOKBACK_DAYS, Statistics=['Sum']
+            )
+            moved = sum(p['Sum'] for p in stats.get('Datapoints', []))
+            if moved >= NAT_IDLE_BYTES:
+                continue
+            detail = f"{moved / 1024:.0f} KiB out in {NAT_LOOKBACK_DAYS}d"
+        else:
+            detail = "traffic not checked"
+        yield {'type': 'idle_nat', 'region': region, 'id': nat['NatGatewayId'], 'detail': detail, 'monthly': NAT_MONTH}
+
+
+def old_snapshots(ec2, region, now=None, **_):
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=SNAPSHOT_MAX_AGE_DAYS)
+    for snap in _paginate(ec2, 'describe_snapshots', 'Snapshots', OwnerIds=['self']):
+        if snap['StartTime'] < cutoff:
+            yield {
+                'type': 'old_snapshot', 'region': region, 'id': snap['SnapshotId'],
+                'detail': f"{snap.get('VolumeSize', 0)} GiB, {(now - snap['StartTime']).days}d old",
+                'monthly': round(snap.get('VolumeSize', 0) * SNAPSHOT_GB_MONTH, 2)
+            }
+
+
+CHECKS = {
+    'unattached_ebs': unattached_volumes,
+    'idle_eip': idle_elastic_ips,
+    'stopped_instance': stopped_instances,
+    'idle_nat': idle_nat_gateways,
+    'old_snapshot': old_snapshots,
+}
+
+# -------- Scanner -------- #
+
+class WasteScanner:
+    """Runs every (region, check) pair on a bounded pool, caching each region's findings with a TTL.
+
+    `client_factory(service, region)` returns a boto3-style client; results and
+    clients are kept per container so warm invocations skip the API calls.
+    """
+
+    def __init__(self, client_factory, max_workers=MAX_WORKERS, ttl=CACHE_TTL_SECONDS):
+        self.client_factory = client_factory
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.cache = {}
+        self.clients = {}
+        self.lock = threading.Lock()
+
+    def _client(self, service, region):
+        key = (service, region)
+        with self.lock:
+            if key not in self.clients:
+                self.clients[key] = self.client_factory(service, region)
+            return self.clients[key]
+
+    def regions(self):
+        ec2 = self._client('ec2', None)
+        response = ec2.describe_regions(Filters=[{'Name': 'opt-in-status', 'Values': ['opt-in-not-required', 'opted-in']}])
+        return [r['RegionName'] for r in response.get('Regions', [])]
+
+    def _run_check(self, region, name):
+        kwargs = {'cloudwatch': self._client('cloudwatch', region)} if name == 'idle_nat' else {}
+        return list(CHECKS[name](self._client('ec2', region), region, **kwargs))
+
+    def scan(self, regions=None, checks=None, now=None):
+        """Returns (findings, errors); fresh cached regions are not re-scanned."""
+        now = now or time.time()
+        regions = regions or self.regions()
+        checks = checks or list(CHECKS)
+        findings = []
+        errors = []
+        stale = []
+        for region in regions:
+            cached = self.cache.get(region)
+            if cached and now - cached[0] < self.ttl:
+                findings.extend(cached[1])
+            else:
+                stale.append(region)
+
+        started = time.perf_counter()
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {(region, name): pool.submit(self._run_check, region, name)
+                           for region in stale for name in checks}
+                per_region = {region: [] for region in stale}
+                failed = set()
+                for (region, name), future in futures.items():
+                    try:
+                        per_region[region].extend(future.result())
+                    except Exception as e:
+                        errors.append(f"{region}/{name}: {e}")
+                        failed.add(region)
+                for region, items in per_region.items():
+                    if region not in failed:
+                        self.cache[region] = (now, items)
+                    findings.extend(items)
+        print(f"🧹 Waste scan: {len(regions)} regions ({len(stale)} scanned) "
+              f"{len(findings)} findings in {time.perf_counter() - started:.2f}s")
+        return findings, errors
+
+
+def summarize_findings(findings, limit=10):
+    """Compact text of the costliest findings for prompts."""
+    ranked = sorted(findings, key=lambda f: -(f['monthly'] or 0))[:limit]
+    lines = [f"{f['type']} {f['region']} {f['id']} ({f['detail']})" + (f" ~${f['monthly']:.2f}/mo" if f['monthly'] else "")
+             for f in ranked]
+    total = sum(f['monthly'] or 0 for f in findings)
+    return f"{len(findings)} idle resources, ~${total:.2f}/mo:\n" + "\n".join(lines) if findings else ""
@@ -27,6 +27,12 @@ resource "aws_lambda_function" "chatbot" {
       SLACK_SECRET_PATH     = "/costbot/slack_signing_secret"
 
       SNS_TOPIC_ARN         = aws_sns_topic.cost_alerts.arn
+      COST_CACHE_TABLE      = aws_dynamodb_table.cost_cache.name
+      CUR_URIS              = join(",", var.cur_s3_uris)
+      TAG_KEYS              = join(",", var.cost_allocation_tags)
+      LLM_CACHE_MAX_AGE     = var.llm_cache_max_age_seconds
+      LLM_PROVIDERS         = jsonencode(var.llm_providers)
+      RULES_SPEND_THRESHOLD = var.rules_spend_threshold
     }
   }
 }
@@ -66,6 +72,35 @@ resource "aws_dynamodb_table" "chat_history" {
     ]
   }
 }
+
+# Daily Cost Explorer results per account, so finalized days are never re-fetched.
+resource "aws_dynamodb_table" "cost_cache" {
+  name         = "cost-cache"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "account_id"
+  range_key    = "day"
+
+  attribute {
+    name = "account_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "day"
+    type = "S"
+  }
+
+  # Cached LLM responses ('llm#<hash>' items) expire on their own.
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Name = "cost-cache"
+  }
+}
+
 resource "aws_apigatewayv2_api" "chat_api" {
   name = "chatbot-api"
   protocol_type = "HTTP"
@@ -150,3 +185,23 @@ resource "aws_cloudwatch_metric_alarm" "high_usage_alarm" {
 }
 
 
+
+# Nightly pre-computation of cost snapshots (lambda_handler "Scheduled Event" case).
+resource "aws_cloudwatch_event_rule" "precompute" {
+  name                = "costbot-precompute"
+  description         = "Pre-compute CostBot snapshots during off-hours"
+  schedule_expression = "cron(0 5 * * ? *)"
+}
+
+resource "aws_cloudwatch_event_target" "precompute_lambda" {
+  rule = aws_cloudwatch_event_rule.precompute.name
+  arn  = aws_lambda_function.chatbot.arn
+}
+
+resource "aws_lambda_permission" "eventbridge_invoke" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.chatbot.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.precompute.arn
+}
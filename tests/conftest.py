@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The Lambda code and the benchmark stand-ins are plain script directories, not packages.
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda'))
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+from anomaly import AnomalyDetector, InMemoryAnomalyStore, format_anomalies, refresh_anomalies
+from cost_cache import CostCache, InMemoryCostStore
+
+TODAY = date(2025, 3, 15)
+NOW = 1_700_000_000.0
+
+
+class FakeFetch:
+    """fetch_fn stand-in: $10 of EC2 per day unless a day is overridden in spikes."""
+
+    def __init__(self):
+        self.spikes = {}
+
+    def __call__(self, start, end):
+        days = ((start + timedelta(days=i)).isoformat() for i in range((end - start).days))
+        return {day: {'EC2': str(self.spikes.get(day, 10.0))} for day in days}
+
+
+def make_refresh():
+    fetch = FakeFetch()
+    cache = CostCache(InMemoryCostStore(), fetch)
+    store = InMemoryAnomalyStore()
+    return store, cache, fetch
+
+
+def test_state_persists_and_loads_back():
+    store, cache, _ = make_refresh()
+    refresh_anomalies(store, cache, 'acct', today=TODAY, now=NOW)
+
+    detector, recent = store.load('acct')
+    assert detector.last_day == TODAY - timedelta(days=3)
+    assert detector.keys == ['EC2']
+    assert recent == []
+
+    reloaded = AnomalyDetector.from_state(detector.to_state())
+    assert reloaded.keys == detector.keys
+    assert list(reloaded.level) == list(detector.level)
+    assert list(reloaded.count) == list(detector.count)
+
+
+def test_next_run_only_feeds_new_days():
+    store, cache, _ = make_refresh()
+    refresh_anomalies(store, cache, 'acct', today=TODAY, now=NOW)
+    count = store.load('acct')[0].count[0]
+
+    refresh_anomalies(store, cache, 'acct', today=TODAY + timedelta(days=1), now=NOW + 86400)
+    detector, _ = store.load('acct')
+    assert detector.count[0] == count + 1
+    assert detector.last_day == TODAY - timedelta(days=2)
+
+
+def test_provisional_spike_is_flagged_but_not_learned():
+    store, cache, fetch = make_refresh()
+    yesterday = (TODAY - timedelta(days=1)).isoformat()
+    fetch.spikes[yesterday] = 40.0
+
+    anomalies = refresh_anomalies(store, cache, 'acct', today=TODAY, now=NOW)
+    assert [(a['day'], a['key'], a['provisional']) for a in anomalies] == [(yesterday, 'EC2', True)]
+    assert anomalies[0]['ratio'] == 4.0
+    assert "provisional" in format_anomalies(anomalies)
+
+    detector, recent = store.load('acct')
+    assert recent == []
+    assert detector.last_day < TODAY - timedelta(days=1)
+    assert round(detector.expected('EC2', TODAY.weekday()) / 1e6, 2) == 10.0
+
+
+def test_provisional_drop_is_not_flagged():
+    store, cache, fetch = make_refresh()
+    fetch.spikes[(TODAY - timedelta(days=1)).isoformat()] = 0.5
+
+    assert refresh_anomalies(store, cache, 'acct', today=TODAY, now=NOW) == []
@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+
+from cost_cache import CostCache, InMemoryCostStore, _missing_ranges
+
+TODAY = date(2025, 3, 15)
+NOW = 1_700_000_000.0
+
+
+class FakeFetch:
+    """fetch_fn stand-in: records each requested range and returns $1 of EC2 per day."""
+
+    def __init__(self):
+        self.ranges = []
+
+    def __call__(self, start, end):
+        self.ranges.append((start, end))
+        return {(start + timedelta(days=i)).isoformat(): {'EC2': '1.0'} for i in range((end - start).days)}
+
+
+def make_cache():
+    fetch = FakeFetch()
+    return CostCache(InMemoryCostStore(), fetch), fetch
+
+
+def test_finalized_days_are_served_from_the_store():
+    cache, fetch = make_cache()
+    start = TODAY - timedelta(days=10)
+    cache.get_daily_costs('acct', start, TODAY - timedelta(days=3), today=TODAY, now=NOW)
+    fetch.ranges.clear()
+
+    costs = cache.get_daily_costs('acct', start, TODAY - timedelta(days=3), today=TODAY, now=NOW + 3600)
+    assert fetch.ranges == []
+    assert len(costs) == 7
+
+
+def test_restatement_days_are_fetched_again():
+    cache, fetch = make_cache()
+    start = TODAY - timedelta(days=7)
+    cache.get_daily_costs('acct', start, TODAY, today=TODAY, now=NOW)
+    assert cache.store.items[('acct', '2025-03-12')]['finalized']
+    assert not cache.store.items[('acct', '2025-03-13')]['finalized']
+
+    cache.get_daily_costs('acct', start, TODAY, today=TODAY, now=NOW + cache.provisional_ttl)
+    assert fetch.ranges[1:] == [(TODAY - timedelta(days=2), TODAY)]
+
+
+def test_restatement_days_are_memoized_within_the_ttl():
+    cache, fetch = make_cache()
+    for offset in (0, 1, 60):
+        cache.get_daily_costs('acct', TODAY - timedelta(days=30), TODAY, today=TODAY, now=NOW + offset)
+    assert len(fetch.ranges) == 1
+    # Other accounts do not share the memo.
+    cache.get_daily_costs('other', TODAY - timedelta(days=2), TODAY, today=TODAY, now=NOW)
+    assert len(fetch.ranges) == 2
+
+
+def test_missing_ranges_are_collapsed():
+    days = [date(2025, 3, d) for d in (1, 2, 3, 7, 9, 10)]
+    assert _missing_ranges(days) == [
+        (date(2025, 3, 1), date(2025, 3, 4)),
+        (date(2025, 3, 7), date(2025, 3, 8)),
+        (date(2025, 3, 9), date(2025, 3, 11)),
+    ]
+
+    cache, fetch = make_cache()
+    for day in (date(2025, 3, 4), date(2025, 3, 5), date(2025, 3, 8)):
+        cache.store.put_day('acct', day.isoformat(), {'EC2': '2.0'}, True)
+    cache.get_daily_costs('acct', date(2025, 3, 1), date(2025, 3, 11), today=TODAY, now=NOW)
+    assert fetch.ranges == [
+        (date(2025, 3, 1), date(2025, 3, 4)),
+        (date(2025, 3, 6), date(2025, 3, 8)),
+        (date(2025, 3, 9), date(2025, 3, 11)),
+    ]
+
+
+def test_hit_and_miss_counters():
+    cache, _ = make_cache()
+    start = TODAY - timedelta(days=10)
+    cache.get_daily_costs('acct', start, TODAY, today=TODAY, now=NOW)
+    assert cache.stats() == {'hits': 0, 'misses': 10, 'ce_calls': 1, 'hit_rate': 0.0}
+
+    cache.get_daily_costs('acct', start, TODAY, today=TODAY, now=NOW + cache.provisional_ttl)
+    assert cache.stats() == {'hits': 8, 'misses': 12, 'ce_calls': 2, 'hit_rate': 0.4}
+
+
+def test_store_read_errors_fall_back_to_cost_explorer():
+    cache, fetch = make_cache()
+
+    def broken(*_):
+        raise RuntimeError("throttled")
+
+    cache.store.get_days = broken
+    costs = cache.get_daily_costs('acct', TODAY - timedelta(days=3), TODAY, today=TODAY, now=NOW)
+    assert len(costs) == 3
+    assert fetch.ranges == [(TODAY - timedelta(days=3), TODAY)]
@@ -0,0 +1,63 @@
+from datetime import date
+
+from cost_series import CostSeries, to_dollars, to_micros
+
+START = date(2025, 1, 1)
+
+
+def make_series(days=10):
+    series = CostSeries(START, days)
+    for d in range(days):
+        series.row('EC2')[d] = to_micros(d + 1)
+        series.row('S3')[d] = to_micros(0.5)
+    return series
+
+
+def test_to_micros_rounds_ce_amounts():
+    assert to_micros('12.3456789') == 12345679
+    assert to_dollars(12345679) == 12.345679
+
+
+def test_from_daily_costs_skips_days_outside_the_window():
+    daily = {'2025-01-01': {'EC2': '1.5'}, '2025-01-03': {'EC2': '2', 'S3': '0.25'}, '2025-02-01': {'EC2': '9'}}
+    series = CostSeries.from_daily_costs(daily, START, date(2025, 1, 4))
+    assert series.n_days == 3
+    assert list(series.row('EC2')) == [1_500_000, 0, 2_000_000]
+    assert series.total() == 3_750_000
+
+
+def test_totals_and_top_k():
+    series = make_series()
+    assert list(series.totals()) == [to_micros(55), to_micros(5)]
+    assert series.top_k(1) == [('EC2', to_micros(55))]
+    assert series.summary(0, 2) == {'EC2': 3.0, 'S3': 1.0}
+
+
+def test_bounds_are_clamped_not_wrapped():
+    series = make_series()
+    assert series.total(-5, 2) == series.total(0, 2)
+    assert series.total(0, -1) == 0
+    assert series.total(8, 100) == series.total(8, 10)
+    assert series.total(20, 30) == 0
+
+
+def test_window_and_last():
+    series = make_series()
+    last = series.last(3)
+    assert last.start == date(2025, 1, 8)
+    assert list(last.row('EC2')) == [to_micros(8), to_micros(9), to_micros(10)]
+    assert series.last(30).n_days == 10
+
+
+def test_period_over_period():
+    series = make_series()
+    current, previous = series.period_over_period(5)
+    assert list(current) == [to_micros(40), to_micros(2.5)]
+    assert list(previous) == [to_micros(15), to_micros(2.5)]
+    assert list(series.deltas(5)) == [to_micros(25), 0]
+
+
+def test_period_over_period_without_enough_history():
+    current, previous = make_series().period_over_period(6)
+    assert list(current) == [to_micros(45), to_micros(3)]
+    assert list(previous) == [0, 0]
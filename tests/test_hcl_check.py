@@ -0,0 +1,87 @@
+import pytest
+
+from hcl_check import RESOURCE_TYPES, check_hcl, fenced_hcl, tokenize
+
+LIFECYCLE = '''# TIP: Move old objects to cheaper storage.
+resource "aws_s3_bucket_lifecycle_configuration" "logs" {
+  bucket = aws_s3_bucket.logs.id
+  rule {
+    id     = "archive-${var.env}"
+    status = "Enabled"
+    filter { prefix = "logs/" }
+    transition {
+      days          = 30
+      storage_class = "STANDARD_IA"
+    }
+  }
+  tags = merge(local.tags, {
+    Name = "logs"
+  })
+  policy = <<-POLICY
+    {"a": 1}
+    POLICY
+  subnets = [for s in var.subnets : s.id if s.public]
+  size    = var.size == "large" ? "m5.large" : "t3.micro"
+}
+locals {
+  retention = lookup(var.m, "k", "d")
+}
+'''
+
+
+def test_valid_snippet():
+    result = check_hcl(LIFECYCLE)
+    assert result.ok, result.errors
+    assert result.resources == ('aws_s3_bucket_lifecycle_configuration.logs',)
+
+
+def test_commented_out_snippet_is_valid():
+    assert check_hcl('# resource "aws_nat_gateway" "example" {\n#   allocation_id = aws_eip.nat.id\n# }').ok
+
+
+@pytest.mark.parametrize('text, error', [
+    ('resource "aws_instance" "a" {\n  ami = "x"\n', "line 3: missing '}'"),
+    ('resource "aws_ec3_instance" "a" {\n ami = "x"\n}', "unknown resource type 'aws_ec3_instance'"),
+    ('resource "aws_instance" "a" {\n ami = var.x +\n}', "ami ends with '+'"),
+    ('resource "aws_instance" "a" {\n ami = "x\n}', "unterminated string"),
+    ('ami = "x"', "argument ami outside any block"),
+    ('resource "aws_instance" {\n}', "resource takes 2 label(s), got 1"),
+    ('resource "aws_instance" "a" {\n tags = {a = [1, 2}\n}', "mismatched '}'"),
+    ('```hcl\nresource "aws_instance" "a" {}\n```', "unexpected character '`'"),
+])
+def test_invalid_snippets(text, error):
+    result = check_hcl(text)
+    assert not result.ok
+    assert error in result.errors[0]
+
+
+def test_interpolation_may_nest_braces_and_strings():
+    text = 'resource "aws_instance" "a" {\n  tags = "${merge(var.tags, {Name = "x"})}"\n  note = "$${literal} %{ if var.on }on%{ endif }"\n}'
+    result = check_hcl(text)
+    assert result.ok, result.errors
+    assert [kind for kind, _, _ in tokenize('a = "${merge(var.tags, {Name = "x"})}"')] == [
+        'ident', 'op', 'string', 'end']
+
+
+def test_unterminated_interpolation():
+    result = check_hcl('resource "aws_instance" "a" {\n  tags = "${merge(var.tags, {Name = "x"}"\n}')
+    assert "line 2: unterminated string" in result.errors[0]
+
+
+def test_fenced_hcl_from_plain_text():
+    reply = '- **Analysis:** x\n- **Terraform Fix:**\n```hcl\nresource "aws_instance" "a" {}\n```\n- **Safety:** y'
+    assert fenced_hcl(reply) == 'resource "aws_instance" "a" {}'
+    assert fenced_hcl("```python\nx = 1\n```") is None
+    assert fenced_hcl(None) is None
+
+
+def test_tokens_track_lines():
+    tokens = tokenize('a = 1\n\nb = "x" // note\n')
+    assert [(kind, line) for kind, _, line in tokens if kind != 'newline'] == [
+        ('ident', 1), ('op', 1), ('number', 1), ('ident', 3), ('op', 3), ('string', 3), ('end', 4)]
+
+
+def test_schema_and_memoization():
+    assert 'aws_instance' in RESOURCE_TYPES
+    assert check_hcl(LIFECYCLE) is check_hcl(LIFECYCLE)
+    assert check_hcl(None) == check_hcl('')
@@ -0,0 +1,63 @@
+from llm_cache import InMemoryResponseStore, PrefixCacheStats, ResponseCache, cache_hit_tokens, response_key
+
+NOW = 1_700_000_000
+PARAMS = {"models": ["deepseek-chat"], "max_tokens": 800, "format": "json"}
+
+
+def test_key_ignores_formatting_but_not_history():
+    key = response_key("Total: $5\nEC2: 4", "Why so high?", "hint", PARAMS)
+    assert response_key("Total:  $5\n  EC2: 4 ", "why so HIGH?", " hint", PARAMS) == key
+    assert response_key("Total: $5\nEC2: 4", "Why so high?", "hint", PARAMS, history="") == key
+    assert response_key("Total: $5\nEC2: 4", "Why so high?", "hint", PARAMS, history="User: fix NAT?") != key
+    assert response_key("Total: $6\nEC2: 4", "Why so high?", "hint", PARAMS) != key
+    assert response_key("Total: $5\nEC2: 4", "Why so high?", "hint", {**PARAMS, "max_tokens": 400}) != key
+
+
+def test_hit_from_the_store_after_a_cold_start():
+    store = InMemoryResponseStore()
+    ResponseCache(store).put('acct', 'k', "answer", 120, now=NOW)
+
+    cold = ResponseCache(store)
+    entry = cold.get('acct', 'k', now=NOW + 60)
+    assert entry['response'] == "answer"
+    assert (cold.hits, cold.misses, cold.saved_tokens) == (1, 0, 120)
+    assert cold.get('other', 'k', now=NOW + 60) is None
+
+
+def test_entries_expire_after_max_age():
+    cache = ResponseCache(InMemoryResponseStore(), max_age=3600)
+    cache.put('acct', 'k', "answer", 10, now=NOW)
+    assert cache.get('acct', 'k', now=NOW + 3600) is not None
+    assert cache.get('acct', 'k', now=NOW + 3601) is None
+    assert ('acct', 'k') not in cache.lru
+
+
+def test_lru_evicts_the_least_recently_used():
+    store = InMemoryResponseStore()
+    cache = ResponseCache(store, lru_size=2)
+    for key in ('a', 'b'):
+        cache.put('acct', key, key, 1, now=NOW)
+    cache.get('acct', 'a', now=NOW)
+    cache.put('acct', 'c', 'c', 1, now=NOW)
+    assert list(cache.lru) == [('acct', 'a'), ('acct', 'c')]
+    # Evicted from the LRU only; the shared store still answers.
+    assert cache.get('acct', 'b', now=NOW)['response'] == 'b'
+
+
+def test_store_errors_are_misses():
+    class Broken(InMemoryResponseStore):
+        def load(self, account_id, key):
+            raise RuntimeError("throttled")
+
+    cache = ResponseCache(Broken())
+    assert cache.get('acct', 'k', now=NOW) is None
+    assert cache.misses == 1
+
+
+def test_prefix_cache_usage_formats():
+    assert cache_hit_tokens({'prompt_cache_hit_tokens': 900, 'prompt_cache_miss_tokens': 100}) == (900, 100)
+    assert cache_hit_tokens({'prompt_tokens': 1000, 'prompt_tokens_details': {'cached_tokens': 768}}) == (768, 232)
+    stats = PrefixCacheStats()
+    stats.record(None)
+    stats.record({'prompt_tokens': 10})
+    assert (stats.requests, stats.hit_tokens, stats.miss_tokens) == (1, 0, 10)
@@ -0,0 +1,83 @@
+from datetime import date
+
+import pytest
+
+from query_compiler import (SERVICE_ALIASES, compile_query, execute, previous_window, resolve_window,
+                            window_label)
+
+TODAY = date(2025, 3, 12)  # a Wednesday
+
+
+@pytest.mark.parametrize('text, window, op, dimension', [
+    ("total last 14 days", ('last_n', 14), 'total', 'SERVICE'),
+    ("top 3 services this month", ('this_month',), 'top', 'SERVICE'),
+    ("cost by region yesterday", ('yesterday',), 'breakdown', 'REGION'),
+    ("compare last week", ('last_week',), 'compare', 'SERVICE'),
+    ("30 how much?", ('last_n', 30), 'total', 'SERVICE'),
+])
+def test_data_questions_compile_deterministically(text, window, op, dimension):
+    plan = compile_query(text)
+    assert (plan.window, plan.op, plan.dimension) == (window, op, dimension)
+    assert plan.deterministic
+
+
+@pytest.mark.parametrize('text', ["why is my bill so high", "7", "how do I reduce nat gateway cost"])
+def test_open_questions_go_to_the_llm(text):
+    assert not compile_query(text).deterministic
+
+
+def test_service_and_tag_filters():
+    plan = compile_query("ec2 cost by service for team=payments last 7 days")
+    assert plan.service == SERVICE_ALIASES['ec2']
+    assert plan.dimension == 'USAGE_TYPE'
+    assert plan.tags == (('team', 'payments'),)
+    assert plan.deterministic
+
+    by_tag = compile_query("cost by tag project this month")
+    assert (by_tag.dimension, by_tag.tag_key, by_tag.op) == ('TAG', 'project', 'breakdown')
+
+
+def test_window_is_capped():
+    assert compile_query("total last 400 days").window == ('last_n', 60)
+
+
+def test_resolve_window():
+    assert resolve_window(('last_n', 7), TODAY) == (date(2025, 3, 5), TODAY)
+    assert resolve_window(('this_week',), TODAY) == (date(2025, 3, 10), date(2025, 3, 13))
+    assert resolve_window(('last_week',), TODAY) == (date(2025, 3, 3), date(2025, 3, 10))
+    assert resolve_window(('last_month',), TODAY) == (date(2025, 2, 1), date(2025, 3, 1))
+    with pytest.raises(ValueError):
+        resolve_window(('next_year',), TODAY)
+
+
+def test_previous_window():
+    assert previous_window(date(2025, 2, 1), date(2025, 3, 1)) == (date(2025, 1, 1), date(2025, 2, 1))
+    assert previous_window(date(2025, 3, 5), date(2025, 3, 12)) == (date(2025, 2, 26), date(2025, 3, 5))
+    assert window_label(('last_n', 7)) == "Last 7 Days"
+    assert window_label(('last_month',)) == "Last Month"
+
+
+def test_execute_total_and_top():
+    data = {'EC2': 6_000_000, 'S3': 3_000_000, 'Lambda': 1_000_000}
+    fetch = lambda start, end, dimension, service: data
+
+    total = execute(compile_query("total last 7 days"), fetch, TODAY)
+    assert total.startswith("*Total:* $10.00 (2025-03-05 to 2025-03-11)")
+    assert "• EC2: $6.00 (60%)" in total
+
+    top = execute(compile_query("top 2 services last 7 days"), fetch, TODAY)
+    assert top.splitlines() == ["*Top 2 by service:* (total $10.00)", "• EC2: $6.00 (60%)", "• S3: $3.00 (30%)"]
+
+
+def test_execute_compare_fetches_the_previous_window():
+    windows = []
+
+    def fetch(start, end, dimension, service):
+        windows.append((start, end))
+        return {'EC2': 2_000_000} if len(windows) == 1 else {'EC2': 1_000_000, 'S3': 500_000}
+
+    answer = execute(compile_query("compare last 7 days"), fetch, TODAY)
+    assert windows == [(date(2025, 3, 5), TODAY), (date(2025, 2, 26), date(2025, 3, 5))]
+    assert "$2.00 vs $1.50 (+33.3%)" in answer
+    assert "• EC2: $2.00 (+$1.00)" in answer
+    assert "• S3: $0.00 (-$0.50)" in answer
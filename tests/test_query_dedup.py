@@ -0,0 +1,40 @@
+from query_dedup import (InMemoryQueryIndexStore, NearDuplicateDetector, QueryIndex, features, signature,
+                         similarity)
+
+
+def test_rephrasings_share_canonical_features():
+    assert features("why so expensive?") == features("what's driving cost") == {'driver', 'cost'}
+    assert signature(features("the")) is None
+
+
+def test_similar_queries_match_on_the_same_snapshot_only():
+    detector = NearDuplicateDetector(InMemoryQueryIndexStore())
+    detector.add('acct', "why is my bill so expensive", 'snap-1', 'resp-1')
+    assert detector.find('acct', "what's driving my costs", 'snap-1') == 'resp-1'
+    assert detector.find('acct', "what's driving my costs", 'snap-2') is None
+    assert detector.find('acct', "idle ebs volumes", 'snap-1') is None
+    assert detector.find('other', "what's driving my costs", 'snap-1') is None
+
+
+def test_index_is_stored_and_loaded_back():
+    store = InMemoryQueryIndexStore()
+    NearDuplicateDetector(store).add('acct', "biggest cost this week", 'snap-1', 'resp-1')
+    assert 'acct' in store.items
+
+    # A cold container loads the stored index instead of starting empty.
+    cold = NearDuplicateDetector(store)
+    assert cold.find('acct', "top spend this week", 'snap-1') == 'resp-1'
+
+
+def test_state_round_trip_keeps_ring_position():
+    index = QueryIndex(capacity=3)
+    for i, query in enumerate(["ec2 cost", "s3 cost", "rds cost", "idle waste"]):
+        index.add(signature(features(query)), f"snap-{i}", f"resp-{i}")
+    loaded = QueryIndex.from_state(index.to_state(), capacity=3)
+    assert loaded.responses == index.responses == ['resp-3', 'resp-1', 'resp-2']
+    assert loaded.next_slot == index.next_slot == 1
+    sig = signature(features("idle waste"))
+    assert similarity(sig, loaded.signatures[0]) == 1.0
+    assert loaded.find(sig, 'snap-3') == 'resp-3'
+    # The overwritten slot no longer answers.
+    assert loaded.find(signature(features("ec2 cost")), 'snap-0') is None
@@ -0,0 +1,93 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from query_planner import classify_question, plan_query, run_plan, split_months
+from stubs import StubCEClient
+
+TODAY = date(2025, 3, 15)
+NOON = datetime(2025, 3, 15, 12, 30, tzinfo=timezone.utc)
+
+
+class HourlyUnavailableCE(StubCEClient):
+    """StubCEClient for an account without the Cost Explorer hourly opt-in."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = []
+
+    def get_cost_and_usage(self, **request):
+        self.requests.append(dict(request))
+        if request['Granularity'] == 'HOURLY':
+            raise RuntimeError("Hourly granularity is not enabled")
+        return super().get_cost_and_usage(**request)
+
+
+@pytest.mark.parametrize('query, expected', [
+    ("what did we spend today", 'today'),
+    ("total spend", 'total'),
+    ("how much overall", 'total'),
+    ("total by service", 'breakdown'),
+    ("give me a summary", 'breakdown'),
+    ("top services", 'breakdown'),
+    ("", 'breakdown'),
+])
+def test_classify_question(query, expected):
+    assert classify_question(query) == expected
+
+
+def test_split_months():
+    segments = split_months(date(2025, 1, 20), date(2025, 3, 10))
+    assert [(s.start, s.end, s.granularity) for s in segments] == [
+        (date(2025, 1, 20), date(2025, 2, 1), 'DAILY'),
+        (date(2025, 2, 1), date(2025, 3, 1), 'MONTHLY'),
+        (date(2025, 3, 1), date(2025, 3, 10), 'DAILY'),
+    ]
+
+
+def test_breakdown_uses_the_daily_cache():
+    plan = plan_query(date(2025, 3, 1), TODAY, 'breakdown', now=NOON)
+    assert plan.name == 'daily-cached'
+
+
+def test_long_uncached_breakdown_uses_monthly_segments():
+    plan = plan_query(date(2024, 6, 20), TODAY, 'breakdown', use_cache=False, now=NOON)
+    assert plan.name == 'monthly+daily-edges'
+    assert [s.granularity for s in plan.segments] == ['DAILY', 'MONTHLY', 'DAILY']
+
+
+def test_totals_fit_in_one_daily_call():
+    plan = plan_query(date(2024, 11, 20), TODAY, 'total', now=NOON)
+    assert plan.name == 'totals-daily'
+    assert plan.group_by == []
+
+
+def test_today_plan_is_hourly():
+    plan = plan_query(TODAY, TODAY, 'today', now=NOON)
+    assert plan.name == 'hourly-today'
+    assert (plan.start, plan.segments[0].granularity) == (TODAY, 'HOURLY')
+
+
+def test_today_plan_in_the_first_utc_hour_shows_yesterday():
+    plan = plan_query(TODAY, TODAY, 'today', now=datetime(2025, 3, 15, 0, 20, tzinfo=timezone.utc))
+    assert plan.start == date(2025, 3, 14)
+    assert plan.end == TODAY
+
+
+def test_hourly_failure_falls_back_to_daily():
+    # Planned and fetched against the real clock, like the handler does.
+    plan = plan_query(None, None, 'today')
+    ce = HourlyUnavailableCE(days=1, keys=3, start=plan.start)
+    series = run_plan(ce, plan)
+    assert [r['Granularity'] for r in ce.requests] == ['HOURLY', 'DAILY']
+    assert len(series) == 3
+    assert series.total() > 0
+
+
+def test_run_plan_follows_pagination():
+    start = date(2025, 1, 1)
+    plan = plan_query(start, date(2025, 1, 11), 'breakdown', use_cache=False, now=NOON)
+    ce = StubCEClient(days=10, keys=20, page_size=50, start=start)
+    series = run_plan(ce, plan)
+    assert ce.calls == 4
+    assert len(series) == 20
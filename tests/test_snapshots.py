@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+from snapshots import (MAX_AGE_SECONDS, InMemorySnapshotStore, SnapshotStats, is_fresh, make_snapshot,
+                       snapshot_age)
+
+# 2025-03-15 08:00 UTC
+MORNING = datetime(2025, 3, 15, 8, tzinfo=timezone.utc).timestamp()
+
+
+def test_store_round_trip_per_account_and_window():
+    store = InMemorySnapshotStore()
+    snapshot = make_snapshot(7, "General", {'EC2': 12.5}, "analysis", now=MORNING, anomalies=[])
+    store.save('acct', 7, snapshot)
+    assert store.load('acct', 7) == snapshot
+    assert store.load('acct', 30) is None
+    assert store.load('other', 7) is None
+    assert snapshot['computed_on'] == '2025-03-15'
+    assert snapshot['anomalies'] == []
+
+
+def test_fresh_on_the_same_utc_day():
+    snapshot = make_snapshot(7, "General", {}, "analysis", now=MORNING)
+    assert is_fresh(snapshot, now=MORNING + 3600)
+    assert snapshot_age(snapshot, now=MORNING + 3600) == 3600
+
+
+def test_stale_after_max_age_or_a_new_utc_day():
+    snapshot = make_snapshot(7, "General", {}, "analysis", now=MORNING)
+    assert not is_fresh(snapshot, now=MORNING + MAX_AGE_SECONDS + 1)
+    late = make_snapshot(7, "General", {}, "analysis", now=MORNING + 15 * 3600)  # 23:00 UTC
+    assert not is_fresh(late, now=MORNING + 17 * 3600)                            # 01:00 next day
+    assert not is_fresh(None)
+
+
+def test_stats_hit_rate_ignores_bypassed(capsys):
+    stats = SnapshotStats()
+    for outcome in ('hits', 'hits', 'stale', 'misses', 'bypassed'):
+        stats.record(outcome)
+    assert '"hit_rate": 0.5' in capsys.readouterr().out.splitlines()[-1]
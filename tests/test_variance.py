@@ -0,0 +1,86 @@
+from array import array
+from datetime import date
+
+import pytest
+
+from cost_series import CostSeries, to_micros
+from variance import (attribute, attribute_series, attribute_usage_types, attribute_windows, fetch_window_metrics,
+                      format_drivers, is_variance_question)
+
+CURRENT = (date(2025, 3, 1), date(2025, 3, 8))
+PREVIOUS = (date(2025, 2, 22), date(2025, 3, 1))
+
+
+class UsageTypeCE:
+    """One MONTHLY page per window, keyed by the request's start date."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def get_cost_and_usage(self, **request):
+        groups = [{'Keys': [key], 'Metrics': {'UnblendedCost': {'Amount': cost}, 'UsageQuantity': {'Amount': qty}}}
+                  for key, cost, qty in self.pages[request['TimePeriod']['Start']]]
+        return {'ResultsByTime': [{'TimePeriod': request['TimePeriod'], 'Groups': groups}]}
+
+
+def test_is_variance_question():
+    assert is_variance_question("Why did my bill go up?")
+    assert not is_variance_question("top services")
+
+
+def test_attribute_ranks_by_absolute_change():
+    report = attribute(['EC2', 'S3', 'RDS'], array('q', [5_000_000, 1_000_000, 2_000_000]),
+                       array('q', [2_000_000, 4_000_000, 2_000_000]))
+    assert [d['key'] for d in report['drivers']] == ['EC2', 'S3']
+    assert report['delta'] == 0.0
+    assert report['drivers'][1]['delta'] == -3.0
+
+
+def test_attribute_splits_price_and_volume():
+    report = attribute(['NatGateway-Bytes'], array('q', [to_micros(30)]), array('q', [to_micros(10)]),
+                       current_qty=[200.0], previous_qty=[100.0])
+    driver = report['drivers'][0]
+    assert driver['volume'] == pytest.approx(10.0)
+    assert driver['price'] == pytest.approx(10.0)
+
+
+def test_attribute_series_compares_the_last_two_windows():
+    series = CostSeries(date(2025, 3, 1), 4)
+    for d, amount in enumerate(['1', '1', '3', '3']):
+        series.add('EC2', series.day(d), amount)
+    report = attribute_series(series, 2)
+    assert (report['previous'], report['current']) == (2.0, 6.0)
+
+
+def test_attribute_windows_aligns_keys_by_name():
+    current = CostSeries(date(2025, 3, 1), 2)
+    current.add('S3', date(2025, 3, 1), '1')
+    current.add('EC2', date(2025, 3, 2), '5')
+    previous = CostSeries(date(2025, 2, 27), 2)
+    previous.add('EC2', date(2025, 2, 27), '2')
+    previous.add('RDS', date(2025, 2, 28), '4')
+    report = attribute_windows(current, previous)
+    assert {d['key']: d['delta'] for d in report['drivers']} == {'RDS': -4.0, 'EC2': 3.0, 'S3': 1.0}
+    assert (report['previous'], report['current']) == (6.0, 6.0)
+
+
+def test_usage_types_from_cost_explorer():
+    ce = UsageTypeCE({
+        CURRENT[0].isoformat(): [('BoxUsage', '12', '120'), ('DataTransfer-Out', '1', '10')],
+        PREVIOUS[0].isoformat(): [('BoxUsage', '6', '60'), ('TimedStorage', '2', '20')],
+    })
+    keys, costs, quantities = fetch_window_metrics(ce, [CURRENT, PREVIOUS])
+    assert keys == ['BoxUsage', 'DataTransfer-Out', 'TimedStorage']
+    assert list(costs[1]) == [6_000_000, 0, 2_000_000]
+
+    report = attribute_usage_types(ce, CURRENT, PREVIOUS)
+    assert report['drivers'][0] == {'key': 'BoxUsage', 'previous': 6.0, 'current': 12.0, 'delta': 6.0,
+                                    'volume': 6.0, 'price': 0.0}
+    lines = format_drivers(report, "Usage types").splitlines()
+    assert lines[0] == "Usage types: $8.00 -> $13.00 (+5.00)"
+    assert lines[1] == "1. BoxUsage +6.00 ($6.00 -> $12.00) [volume +6.00, price +0.00]"
+
+
+def test_format_drivers_without_change():
+    assert format_drivers(None, "Services") == ""
+    assert format_drivers(attribute(['EC2'], array('q', [1]), array('q', [1])), "Services") == ""
@@ -36,3 +36,38 @@ variable "alert_email" {
 }
 
 
+
+variable "cur_s3_uris" {
+  description = "Optional s3:// URIs of Cost and Usage Report CSV(.gz) files for resource/tag level analysis"
+  type        = list(string)
+  default     = []
+}
+
+variable "cost_allocation_tags" {
+  description = "Cost allocation tag keys indexed for showback queries (e.g. team=payments); empty discovers active tags"
+  type        = list(string)
+  default     = []
+}
+
+variable "llm_cache_max_age_seconds" {
+  description = "How long an identical question on identical cost data reuses the cached LLM answer"
+  type        = number
+  default     = 21600
+}
+
+variable "llm_providers" {
+  description = "Chat-completions endpoints routed by observed latency; key_path must be an SSM parameter under /costbot/. Empty uses DeepSeek only"
+  type = list(object({
+    name     = string
+    url      = string
+    model    = string
+    key_path = string
+  }))
+  default = []
+}
+
+variable "rules_spend_threshold" {
+  description = "Windows with total spend below this many dollars get the rule-based analysis instead of an LLM call"
+  type        = number
+  default     = 1
+}